@@ -0,0 +1,85 @@
+"""
+Latência e throughput do SentimentInferenceService sob concorrência
+
+Compara uma avaliação por forward pass (max_batch_size=1) com micro-batching,
+com --concurrency clientes enviando avaliações em paralelo. Usa um modelo BERT
+minúsculo criado localmente (sem download); passe --model para o modelo real.
+
+Uso:
+    python -m benchmarks.bench_inference_service --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.tiny_model import build_tiny_model, synthetic_reviews
+
+
+async def run_load(service, reviews, concurrency):
+    """Dispara as avaliações com no máximo `concurrency` em voo e mede cada uma"""
+    latencies = []
+    pending = iter(reviews)
+
+    async def client():
+        for review in pending:
+            start = time.perf_counter()
+            await service.analyze_review(review)
+            latencies.append(time.perf_counter() - start)
+
+    await service.start()
+    await service.warmup()
+    service.analyzer.cache.clear()
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    stats = service.stats()
+    await service.stop()
+    return elapsed, np.asarray(latencies), stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--max-words', type=int, default=120)
+    parser.add_argument('--window-ms', type=float, default=5)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--model', default=None)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["MODEL_PATH"] = workdir
+    model_name = args.model or build_tiny_model(os.path.join(workdir, "tiny-bert"))
+
+    from src.ml.inference_service import SentimentInferenceService
+    reviews = synthetic_reviews(args.requests, max_words=args.max_words)
+    configs = [
+        ('sem lote', 1, 0),
+        (f'micro-lote ({args.window_ms:g} ms / {args.max_batch_size})', args.max_batch_size, args.window_ms)
+    ]
+
+    print(f"modelo: {model_name} | requisições: {len(reviews)} | concorrência: {args.concurrency} "
+          f"| workers: {args.workers} ({args.executor})")
+    print(f"{'configuração':>28} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'lote médio':>11}")
+    for label, max_batch_size, window_ms in configs:
+        service = SentimentInferenceService(
+            analyzer_kwargs={'model_name': model_name},
+            max_batch_size=max_batch_size,
+            batch_window_ms=window_ms,
+            workers=args.workers,
+            executor=args.executor
+        )
+        elapsed, latencies, stats = asyncio.run(run_load(service, reviews, args.concurrency))
+        print(f"{label:>28} {len(reviews) / elapsed:>8,.0f} "
+              f"{np.percentile(latencies, 50) * 1000:>9.1f} {np.percentile(latencies, 99) * 1000:>9.1f} "
+              f"{stats['mean_batch_size']:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Custo por página de /products/: OFFSET x cursor (keyset) em Product.id
+
+Popula um SQLite temporário (ou o banco de --database-url) e mede a consulta
+de uma página em várias profundidades do catálogo, com e sem filtro de
+categoria. Com keyset o tempo fica constante; com OFFSET cresce com a página.
+
+Uso:
+    python -m benchmarks.bench_products_pagination --products 500000 --limit 100
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.database.synthetic_data import CATEGORIES
+
+
+def time_query(connection, query, repeat):
+    """Mediana do tempo de execução da consulta (ms)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(query).fetchall()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=500000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault("DATABASE_URL", database_url)
+    from sqlalchemy import create_engine, func, insert, select
+    from src.database import models
+    from src.database.config import Base
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        if not connection.execute(select(func.count()).select_from(models.Product)).scalar():
+            for start in range(1, args.products + 1, 50000):
+                connection.execute(insert(models.Product), [
+                    {
+                        "id": i,
+                        "name": f"Produto {i}",
+                        "category": CATEGORIES[i % len(CATEGORIES)],
+                        "price": float(i % 1000),
+                        "description": "descrição do produto"
+                    }
+                    for i in range(start, min(start + 50000, args.products + 1))
+                ])
+
+    columns = (models.Product.id, models.Product.name, models.Product.price)
+    product = models.Product
+    queries = {
+        'offset': lambda depth, category: (
+            select(*columns).where(*([product.category == category] if category else []))
+            .order_by(product.id).offset(depth).limit(args.limit)
+        ),
+        'keyset': lambda depth, category: (
+            select(*columns).where(product.id > depth, *([product.category == category] if category else []))
+            .order_by(product.id).limit(args.limit + 1)
+        )
+    }
+
+    print(f"banco: {engine.url.get_backend_name()} | produtos: {args.products} | página: {args.limit} itens")
+    print(f"{'filtro':>12} {'profundidade':>13} {'OFFSET (ms)':>12} {'keyset (ms)':>12}")
+    with engine.connect() as connection:
+        for category in (None, CATEGORIES[0]):
+            fraction = 1 if category is None else len(CATEGORIES)
+            for depth in (0, args.products // 10, args.products // 2, args.products - args.limit * fraction):
+                # Mesma página nos dois modos: o cursor é o id anterior ao
+                # primeiro item; com filtro, OFFSET pula só os itens da categoria
+                offset_ms = time_query(connection, queries['offset'](depth // fraction, category), args.repeat)
+                keyset_ms = time_query(connection, queries['keyset'](depth, category), args.repeat)
+                print(f"{category or '-':>12} {depth:>13,} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark de recomendações em lote: loop de recommend_products x recommend_products_batch
+
+Uso:
+    python -m benchmarks.bench_recommend_batch --products 5000 --seeds 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.ml.recommender import ProductRecommender
+
+
+def synthetic_products(n_products: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    words = [f"termo{i}" for i in range(500)]
+    categories = ["Eletrônicos", "Acessórios", "Casa", "Esporte", "Livros"]
+    return [
+        {
+            "id": i + 1,
+            "name": " ".join(rng.choice(words, 3)),
+            "category": categories[i % len(categories)],
+            "description": " ".join(rng.choice(words, 12))
+        }
+        for i in range(n_products)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--seeds', type=int, default=2000)
+    parser.add_argument('--n', type=int, default=10)
+    parser.add_argument('--top-k', type=int, default=None)
+    args = parser.parse_args()
+
+    os.environ["MODEL_PATH"] = tempfile.mkdtemp()
+    recommender = ProductRecommender(top_k=args.top_k)
+    recommender.fit(synthetic_products(args.products))
+    seeds = np.random.default_rng(0).integers(1, args.products + 1, args.seeds).tolist()
+
+    start = time.perf_counter()
+    looped = [recommender.recommend_products(product_id, args.n) for product_id in seeds]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = recommender.recommend_products_batch(seeds, args.n)
+    batch_time = time.perf_counter() - start
+
+    assert batched.shape == (len(seeds), len(looped[0]))
+    print(f"loop:  {loop_time:.3f}s ({len(seeds) / loop_time:,.0f} produtos/s)")
+    print(f"batch: {batch_time:.3f}s ({len(seeds) / batch_time:,.0f} produtos/s)")
+    print(f"speedup: {loop_time / batch_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark de recommend_products: implementação antiga x lookup O(1) + argpartition
+
+Uso:
+    python -m benchmarks.bench_recommend_products --sizes 10000 100000 1000000
+
+A matriz N x N não cabe em memória para catálogos grandes, então todas as
+linhas de similaridade apontam para o mesmo vetor pré-gerado. O custo medido
+é o de cada chamada (busca do produto, seleção e conversão dos IDs), que é
+exatamente o que as duas implementações fazem de forma diferente.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.ml.recommender import ProductRecommender
+
+
+class _ConstantRows:
+    """Simula uma matriz de similaridade N x N onde todas as linhas são iguais"""
+
+    def __init__(self, row: np.ndarray):
+        self.row = row
+
+    def __getitem__(self, idx):
+        return self.row
+
+
+def legacy_recommend_products(recommender: ProductRecommender, product_id: int, n_recommendations: int = 5):
+    """Implementação anterior: scan booleano, lista de tuplas e sort completo"""
+    product_idx = recommender.products_df[recommender.products_df['id'] == product_id].index[0]
+    similar_products = list(enumerate(recommender.similarity_matrix[product_idx]))
+    similar_products = sorted(similar_products, key=lambda x: x[1], reverse=True)
+    similar_products = similar_products[1:n_recommendations+1]
+    return [recommender.products_df.iloc[i[0]]['id'] for i in similar_products]
+
+
+def build_recommender(n_products: int, seed: int = 42) -> ProductRecommender:
+    rng = np.random.default_rng(seed)
+    recommender = ProductRecommender()
+    recommender.products_df = pd.DataFrame({'id': np.arange(1, n_products + 1)})
+    recommender.product_ids = recommender.products_df['id'].to_numpy()
+    recommender.similarity_matrix = _ConstantRows(rng.random(n_products, dtype=np.float32))
+    recommender._build_id_index()
+    return recommender
+
+
+def time_calls(func, recommender, product_ids, n_recommendations):
+    start = time.perf_counter()
+    for product_id in product_ids:
+        func(recommender, int(product_id), n_recommendations)
+    return (time.perf_counter() - start) / len(product_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--n', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'produtos':>10} {'antigo (ms)':>12} {'novo (ms)':>10} {'speedup':>8}")
+    for n_products in args.sizes:
+        recommender = build_recommender(n_products)
+        product_ids = np.random.default_rng(0).integers(1, n_products + 1, args.calls)
+
+        legacy = time_calls(legacy_recommend_products, recommender, product_ids, args.n)
+        current = time_calls(ProductRecommender.recommend_products, recommender, product_ids, args.n)
+        print(f"{n_products:>10} {legacy * 1000:>12.2f} {current * 1000:>10.3f} {legacy / current:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
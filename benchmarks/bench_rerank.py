@@ -0,0 +1,60 @@
+"""
+Benchmark do re-ranqueamento híbrido: recommend_products com e sem atributos
+
+Uso:
+    python -m benchmarks.bench_rerank --sizes 10000 100000 1000000 --candidates 50
+
+O índice top-K e a matriz de atributos são gerados aleatoriamente (sem fit),
+então o tempo medido é só o de cada chamada: busca do produto, seleção dos
+candidatos e, no modo híbrido, o score vetorizado e a nova seleção.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.ml.recommender import ProductRecommender
+from src.ml.reranker import FEATURES, HybridReranker
+
+
+def build_recommender(n_products: int, top_k: int, n_candidates: int, seed: int = 42) -> ProductRecommender:
+    rng = np.random.default_rng(seed)
+    recommender = ProductRecommender(top_k=top_k, reranker=HybridReranker(n_candidates=n_candidates))
+    recommender.product_ids = np.arange(1, n_products + 1, dtype=np.int64)
+    recommender._build_id_index()
+    recommender.neighbor_indices = rng.integers(0, n_products, (n_products, top_k), dtype=np.int32)
+    recommender.neighbor_scores = -np.sort(-rng.random((n_products, top_k), dtype=np.float32), axis=1)
+    recommender.product_features = rng.random((n_products, len(FEATURES)), dtype=np.float32)
+    return recommender
+
+
+def time_calls(recommender, product_ids, n_recommendations) -> float:
+    start = time.perf_counter()
+    for product_id in product_ids:
+        recommender.recommend_products(int(product_id), n_recommendations)
+    return (time.perf_counter() - start) / len(product_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--top-k', type=int, default=100)
+    parser.add_argument('--candidates', type=int, default=50)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--n', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'produtos':>10} {'conteúdo (µs)':>14} {'híbrido (µs)':>13} {'acréscimo (µs)':>15}")
+    for n_products in args.sizes:
+        recommender = build_recommender(n_products, args.top_k, args.candidates)
+        product_ids = np.random.default_rng(0).integers(1, n_products + 1, args.calls)
+
+        hybrid = time_calls(recommender, product_ids, args.n)
+        features, recommender.product_features = recommender.product_features, None
+        plain = time_calls(recommender, product_ids, args.n)
+        recommender.product_features = features
+        print(f"{n_products:>10} {plain * 1e6:>14.1f} {hybrid * 1e6:>13.1f} {(hybrid - plain) * 1e6:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Latência e memória (RSS) dos backends de inferência do SentimentAnalyzer em CPU
+
+Cada backend roda em um subprocesso próprio, para que o pico de RSS de um não
+contamine o outro. Sem --model, usa um BERT minúsculo criado localmente; para
+medir o modelo real sem rede, passe --model com o diretório local do modelo.
+
+Uso:
+    python -m benchmarks.bench_sentiment_backends --backends torch quantized onnx
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.tiny_model import build_tiny_model, synthetic_reviews
+
+
+def run_worker(args):
+    """Mede um backend e imprime o resultado em JSON"""
+    import torch
+    from src.ml.sentiment_analyzer import SentimentAnalyzer
+    from src.ml.sentiment_cache import SentimentCache
+
+    torch.set_num_threads(args.threads)
+    start = time.perf_counter()
+    analyzer = SentimentAnalyzer(model_name=args.model, backend=args.backend, cache=SentimentCache(max_size=0))
+    analyzer.warmup()
+    load_time = time.perf_counter() - start
+    texts = [review["text"] for review in synthetic_reviews(args.reviews, max_words=args.max_words)]
+    analyzer.analyze_texts(texts[:8])  # aquecimento dos tamanhos de lote
+
+    latencies = []
+    for text in texts[:args.single]:
+        start = time.perf_counter()
+        analyzer.analyze_text(text)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    results = analyzer.analyze_texts(texts, batch_size=args.batch_size)
+    batch_time = time.perf_counter() - start
+
+    print(json.dumps({
+        'backend': args.backend,
+        'load_s': load_time,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'throughput': len(texts) / batch_time,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'labels': [r['sentiment'] for r in results]
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['torch', 'quantized', 'onnx'])
+    parser.add_argument('--model', default=None)
+    parser.add_argument('--reviews', type=int, default=512)
+    parser.add_argument('--single', type=int, default=100)
+    parser.add_argument('--max-words', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--backend', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        return run_worker(args)
+
+    workdir = tempfile.mkdtemp()
+    model = args.model or build_tiny_model(os.path.join(workdir, "tiny-bert"))
+    env = {**os.environ, "MODEL_PATH": workdir}
+
+    results = []
+    for backend in args.backends:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_sentiment_backends', '--backend', backend,
+             '--model', model, '--reviews', str(args.reviews), '--single', str(args.single),
+             '--max-words', str(args.max_words), '--batch-size', str(args.batch_size),
+             '--threads', str(args.threads)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    reference = results[0]['labels']
+    print(f"{'backend':>10} {'carga (s)':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'textos/s':>9} {'RSS (MB)':>9} {'concordância':>13}")
+    for result in results:
+        agreement = np.mean([a == b for a, b in zip(result['labels'], reference)])
+        print(
+            f"{result['backend']:>10} {result['load_s']:>10.2f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+            f"{result['throughput']:>9.0f} {result['max_rss_mb']:>9.0f} {agreement:>12.1%}"
+        )
+
+
+if __name__ == '__main__':
+    main()
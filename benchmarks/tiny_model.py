@@ -0,0 +1,70 @@
+"""
+Modelo BERT minúsculo salvo em disco para testes e benchmarks offline
+
+Tem a mesma arquitetura do neuralmind/bert-base-portuguese-cased, mas com
+pesos aleatórios e poucas camadas, então não depende de download.
+"""
+import os
+
+import numpy as np
+
+WORDS = (
+    "produto excelente ótimo bom ruim péssimo chegou rápido demorou entrega "
+    "qualidade preço barato caro recomendo não gostei adorei superou minhas "
+    "expectativas mediano poderia ser melhor funciona quebrou defeito veio "
+    "errado embalagem bonita atendimento loja comprei novamente de novo muito "
+    "pouco bem mal o a e um uma com sem para que do da no na é foi está"
+).split()
+
+
+def build_tiny_model(path: str, hidden_size: int = 64, num_layers: int = 2, seed: int = 0) -> str:
+    """
+    Cria e salva (save_pretrained) um classificador BERT de 3 classes
+
+    Args:
+        path: Diretório de destino
+        hidden_size: Dimensão das camadas ocultas
+        num_layers: Número de camadas do encoder
+        seed: Semente dos pesos aleatórios
+
+    Returns:
+        O próprio path, para ser usado como model_name
+    """
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    os.makedirs(path, exist_ok=True)
+    vocab_file = os.path.join(path, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + sorted(set(WORDS))))
+    tokenizer = BertTokenizerFast(vocab_file=vocab_file, do_lower_case=False)
+    tokenizer.save_pretrained(path)
+
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=tokenizer.vocab_size,
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=2,
+        intermediate_size=hidden_size * 2,
+        max_position_embeddings=512,
+        num_labels=3,
+        id2label={0: "NEGATIVE", 1: "NEUTRAL", 2: "POSITIVE"},
+        label2id={"NEGATIVE": 0, "NEUTRAL": 1, "POSITIVE": 2}
+    )
+    BertForSequenceClassification(config).eval().save_pretrained(path)
+    return path
+
+
+def synthetic_reviews(n_reviews: int, max_words: int = 200, seed: int = 0):
+    """Gera avaliações com tamanhos variados a partir do vocabulário do modelo"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(2, max_words, n_reviews)
+    return [
+        {
+            "id": i,
+            "rating": int(rng.integers(1, 6)),
+            "text": " ".join(rng.choice(WORDS, length))
+        }
+        for i, length in enumerate(lengths)
+    ]
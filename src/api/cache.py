@@ -0,0 +1,206 @@
+from collections import OrderedDict
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, NamedTuple, Optional
+
+
+class TTLCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Cache LRU em memória com expiração por tempo
+
+        Args:
+            max_size: Número máximo de entradas (as menos usadas saem primeiro)
+            ttl: Segundos até uma entrada expirar (0 desativa o cache)
+            clock: Relógio em segundos (substituível nos testes)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """
+        Busca várias chaves
+
+        Returns:
+            Dicionário chave -> valor apenas com as chaves válidas encontradas
+        """
+        found = {}
+        now = self.clock()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                elif entry[0] <= now:
+                    del self._entries[key]
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+                    self.hits += 1
+        return found
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, values: Dict[Hashable, Any]):
+        """Grava valores com o TTL configurado, descartando as entradas menos usadas"""
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set(self, key: Hashable, value: Any):
+        self.set_many({key: value})
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        """Remove chaves (ex.: produtos alterados)"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Esvazia o cache e zera os contadores"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries)
+            }
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_age: Optional[int] = None,
+        db_path: Optional[str] = None
+    ):
+        """
+        Cache dos rankings (IDs serializados em JSON) dos endpoints de recomendação
+
+        Guarda só o que depende do modelo: os dados dos produtos são
+        hidratados a cada requisição. As chaves incluem a versão do modelo que
+        gerou o ranking. Quando o modelo servido muda (novo artefato salvo ou
+        recarregado), as entradas das versões anteriores são descartadas em
+        sync_model_version.
+
+        Tem um nível LRU em memória e, opcionalmente, um nível SQLite em disco
+        compartilhado entre os workers da API.
+
+        Args:
+            max_size: Entradas em memória (padrão: RESPONSE_CACHE_SIZE ou 10000)
+            ttl: Segundos até uma entrada expirar (padrão: RESPONSE_CACHE_TTL ou 3600)
+            max_age: max-age do Cache-Control enviado aos clientes (padrão:
+                RESPONSE_CACHE_MAX_AGE ou 60)
+            db_path: Arquivo SQLite do nível em disco (padrão:
+                RESPONSE_CACHE_PATH; vazio desativa)
+        """
+        ttl = ttl if ttl is not None else float(os.getenv("RESPONSE_CACHE_TTL", 3600))
+        self.memory = TTLCache(
+            max_size=max_size if max_size is not None else int(os.getenv("RESPONSE_CACHE_SIZE", 10000)),
+            ttl=ttl
+        )
+        self.ttl = ttl
+        self.max_age = max_age if max_age is not None else int(os.getenv("RESPONSE_CACHE_MAX_AGE", 60))
+        self.model_version = None
+        self.disk_hits = 0
+
+        db_path = db_path if db_path is not None else os.getenv("RESPONSE_CACHE_PATH") or None
+        self._db = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache "
+                "(key TEXT PRIMARY KEY, model_version TEXT NOT NULL, etag TEXT NOT NULL, "
+                "body BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(endpoint: str, entity_id: Hashable, limit: int, model_version: str) -> str:
+        return f"{endpoint}:{entity_id}:{limit}:{model_version}"
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}"
+
+    def sync_model_version(self, model_version: str):
+        """Descarta as respostas de outras versões quando o modelo servido muda"""
+        if model_version == self.model_version:
+            return
+        self.memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM response_cache WHERE model_version != ?", (model_version,))
+                self._db.commit()
+        self.model_version = model_version
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Busca uma resposta em memória e depois em disco"""
+        cached = self.memory.get(key)
+        if cached is not None or self._db is None:
+            return cached
+
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT etag, body FROM response_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        self.disk_hits += 1
+        cached = CachedResponse(row[0], bytes(row[1]))
+        self.memory.set(key, cached)
+        return cached
+
+    def set(self, key: str, body: bytes) -> CachedResponse:
+        """Grava uma resposta nos dois níveis e retorna seu ETag"""
+        cached = CachedResponse(f'"{hashlib.sha1(body).hexdigest()[:20]}"', body)
+        self.memory.set(key, cached)
+        if self._db is not None and self.ttl > 0:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, model_version, etag, body, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, self.model_version or '', cached.etag, body, time.time() + self.ttl)
+                )
+                self._db.commit()
+        return cached
+
+    def clear(self):
+        self.memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.memory.stats(), 'disk_hits': self.disk_hits, 'model_version': self.model_version}
@@ -1,10 +1,23 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import hashlib
+import json
 import numpy as np
+from src.api.cache import ResponseCache
+from src.api.model_registry import ModelRegistry
+from src.api.products import PRODUCT_FIELDS, ProductHydrator
+from src.database import models
+from src.database.config import get_async_db
+from src.ml.recommender import ProductRecommender
+from src.ml.inference_service import SentimentInferenceService
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -15,6 +28,21 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Modelo de recomendação: os arrays do artefato são abertos com mmap, então
+# todos os workers do uvicorn compartilham a mesma cópia no page cache. O
+# registro troca o modelo quando uma nova versão é publicada; cada requisição
+# usa registry.current lido uma única vez.
+registry = ModelRegistry(lambda: ProductRecommender(mmap_mode='r'))
+
+# Inferência de sentimento em micro-lotes, fora do event loop
+sentiment_service = SentimentInferenceService()
+
+# IDs recomendados -> produtos, com cache por ID e uma consulta IN por requisição
+product_hydrator = ProductHydrator()
+
+# Rankings (IDs) das rotas de recomendação, por versão do modelo
+response_cache = ResponseCache()
+
 # Configuração CORS
 app.add_middleware(
     CORSMiddleware,
@@ -24,13 +52,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def load_models():
+    try:
+        await registry.reload()
+    except FileNotFoundError:
+        # Sem modelo treinado: as rotas de recomendação respondem 503
+        pass
+    await registry.start()
+    
+    await sentiment_service.start()
+    try:
+        await sentiment_service.warmup()
+    except OSError:
+        # Modelo indisponível (ex.: sem rede): a primeira avaliação tenta de novo
+        pass
+
+@app.on_event("shutdown")
+async def stop_services():
+    await registry.stop()
+    await sentiment_service.stop()
+
 # Modelos de dados
 class Product(BaseModel):
     id: int
     name: str
-    category: str
+    category: Optional[str] = None
     price: float
-    description: str
+    description: Optional[str] = None
 
 class User(BaseModel):
     id: int
@@ -43,32 +92,235 @@ class Review(BaseModel):
     product_id: int
     rating: int
     text: str
-    sentiment: Optional[float] = None
+    sentiment: Optional[str] = None
+    sentiment_score: Optional[float] = None
+
+# Produtos base por chamada de /products/recommendations/batch
+MAX_BATCH_PRODUCTS = 1000
+
+class BatchRecommendationRequest(BaseModel):
+    product_ids: List[int] = Field(..., min_items=1, max_items=MAX_BATCH_PRODUCTS)
+    limit: int = Field(5, ge=1, le=100)
+
+class ProductRecommendations(BaseModel):
+    product_id: int
+    recommendations: List[Product]
+
+class ProductPage(BaseModel):
+    # Itens com apenas os campos pedidos em `fields`
+    items: List[Dict[str, Any]]
+    # Valor de after_id para a próxima página (None na última)
+    next_cursor: Optional[int] = None
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Converte o parâmetro fields ("name,price") na lista de colunas; id sempre incluído"""
+    if not fields:
+        return list(PRODUCT_FIELDS)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = sorted(set(requested) - set(PRODUCT_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos desconhecidos: {unknown} (disponíveis: {list(PRODUCT_FIELDS)})"
+        )
+    return ['id'] + [field for field in dict.fromkeys(requested) if field != 'id']
+
+async def cached_recommendations(
+    request: Request,
+    db: AsyncSession,
+    endpoint: str,
+    entity_id: int,
+    limit: int,
+    model_version: Callable[[], Optional[str]],
+    rank: Callable[[], Awaitable[List[int]]],
+    key_version: Optional[Callable[[], Optional[str]]] = None
+) -> Response:
+    """
+    Responde com os produtos recomendados, guardando em cache apenas o ranking
+    
+    O cache de respostas guarda a lista de IDs por versão do modelo; os
+    produtos são hidratados a cada requisição pelo ProductHydrator (cache por
+    ID de PRODUCT_CACHE_TTL segundos), então preço e nome alterados aparecem
+    sem esperar o TTL do ranking. O ETag é calculado sobre o corpo final e um
+    If-None-Match igual a ele recebe 304.
+    
+    As duas rotas compartilham o cache: ele é sincronizado só com a versão do
+    modelo de conteúdo, e versões de outros modelos entram apenas na chave
+    (sincronizar com versões diferentes por rota esvaziaria o cache a cada
+    troca de rota).
+    
+    Args:
+        request: Requisição (para o cabeçalho If-None-Match)
+        db: Sessão assíncrona usada na hidratação
+        endpoint: Nome da rota, parte da chave
+        entity_id: ID do produto ou usuário
+        limit: Número de recomendações
+        model_version: Retorna a versão do modelo de conteúdo servido (None se não carregado)
+        rank: Calcula os IDs recomendados quando não estão em cache
+        key_version: Retorna a versão de outro modelo usado pela rota (ex.:
+            colaborativo), acrescentada à chave
+    """
+    def cache_key(version: str) -> str:
+        if key_version is not None:
+            version = f"{version}+{key_version()}"
+        return ResponseCache.make_key(endpoint, entity_id, limit, version)
+    
+    version = model_version()
+    cached = None
+    if version is not None:
+        response_cache.sync_model_version(version)
+        cached = response_cache.get(cache_key(version))
+    
+    if cached is not None:
+        product_ids = json.loads(cached.body)
+    else:
+        product_ids = [int(product_id) for product_id in await rank()]
+        # O cálculo pode ter carregado o modelo
+        version = model_version()
+        if version is not None:
+            response_cache.sync_model_version(version)
+            response_cache.set(
+                cache_key(version),
+                json.dumps(product_ids, separators=(',', ':')).encode('utf-8')
+            )
+    
+    products = await product_hydrator.hydrate(db, product_ids)
+    body = json.dumps(jsonable_encoder(products), separators=(',', ':')).encode('utf-8')
+    if version is None:
+        return Response(content=body, media_type='application/json')
+    
+    etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+    headers = {'ETag': etag, 'Cache-Control': response_cache.cache_control}
+    if_none_match = request.headers.get('if-none-match', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Exige o cabeçalho X-Admin-Token quando ADMIN_TOKEN está definido"""
+    expected = os.getenv("ADMIN_TOKEN")
+    if expected and x_admin_token != expected:
+        raise HTTPException(status_code=403, detail="Token de administração inválido")
 
 # Rotas da API
 @app.get("/")
 async def root():
     return {"message": "Bem-vindo à API de Recomendação de E-commerce"}
 
-@app.get("/products/", response_model=List[Product])
-async def get_products():
-    # TODO: Implementar busca de produtos do banco de dados
-    return []
+@app.get("/products/", response_model=ProductPage)
+async def get_products(
+    after_id: Optional[int] = Query(None, description="Cursor: next_cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=1000),
+    category: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Colunas separadas por vírgula, ex.: name,price"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Paginação por cursor (keyset) em Product.id: a página N custa o mesmo
+    # que a primeira, ao contrário de OFFSET, que lê e descarta as anteriores.
+    # Com category, a busca usa o índice (category, id).
+    columns = parse_fields(fields)
+    query = select(*[PRODUCT_FIELDS[column] for column in columns])
+    if category is not None:
+        query = query.where(models.Product.category == category)
+    if after_id is not None:
+        query = query.where(models.Product.id > after_id)
+    # Uma linha a mais indica se existe próxima página
+    result = await db.execute(query.order_by(models.Product.id).limit(limit + 1))
+    items = [dict(row) for row in result.mappings()]
+    
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1]['id']
+    return ProductPage(items=items, next_cursor=next_cursor)
 
 @app.get("/products/{product_id}/recommendations", response_model=List[Product])
-async def get_recommendations(product_id: int, limit: int = 5):
-    # TODO: Implementar sistema de recomendação
-    return []
+async def get_recommendations(
+    product_id: int,
+    request: Request,
+    limit: int = Query(5, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    recommender = registry.current
+    
+    async def rank():
+        # O recomendador é CPU-bound: roda no threadpool para não bloquear o event loop
+        try:
+            return await run_in_threadpool(recommender.recommend_products, product_id, limit)
+        except FileNotFoundError:
+            raise HTTPException(status_code=503, detail="Modelo de recomendação não treinado")
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    
+    return await cached_recommendations(
+        request, db, 'product_recommendations', product_id, limit, lambda: recommender.model_version, rank
+    )
+
+@app.post("/products/recommendations/batch", response_model=List[ProductRecommendations])
+async def get_batch_recommendations(request: BatchRecommendationRequest, db: AsyncSession = Depends(get_async_db)):
+    recommender = registry.current
+    try:
+        recommended = await run_in_threadpool(
+            recommender.recommend_products_batch, request.product_ids, request.limit
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="Modelo de recomendação não treinado")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    # Os produtos de todas as listas vêm da mesma consulta
+    hydrated = await product_hydrator.hydrate_many(db, recommended.tolist())
+    return [
+        ProductRecommendations(product_id=product_id, recommendations=products)
+        for product_id, products in zip(request.product_ids, hydrated)
+    ]
 
 @app.post("/reviews/", response_model=Review)
 async def create_review(review: Review):
-    # TODO: Implementar análise de sentimento e armazenamento
-    return review
+    # A inferência roda no pool do serviço; aqui só aguardamos o resultado do lote
+    analyzed = await sentiment_service.analyze_review(review.dict())
+    # TODO: Implementar armazenamento
+    return Review(**analyzed)
 
 @app.get("/users/{user_id}/recommendations", response_model=List[Product])
-async def get_user_recommendations(user_id: int, limit: int = 5):
-    # TODO: Implementar recomendações personalizadas
-    return []
+async def get_user_recommendations(
+    user_id: int,
+    request: Request,
+    limit: int = Query(5, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    recommender = registry.current
+    
+    async def rank():
+        try:
+            return await run_in_threadpool(recommender.recommend_for_user, user_id, limit)
+        except FileNotFoundError:
+            raise HTTPException(status_code=503, detail="Modelo de recomendação não treinado")
+    
+    # Respostas por usuário dependem também do modelo colaborativo
+    return await cached_recommendations(
+        request, db, 'user_recommendations', user_id, limit, lambda: recommender.model_version, rank,
+        key_version=lambda: recommender.user_model.model_version
+    )
+
+@app.get("/admin/models", dependencies=[Depends(verify_admin_token)])
+async def get_model_versions():
+    return {
+        **registry.versions,
+        'published': dict(zip(('recommender', 'collaborative'), registry.published_versions())),
+        'last_error': registry.last_error
+    }
+
+@app.post("/admin/models/reload", dependencies=[Depends(verify_admin_token)])
+async def reload_models():
+    # Carrega e valida em uma thread; requisições em andamento seguem no modelo antigo
+    try:
+        reloaded = await registry.reload()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Nenhum modelo publicado")
+    except Exception as e:
+        raise HTTPException(status_code=409, detail=f"Nova versão rejeitada: {e}")
+    return {'reloaded': reloaded, **registry.versions}
 
 if __name__ == "__main__":
     import uvicorn
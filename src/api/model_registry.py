@@ -0,0 +1,139 @@
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+from src.ml.recommender import ProductRecommender
+from src.ml.utils import read_latest_version
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        factory: Callable[[], ProductRecommender] = lambda: ProductRecommender(mmap_mode='r'),
+        poll_interval: Optional[float] = None
+    ):
+        """
+        Mantém o modelo de recomendação servido pela API e o troca sem downtime
+
+        Uma nova versão é carregada e validada fora do event loop, em um
+        objeto novo; só então a referência `current` é trocada (atribuição
+        atômica). Cada requisição lê `current` uma vez e usa esse objeto até o
+        fim, então requisições em andamento terminam no modelo antigo.
+
+        Args:
+            factory: Cria um recomendador vazio (a ser carregado)
+            poll_interval: Segundos entre verificações do ponteiro LATEST dos
+                artefatos (padrão: MODEL_POLL_INTERVAL ou 30; 0 desativa)
+        """
+        self.factory = factory
+        self.poll_interval = poll_interval if poll_interval is not None else float(
+            os.getenv("MODEL_POLL_INTERVAL", 30)
+        )
+        self.current = factory()
+        self.last_error = None
+        self._published = None
+        self._failed = None
+        self._reload_lock = threading.Lock()
+        self._poller: Optional[asyncio.Task] = None
+
+    @property
+    def versions(self) -> Dict[str, Any]:
+        """Versões dos modelos servidos"""
+        model = self.current
+        return {
+            'recommender': model.model_version,
+            'collaborative': model.user_model.model_version
+        }
+
+    def published_versions(self) -> Tuple[Optional[str], Optional[str]]:
+        """Versões apontadas pelos arquivos LATEST em disco"""
+        model = self.current
+        return (
+            read_latest_version(model.artifacts_path),
+            read_latest_version(model.user_model.artifacts_path)
+        )
+
+    def load_latest(self) -> bool:
+        """
+        Carrega, valida e publica a versão atual dos artefatos
+
+        Executa de forma síncrona (chamar fora do event loop). Se a validação
+        falhar, o modelo em uso continua sendo servido.
+
+        Returns:
+            True se o modelo servido foi trocado
+        """
+        with self._reload_lock:
+            published = self.published_versions()
+            if published == self._published and self.current.model_version is not None:
+                return False
+
+            candidate = self.factory()
+            try:
+                candidate._load_model()
+                try:
+                    candidate.user_model._load_model()
+                except FileNotFoundError:
+                    # Sem modelo colaborativo: recommend_for_user usa o fallback
+                    pass
+                self._validate(candidate)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._failed = published
+                raise
+
+            # Troca atômica: novas requisições passam a usar o candidato
+            self.current = candidate
+            self._published = published
+            self._failed = None
+            self.last_error = None
+            return True
+
+    async def reload(self) -> bool:
+        """Executa load_latest em uma thread, sem bloquear o event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.load_latest)
+
+    async def start(self):
+        """Inicia a verificação periódica de novas versões"""
+        if self.poll_interval > 0 and self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            published = self.published_versions()
+            # Uma versão que falhou na validação só é tentada de novo quando mudar
+            if published in (self._published, self._failed) or published[0] is None:
+                continue
+            try:
+                await self.reload()
+            except Exception:
+                # Erro registrado em last_error; o modelo anterior continua em uso
+                pass
+
+    @staticmethod
+    def _validate(candidate: ProductRecommender):
+        """Verificações baratas antes de servir um artefato"""
+        product_ids = candidate.product_ids
+        if product_ids is None or len(product_ids) == 0:
+            raise ValueError("Artefato do recomendador sem produtos")
+        if candidate.neighbor_indices is not None:
+            if candidate.neighbor_indices.shape[0] != len(product_ids):
+                raise ValueError("Índice de vizinhos incompatível com o catálogo")
+            # Confere os limites nas linhas da ponta sem ler o índice inteiro
+            edges = candidate.neighbor_indices[[0, -1]]
+            if edges.min() < 0 or edges.max() >= len(product_ids):
+                raise ValueError("Índice de vizinhos aponta para linhas inexistentes")
+        elif candidate.similarity_matrix is None or candidate.similarity_matrix.shape[0] != len(product_ids):
+            raise ValueError("Matriz de similaridade incompatível com o catálogo")
+        # Recomendação de teste com o primeiro produto
+        candidate.recommend_products(int(product_ids[0]), 1)
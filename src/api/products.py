@@ -0,0 +1,73 @@
+import os
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.api.cache import TTLCache
+from src.database import models
+
+# Colunas que podem ser retornadas pelos endpoints de produto
+PRODUCT_FIELDS = {
+    'id': models.Product.id,
+    'name': models.Product.name,
+    'category': models.Product.category,
+    'price': models.Product.price,
+    'description': models.Product.description
+}
+PRODUCT_COLUMNS = tuple(PRODUCT_FIELDS.values())
+
+
+class ProductHydrator:
+    def __init__(self, cache: Optional[TTLCache] = None):
+        """
+        Converte listas de IDs recomendados em produtos completos
+
+        Os produtos vêm primeiro de um cache LRU/TTL por ID; os que faltam são
+        buscados em uma única consulta IN. Assim cada requisição custa no
+        máximo uma ida ao banco, independente do número de recomendações.
+
+        Args:
+            cache: Cache de produtos (padrão: PRODUCT_CACHE_SIZE entradas por
+                PRODUCT_CACHE_TTL segundos)
+        """
+        self.cache = cache or TTLCache(
+            max_size=int(os.getenv("PRODUCT_CACHE_SIZE", 10000)),
+            ttl=float(os.getenv("PRODUCT_CACHE_TTL", 60))
+        )
+
+    async def hydrate(self, db: AsyncSession, product_ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """
+        Busca os produtos de uma lista de IDs
+
+        Args:
+            db: Sessão assíncrona
+            product_ids: IDs na ordem do ranking
+
+        Returns:
+            Produtos na mesma ordem (IDs que não existem mais no banco são omitidos)
+        """
+        return (await self.hydrate_many(db, [product_ids]))[0]
+
+    async def hydrate_many(self, db: AsyncSession, id_lists: Sequence[Sequence[int]]) -> List[List[Dict[str, Any]]]:
+        """
+        Busca os produtos de várias listas de IDs com uma única consulta
+
+        Args:
+            db: Sessão assíncrona
+            id_lists: Listas de IDs, cada uma na ordem do seu ranking
+
+        Returns:
+            Uma lista de produtos para cada lista de IDs, na mesma ordem
+        """
+        unique_ids = list(dict.fromkeys(int(product_id) for ids in id_lists for product_id in ids))
+        found = self.cache.get_many(unique_ids)
+        missing = [product_id for product_id in unique_ids if product_id not in found]
+        if missing:
+            result = await db.execute(select(*PRODUCT_COLUMNS).where(models.Product.id.in_(missing)))
+            loaded = {row['id']: dict(row) for row in result.mappings()}
+            self.cache.set_many(loaded)
+            found.update(loaded)
+
+        return [
+            [found[int(product_id)] for product_id in ids if int(product_id) in found]
+            for ids in id_lists
+        ]
@@ -6,11 +6,12 @@ from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 import numpy as np
-from src.ml.recommender import ProductRecommender
+from src.ml.recommender import catalog_fingerprint, load_or_fit
+from src.ml.reranker import load_product_stats, product_features
 from src.ml.sentiment_analyzer import SentimentAnalyzer
 from src.database.config import get_db
-from src.database.models import Product, Review, Purchase, PurchaseItem
-from sqlalchemy import func
+from src.database.models import Product
+from src.database.rollups import date_bounds, sales_by_period, sentiment_by_period
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -28,58 +29,49 @@ st.markdown("""
     Este dashboard fornece insights sobre vendas, recomendações e análise de sentimento das avaliações.
 """)
 
+# Segundos que cada consulta (por período e granularidade) fica em cache
+CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 300))
+
+# Artefato próprio do dashboard: treinar aqui não publica um modelo para a API
+MODEL_PATH = os.getenv("DASHBOARD_MODEL_PATH") or os.path.join(os.getenv("MODEL_PATH", "./models"), "dashboard")
+
+# Granularidades do filtro -> valor usado nas consultas
+GRAINS = {"Dia": "day", "Semana": "week", "Mês": "month"}
+
 # Funções auxiliares para carregar dados
-@st.cache_data
-def load_sales_data():
-    """Carrega dados de vendas do banco de dados"""
+@st.cache_data(ttl=CACHE_TTL)
+def load_date_bounds():
+    """Primeiro e último dia com dados agregados"""
     db = next(get_db())
     try:
-        # Obtém vendas diárias
-        sales_query = db.query(
-            func.date(Purchase.created_at).label('date'),
-            func.sum(PurchaseItem.quantity).label('sales'),
-            func.sum(PurchaseItem.price).label('revenue')
-        ).join(
-            PurchaseItem,
-            Purchase.id == PurchaseItem.purchase_id
-        ).group_by(
-            func.date(Purchase.created_at)
-        ).all()
-        
-        # Converte para DataFrame
-        sales_data = pd.DataFrame(sales_query)
-        if not sales_data.empty:
-            sales_data['date'] = pd.to_datetime(sales_data['date'])
-        return sales_data
+        return date_bounds(db)
     finally:
         db.close()
 
-@st.cache_data
-def load_sentiment_data():
-    """Carrega dados de sentimento do banco de dados"""
+@st.cache_data(ttl=CACHE_TTL)
+def load_sales_data(start, end, grain):
+    """Carrega vendas e receita do período, agrupadas no banco pela granularidade"""
     db = next(get_db())
     try:
-        # Obtém avaliações diárias
-        sentiment_query = db.query(
-            func.date(Review.created_at).label('date'),
-            Review.sentiment,
-            Review.sentiment_score
-        ).all()
-        
-        # Converte para DataFrame
-        sentiment_data = pd.DataFrame(sentiment_query)
-        if not sentiment_data.empty:
-            sentiment_data['date'] = pd.to_datetime(sentiment_data['date'])
-        return sentiment_data
+        return sales_by_period(db, start, end, grain)
     finally:
         db.close()
 
-@st.cache_data
+@st.cache_data(ttl=CACHE_TTL)
+def load_sentiment_data(start, end, grain):
+    """Carrega as contagens de sentimento do período, agrupadas no banco pela granularidade"""
+    db = next(get_db())
+    try:
+        return sentiment_by_period(db, start, end, grain)
+    finally:
+        db.close()
+
+@st.cache_data(ttl=600)
 def load_products():
     """Carrega produtos do banco de dados"""
     db = next(get_db())
     try:
-        products = db.query(Product).all()
+        products = db.query(Product.id, Product.name, Product.category, Product.description, Product.price).all()
         return [
             {
                 "id": p.id,
@@ -93,21 +85,41 @@ def load_products():
     finally:
         db.close()
 
-# Carrega os dados
-sales_data = load_sales_data()
-sentiment_data = load_sentiment_data()
+@st.cache_data(ttl=600)
+def load_catalog_fingerprint():
+    """Impressão digital do catálogo atual (muda quando produtos mudam)"""
+    return catalog_fingerprint(load_products())
+
+def load_rerank_features():
+    """Atributos de re-ranqueamento dos produtos (avaliações, vendas e estoque)"""
+    db = next(get_db())
+    try:
+        return product_features(load_product_stats(db))
+    finally:
+        db.close()
+
+@st.cache_resource(max_entries=1)
+def load_recommender(fingerprint, _products_data):
+    """
+    Recomendador compartilhado entre sessões e reexecuções do script
+
+    Usa o artefato salvo quando ele corresponde ao catálogo; só treina de novo
+    (com os atributos de re-ranqueamento) quando a impressão digital muda (a
+    lista de produtos não entra na chave). Os artefatos, inclusive o do modelo
+    colaborativo, ficam em MODEL_PATH, fora dos diretórios que a API acompanha.
+    """
+    return load_or_fit(
+        _products_data, fingerprint, product_features=load_rerank_features, mmap_mode='r', model_path=MODEL_PATH
+    )
+
+# Carrega os produtos
 products_data = load_products()
 
-# Inicializa o modelo de recomendação
-recommender = ProductRecommender()
-if products_data:
-    recommender.fit(products_data)
+# Modelo de recomendação (carregado uma vez por catálogo)
+recommender = load_recommender(load_catalog_fingerprint(), products_data) if products_data else None
 
 # Obtém a última data disponível
-last_date = max(
-    sales_data['date'].max() if not sales_data.empty else datetime.now(),
-    sentiment_data['date'].max() if not sentiment_data.empty else datetime.now()
-)
+last_date = load_date_bounds()[1] or datetime.now().date()
 
 # Sidebar
 st.sidebar.title("Filtros")
@@ -115,19 +127,14 @@ date_range = st.sidebar.date_input(
     "Período de análise",
     value=(last_date - timedelta(days=30), last_date)
 )
+grain_label = st.sidebar.selectbox("Agrupar por", list(GRAINS))
 
-# Filtra os dados pelo período selecionado
-if not sales_data.empty:
-    sales_data = sales_data[
-        (sales_data['date'] >= pd.to_datetime(date_range[0])) &
-        (sales_data['date'] <= pd.to_datetime(date_range[1]))
-    ]
+# Enquanto só a data inicial foi escolhida, o período é um único dia
+start_date, end_date = date_range if len(date_range) == 2 else (date_range[0], date_range[0])
 
-if not sentiment_data.empty:
-    sentiment_data = sentiment_data[
-        (sentiment_data['date'] >= pd.to_datetime(date_range[0])) &
-        (sentiment_data['date'] <= pd.to_datetime(date_range[1]))
-    ]
+# Filtro e agrupamento feitos no banco; cada combinação fica em cache
+sales_data = load_sales_data(start_date, end_date, GRAINS[grain_label])
+sentiment_data = load_sentiment_data(start_date, end_date, GRAINS[grain_label])
 
 # Métricas principais
 st.subheader("Métricas Principais")
@@ -146,17 +153,17 @@ with col5:
 with col6:
     if not sales_data.empty:
         st.metric(
-            "Média de Vendas Diárias",
+            f"Média de Vendas por {grain_label}",
             f"{sales_data['sales'].mean():.0f}",
             "0%"
         )
     else:
-        st.metric("Média de Vendas Diárias", "0", "0%")
+        st.metric(f"Média de Vendas por {grain_label}", "0", "0%")
 
 with col7:
     if not sentiment_data.empty:
-        positive_count = len(sentiment_data[sentiment_data['sentiment'] == 'POSITIVE'])
-        total_count = len(sentiment_data)
+        positive_count = int(sentiment_data['positive'].sum())
+        total_count = int(sentiment_data['reviews'].sum())
         percentage = (positive_count / total_count * 100) if total_count > 0 else 0
         st.metric(
             "Avaliações Positivas",
@@ -167,10 +174,10 @@ with col7:
         st.metric("Avaliações Positivas", "0", "0%")
 
 with col8:
-    if not sentiment_data.empty and not sentiment_data['sentiment_score'].empty:
+    if not sentiment_data.empty and sentiment_data['scored'].sum() > 0:
         st.metric(
             "Score Médio de Sentimento",
-            f"{sentiment_data['sentiment_score'].mean():.2f}",
+            f"{sentiment_data['score_sum'].sum() / sentiment_data['scored'].sum():.2f}",
             "0%"
         )
     else:
@@ -181,7 +188,7 @@ col1, col2 = st.columns(2)
 
 # Gráfico de vendas
 with col1:
-    st.subheader("Vendas Diárias")
+    st.subheader(f"Vendas por {grain_label}")
     if not sales_data.empty:
         # Cria uma cópia para não modificar o DataFrame original
         sales_data_plot = sales_data.copy()
@@ -211,7 +218,7 @@ with col1:
 
 # Gráfico de receita
 with col2:
-    st.subheader("Receita Diária")
+    st.subheader(f"Receita por {grain_label}")
     if not sales_data.empty:
         # Cria uma cópia para não modificar o DataFrame original
         sales_data_plot = sales_data.copy()
@@ -246,8 +253,10 @@ col3, col4 = st.columns(2)
 # Distribuição de sentimento
 with col3:
     if not sentiment_data.empty:
-        sentiment_dist = sentiment_data['sentiment'].value_counts().reset_index()
-        sentiment_dist.columns = ['sentiment', 'count']
+        sentiment_dist = pd.DataFrame({
+            'sentiment': ['POSITIVE', 'NEUTRAL', 'NEGATIVE'],
+            'count': [sentiment_data[column].sum() for column in ('positive', 'neutral', 'negative')]
+        })
         # Traduz os sentimentos para português
         sentiment_map = {
             'POSITIVE': 'Positivo',
@@ -274,12 +283,8 @@ with col3:
 # Evolução do sentimento
 with col4:
     if not sentiment_data.empty:
-        # Cria uma cópia para não modificar o DataFrame original
-        sentiment_trend = sentiment_data.copy()
-        # Garante que a coluna date é datetime
-        sentiment_trend['date'] = pd.to_datetime(sentiment_trend['date'])
-        # Agrupa por data e calcula a média
-        sentiment_trend = sentiment_trend.groupby('date')['sentiment_score'].mean().reset_index()
+        # Score médio por período, já calculado a partir da agregação
+        sentiment_trend = sentiment_data[['date', 'sentiment_score']].copy()
         # Formata a data para mostrar apenas dia/mês/ano
         sentiment_trend['date'] = sentiment_trend['date'].dt.strftime('%d/%m/%Y')
         fig_sentiment_trend = px.line(
@@ -336,13 +341,13 @@ if products_data:
 else:
     st.warning("Não há produtos disponíveis para gerar recomendações.")
 
-# Tabela com últimos 5 dias
-st.subheader("Últimos 5 Dias de Dados")
+# Tabela com os últimos 5 períodos
+st.subheader("Últimos 5 Períodos")
 if not sales_data.empty and not sentiment_data.empty:
     # Combina dados de vendas e sentimento
     last_5_days = pd.merge(
         sales_data.sort_values('date', ascending=False).head(5),
-        sentiment_data.sort_values('date', ascending=False).head(5),
+        sentiment_data[['date', 'reviews', 'sentiment_score']].sort_values('date', ascending=False).head(5),
         on='date',
         how='inner'
     )
@@ -357,14 +362,14 @@ if not sales_data.empty and not sentiment_data.empty:
         'date': 'Data',
         'sales': 'Vendas',
         'revenue': 'Receita',
-        'sentiment': 'Sentimento',
+        'reviews': 'Avaliações',
         'sentiment_score': 'Score'
     })
     
     # Exibe a tabela
     st.dataframe(last_5_days)
 else:
-    st.warning("Não há dados suficientes para exibir a tabela dos últimos 5 dias.")
+    st.warning("Não há dados suficientes para exibir a tabela dos últimos 5 períodos.")
 
 # Rodapé
 st.markdown("---")
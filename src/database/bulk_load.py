@@ -0,0 +1,259 @@
+"""
+Carga em massa de tabelas a partir de CSV/Parquet ou de dados sintéticos
+
+No PostgreSQL (psycopg2) os blocos são enviados com COPY; nos demais bancos,
+com INSERTs em lote (executemany). O commit é feito a cada --commit-every
+linhas, e o progresso é mostrado em linhas por segundo.
+
+Um diretório é carregado na ordem das chaves estrangeiras, a partir dos
+arquivos <tabela>.csv ou <tabela>.parquet (os gerados por synthetic_data).
+O banco de destino vem de DATABASE_URL (ou das variáveis DB_*).
+
+Uso:
+    python -m src.database.bulk_load data/synthetic
+    python -m src.database.bulk_load avaliacoes.parquet --table reviews --batch-size 50000
+    python -m src.database.bulk_load --synthetic --users 1000000 --products 100000 --purchase-items 10000000
+"""
+import argparse
+import io
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple
+
+import pandas as pd
+from sqlalchemy import DateTime, Integer, text
+from sqlalchemy.engine import Connection, Engine
+
+from src.database import models  # noqa: F401 (registra as tabelas em Base.metadata)
+from src.database.config import Base, engine
+from src.database.migrations import migrate
+from src.database.rollups import refresh_rollups
+from src.database.synthetic_data import TABLES, add_arguments, from_arguments
+
+DEFAULT_BATCH_SIZE = 50000
+DEFAULT_COMMIT_EVERY = 500000
+
+
+class LoadStats(NamedTuple):
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def read_chunks(path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Lê um arquivo CSV ou Parquet em blocos
+
+    Args:
+        path: Arquivo .csv ou .parquet (Parquet requer pyarrow)
+        batch_size: Linhas por bloco
+
+    Returns:
+        Iterador de DataFrames
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+    elif path.endswith('.csv'):
+        yield from pd.read_csv(path, chunksize=batch_size)
+    else:
+        raise ValueError(f"Formato não suportado: {path} (use .csv ou .parquet)")
+
+
+def uses_copy(engine: Engine) -> bool:
+    """COPY só está disponível pelo driver psycopg2"""
+    return engine.dialect.name == 'postgresql' and engine.dialect.driver == 'psycopg2'
+
+
+def load_frames(
+    engine: Engine,
+    table_name: str,
+    frames: Iterable[pd.DataFrame],
+    commit_every: int = DEFAULT_COMMIT_EVERY,
+    verbose: bool = False
+) -> LoadStats:
+    """
+    Insere blocos de linhas em uma tabela
+
+    Args:
+        engine: Engine síncrona de destino
+        table_name: Nome da tabela em Base.metadata
+        frames: Blocos com colunas da tabela (colunas ausentes usam o padrão do banco)
+        commit_every: Linhas entre commits
+        verbose: Mostra o progresso a cada commit
+
+    Returns:
+        Linhas inseridas e tempo total
+    """
+    table = Base.metadata.tables[table_name]
+    copy = uses_copy(engine)
+    rows = pending = reported = 0
+    start = time.perf_counter()
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            for frame in frames:
+                unknown = set(frame.columns) - set(table.columns.keys())
+                if unknown:
+                    raise ValueError(f"Colunas inexistentes em {table_name}: {sorted(unknown)}")
+                if frame.empty:
+                    continue
+
+                if copy:
+                    _copy_frame(connection, table, frame)
+                else:
+                    connection.execute(table.insert(), _records(table, frame))
+                rows += len(frame)
+                pending += len(frame)
+
+                if pending >= commit_every:
+                    transaction.commit()
+                    transaction = connection.begin()
+                    pending = 0
+                    if verbose:
+                        _report(table_name, rows, time.perf_counter() - start)
+                        reported = rows
+            transaction.commit()
+        except Exception:
+            transaction.rollback()
+            raise
+
+        if engine.dialect.name == 'postgresql' and 'id' in table.columns:
+            # IDs explícitos não avançam a sequência do SERIAL
+            with connection.begin():
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+                    f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {table_name}"
+                ))
+
+    stats = LoadStats(table_name, rows, time.perf_counter() - start)
+    if verbose and rows != reported:
+        _report(table_name, rows, stats.seconds)
+    return stats
+
+
+def load_file(
+    engine: Engine,
+    table_name: str,
+    path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    commit_every: int = DEFAULT_COMMIT_EVERY,
+    verbose: bool = False
+) -> LoadStats:
+    """Carrega um arquivo CSV/Parquet em uma tabela (ver load_frames)"""
+    return load_frames(engine, table_name, read_chunks(path, batch_size), commit_every, verbose)
+
+
+def load_directory(
+    engine: Engine,
+    directory: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    commit_every: int = DEFAULT_COMMIT_EVERY,
+    verbose: bool = False
+) -> List[LoadStats]:
+    """
+    Carrega os arquivos <tabela>.csv/.parquet de um diretório na ordem das chaves estrangeiras
+
+    Returns:
+        Estatísticas de cada tabela carregada
+    """
+    found = _table_files(directory)
+    if not found:
+        raise FileNotFoundError(f"Nenhum arquivo de tabela em {directory}")
+    return [
+        load_file(engine, table, found[table], batch_size, commit_every, verbose)
+        for table in TABLES if table in found
+    ]
+
+
+def _table_files(directory: str) -> Dict[str, str]:
+    found = {}
+    for table in TABLES:
+        for extension in ('parquet', 'csv'):
+            path = os.path.join(directory, f"{table}.{extension}")
+            if os.path.exists(path):
+                found[table] = path
+                break
+    return found
+
+
+def _records(table, frame: pd.DataFrame) -> List[dict]:
+    """Converte um bloco em parâmetros do executemany (tipos Python, NaN -> None)"""
+    columns = []
+    for name in frame.columns:
+        series = frame[name]
+        if isinstance(table.columns[name].type, DateTime):
+            series = pd.to_datetime(series)
+        # astype(object) troca os escalares numpy por int/float/Timestamp
+        columns.append(series.astype(object).where(series.notna(), None).tolist())
+    names = list(frame.columns)
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def _copy_frame(connection: Connection, table, frame: pd.DataFrame):
+    """Envia um bloco com COPY ... FROM STDIN (CSV; campos vazios viram NULL)"""
+    frame = frame.copy()
+    for name in frame.columns:
+        # Inteiros com nulos chegam como float ("3.0"), que o COPY rejeita
+        if isinstance(table.columns[name].type, Integer) and frame[name].dtype.kind == 'f':
+            frame[name] = frame[name].astype('Int64')
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    columns = ", ".join(frame.columns)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _report(table_name: str, rows: int, seconds: float):
+    rate = rows / seconds if seconds > 0 else 0.0
+    print(f"{table_name}: {rows:,} linhas em {seconds:.1f} s ({rate:,.0f} linhas/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', help='Arquivo CSV/Parquet ou diretório com <tabela>.csv|.parquet')
+    parser.add_argument('--table', choices=TABLES, help='Tabela de destino (obrigatório para um arquivo)')
+    parser.add_argument('--synthetic', action='store_true', help='Gera e carrega dados sintéticos')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--commit-every', type=int, default=DEFAULT_COMMIT_EVERY)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    migrate(engine)
+    start = time.perf_counter()
+    if args.synthetic:
+        dataset = from_arguments(args, chunk_size=args.batch_size)
+        stats = [
+            load_frames(engine, table, chunks, args.commit_every, verbose=True)
+            for table, chunks in dataset.tables()
+        ]
+    elif args.path and os.path.isdir(args.path):
+        stats = load_directory(engine, args.path, args.batch_size, args.commit_every, verbose=True)
+    elif args.path and args.table:
+        stats = [load_file(engine, args.table, args.path, args.batch_size, args.commit_every, verbose=True)]
+    else:
+        parser.error("informe um diretório, um arquivo com --table, ou --synthetic")
+
+    total_rows = sum(s.rows for s in stats)
+    elapsed = time.perf_counter() - start
+    print(f"Total: {total_rows:,} linhas em {elapsed:.1f} s ({total_rows / max(elapsed, 1e-9):,.0f} linhas/s)")
+
+    # Dados carregados podem cair em dias já agregados: recalcula tudo
+    refresh_rollups(engine, full=True)
+    print("Agregações diárias atualizadas")
+
+
+if __name__ == '__main__':
+    main()
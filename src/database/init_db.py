@@ -1,5 +1,7 @@
 from src.database.config import engine, Base
 from src.database.models import Product, Review, User, Purchase, PurchaseItem
+from src.database.migrations import migrate
+from src.database.rollups import refresh_rollups
 import os
 from dotenv import load_dotenv
 
@@ -10,12 +12,20 @@ def init_db():
     """Initialize the database by creating all tables."""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    # O schema novo já está completo: só registra as migrações como aplicadas
+    migrate(engine)
     print("Database tables created successfully!")
 
 def seed_db():
-    """Popula o banco de dados com dados iniciais para teste"""
+    """
+    Popula o banco de dados com dados iniciais para teste
+
+    Cada tabela é inserida com um único INSERT em lote (executemany) e tudo é
+    gravado em uma só transação; os totais das compras são calculados antes
+    da inserção. Para volumes grandes, use src.database.bulk_load.
+    """
+    from sqlalchemy import insert
     from sqlalchemy.orm import Session
-    from datetime import datetime, timedelta
     import random
 
     # Cria uma sessão
@@ -24,89 +34,85 @@ def seed_db():
     try:
         # Cria usuários de teste
         users = [
-            User(name="João Silva", email="joao@exemplo.com"),
-            User(name="Maria Santos", email="maria@exemplo.com"),
-            User(name="Pedro Oliveira", email="pedro@exemplo.com")
+            {"name": "João Silva", "email": "joao@exemplo.com"},
+            {"name": "Maria Santos", "email": "maria@exemplo.com"},
+            {"name": "Pedro Oliveira", "email": "pedro@exemplo.com"}
         ]
-        db.add_all(users)
-        db.commit()
+        user_ids = db.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), users).all()
 
         # Cria produtos de teste
         products = [
-            Product(
-                name="Smartphone XYZ",
-                description="Último modelo com câmera de alta resolução",
-                price=2999.99,
-                category="Eletrônicos",
-                stock=50
-            ),
-            Product(
-                name="Notebook ABC",
-                description="Notebook potente para trabalho e jogos",
-                price=4999.99,
-                category="Eletrônicos",
-                stock=30
-            ),
-            Product(
-                name="Fone de Ouvido Bluetooth",
-                description="Áudio de alta qualidade e cancelamento de ruído",
-                price=499.99,
-                category="Acessórios",
-                stock=100
-            )
+            {
+                "name": "Smartphone XYZ",
+                "description": "Último modelo com câmera de alta resolução",
+                "price": 2999.99,
+                "category": "Eletrônicos",
+                "stock": 50
+            },
+            {
+                "name": "Notebook ABC",
+                "description": "Notebook potente para trabalho e jogos",
+                "price": 4999.99,
+                "category": "Eletrônicos",
+                "stock": 30
+            },
+            {
+                "name": "Fone de Ouvido Bluetooth",
+                "description": "Áudio de alta qualidade e cancelamento de ruído",
+                "price": 499.99,
+                "category": "Acessórios",
+                "stock": 100
+            }
         ]
-        db.add_all(products)
-        db.commit()
+        product_ids = db.scalars(insert(Product).returning(Product.id, sort_by_parameter_order=True), products).all()
+        for product, product_id in zip(products, product_ids):
+            product["id"] = product_id
 
         # Cria reviews de teste
         reviews = []
         sentiments = ["POSITIVE", "NEUTRAL", "NEGATIVE"]
-        for user in users:
+        for user, user_id in zip(users, user_ids):
             for product in products:
-                rating = random.randint(1, 5)
-                sentiment = random.choice(sentiments)
-                sentiment_score = random.uniform(0, 1)
-                
-                reviews.append(Review(
-                    user_id=user.id,
-                    product_id=product.id,
-                    rating=rating,
-                    text=f"Review do produto {product.name} pelo usuário {user.name}",
-                    sentiment=sentiment,
-                    sentiment_score=sentiment_score
-                ))
-        db.add_all(reviews)
-        db.commit()
+                reviews.append({
+                    "user_id": user_id,
+                    "product_id": product["id"],
+                    "rating": random.randint(1, 5),
+                    "text": f"Review do produto {product['name']} pelo usuário {user['name']}",
+                    "sentiment": random.choice(sentiments),
+                    "sentiment_score": random.uniform(0, 1)
+                })
+        db.execute(insert(Review), reviews)
 
-        # Cria compras de teste
-        for user in users:
-            purchase = Purchase(
-                user_id=user.id,
-                total_amount=0,
-                status="completed"
-            )
-            db.add(purchase)
-            db.commit()
-
-            # Adiciona itens à compra
-            total = 0
+        # Cria compras de teste, com os itens montados antes para gravar o total
+        items_by_purchase = []
+        purchases = []
+        for user_id in user_ids:
+            items = []
             for product in random.sample(products, random.randint(1, len(products))):
                 quantity = random.randint(1, 3)
-                price = product.price * quantity
-                total += price
-
-                item = PurchaseItem(
-                    purchase_id=purchase.id,
-                    product_id=product.id,
-                    quantity=quantity,
-                    price=price
-                )
-                db.add(item)
+                items.append({
+                    "product_id": product["id"],
+                    "quantity": quantity,
+                    "price": product["price"] * quantity
+                })
+            items_by_purchase.append(items)
+            purchases.append({
+                "user_id": user_id,
+                "total_amount": sum(item["price"] for item in items),
+                "status": "completed"
+            })
+        purchase_ids = db.scalars(
+            insert(Purchase).returning(Purchase.id, sort_by_parameter_order=True), purchases
+        ).all()
 
-            # Atualiza o total da compra
-            purchase.total_amount = total
-            db.commit()
+        # Adiciona os itens de todas as compras
+        db.execute(insert(PurchaseItem), [
+            {**item, "purchase_id": purchase_id}
+            for purchase_id, items in zip(purchase_ids, items_by_purchase)
+            for item in items
+        ])
 
+        db.commit()
         print("Dados iniciais inseridos com sucesso!")
 
     except Exception as e:
@@ -117,4 +123,5 @@ def seed_db():
 
 if __name__ == "__main__":
     init_db()
-    seed_db() 
\ No newline at end of file
+    seed_db()
+    refresh_rollups(engine) 
\ No newline at end of file
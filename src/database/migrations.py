@@ -0,0 +1,179 @@
+"""
+Aplica as migrações pendentes do schema
+
+Bancos criados por init_db já nascem com o schema completo (as migrações são
+apenas registradas); bancos existentes recebem só o que falta. As versões
+aplicadas ficam na tabela schema_migrations.
+
+Uso:
+    python -m src.database.migrations
+    python -m src.database.migrations --list
+"""
+import argparse
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from src.database import models  # noqa: F401 (registra as tabelas em Base.metadata)
+from src.database.config import Base
+
+# Fora de Base.metadata: não faz parte dos modelos da aplicação
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String(50), primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+class Migration(NamedTuple):
+    version: str
+    description: str
+    upgrade: Callable[[Connection], None]
+    # False para comandos que não rodam dentro de transação (ex.: CREATE INDEX CONCURRENTLY)
+    transactional: bool = True
+
+
+def create_indexes(*names: str) -> Callable[[Connection], None]:
+    """
+    Migração que cria índices declarados nos modelos, se ainda não existirem
+
+    No PostgreSQL os índices são criados com CONCURRENTLY, sem bloquear
+    escritas nas tabelas (a migração deve ser não transacional).
+
+    Args:
+        names: Nomes dos índices (Index em __table_args__)
+    """
+    def upgrade(connection: Connection):
+        indexes = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+        for name in names:
+            _create_index(connection, indexes[name])
+    return upgrade
+
+
+def create_tables(*names: str) -> Callable[[Connection], None]:
+    """
+    Migração que cria tabelas declaradas nos modelos (com seus índices), se ainda não existirem
+
+    Args:
+        names: Nomes das tabelas
+    """
+    def upgrade(connection: Connection):
+        for name in names:
+            Base.metadata.tables[name].create(connection, checkfirst=True)
+    return upgrade
+
+
+def _create_index(connection: Connection, index):
+    statement = CreateIndex(index, if_not_exists=True)
+    if connection.dialect.name != 'postgresql':
+        connection.execute(statement)
+        return
+
+    # Um CREATE INDEX CONCURRENTLY interrompido deixa um índice inválido, que
+    # o IF NOT EXISTS pularia: remove antes de criar de novo
+    invalid = connection.execute(text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": index.name}).scalar()
+    if invalid:
+        connection.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}")
+    sql = str(statement.compile(dialect=connection.dialect))
+    connection.exec_driver_sql(sql.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1))
+
+
+MIGRATIONS = [
+    Migration(
+        "0001_analytics_indexes",
+        "Índices de categoria, históricos por usuário/produto e agregações por data",
+        create_indexes(
+            "ix_products_category_id",
+            "ix_reviews_product_id_created_at",
+            "ix_reviews_user_id_created_at",
+            "ix_reviews_created_at",
+            "ix_purchases_user_id_created_at",
+            "ix_purchases_created_at",
+            "ix_purchase_items_purchase_id",
+            "ix_purchase_items_product_id"
+        ),
+        transactional=False
+    ),
+    Migration(
+        "0002_daily_rollups",
+        "Tabelas de agregação diária de vendas e sentimento",
+        create_tables("daily_sales", "daily_sentiment")
+    ),
+]
+
+
+def applied_versions(engine: Engine) -> List[str]:
+    """Versões já aplicadas, criando schema_migrations se necessário"""
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        return list(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def migrate(engine: Optional[Engine] = None, verbose: bool = False) -> List[str]:
+    """
+    Aplica as migrações pendentes, em ordem
+
+    Args:
+        engine: Banco de destino (padrão: engine de src.database.config)
+        verbose: Mostra cada migração aplicada
+
+    Returns:
+        Versões aplicadas nesta execução
+    """
+    if engine is None:
+        from src.database.config import engine
+
+    done = set(applied_versions(engine))
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        if verbose:
+            print(f"Aplicando {migration.version}: {migration.description}")
+
+        record = insert(schema_migrations).values(
+            version=migration.version,
+            description=migration.description,
+            applied_at=datetime.utcnow()
+        )
+        if migration.transactional:
+            with engine.begin() as connection:
+                migration.upgrade(connection)
+                connection.execute(record)
+        else:
+            # Cada comando é confirmado sozinho; a migração precisa ser idempotente
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                migration.upgrade(connection)
+                connection.execute(record)
+        applied.append(migration.version)
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--list', action='store_true', help='Só lista as migrações e seu estado')
+    args = parser.parse_args()
+
+    from src.database.config import engine
+
+    if args.list:
+        done = set(applied_versions(engine))
+        for migration in MIGRATIONS:
+            status = "aplicada" if migration.version in done else "pendente"
+            print(f"{migration.version} [{status}] {migration.description}")
+        return
+
+    applied = migrate(engine, verbose=True)
+    print(f"{len(applied)} migração(ões) aplicada(s)" if applied else "Schema atualizado")
+
+
+if __name__ == '__main__':
+    main()
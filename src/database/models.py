@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .config import Base
@@ -32,6 +32,11 @@ class Product(Base):
     reviews = relationship("Review", back_populates="product")
     purchases = relationship("PurchaseItem", back_populates="product")
 
+    __table_args__ = (
+        # Filtro por categoria com paginação por id (GET /products/)
+        Index("ix_products_category_id", "category", "id"),
+    )
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -49,6 +54,14 @@ class Review(Base):
     user = relationship("User", back_populates="reviews")
     product = relationship("Product", back_populates="reviews")
 
+    __table_args__ = (
+        # Avaliações de um produto / de um usuário em ordem cronológica
+        Index("ix_reviews_product_id_created_at", "product_id", "created_at"),
+        Index("ix_reviews_user_id_created_at", "user_id", "created_at"),
+        # Agregações por período (dashboard)
+        Index("ix_reviews_created_at", "created_at"),
+    )
+
 class Purchase(Base):
     __tablename__ = "purchases"
 
@@ -63,6 +76,13 @@ class Purchase(Base):
     user = relationship("User", back_populates="purchases")
     items = relationship("PurchaseItem", back_populates="purchase")
 
+    __table_args__ = (
+        # Histórico de compras do usuário
+        Index("ix_purchases_user_id_created_at", "user_id", "created_at"),
+        # Agregações por período (dashboard)
+        Index("ix_purchases_created_at", "created_at"),
+    )
+
 class PurchaseItem(Base):
     __tablename__ = "purchase_items"
 
@@ -75,4 +95,35 @@ class PurchaseItem(Base):
 
     # Relacionamentos
     purchase = relationship("Purchase", back_populates="items")
-    product = relationship("Product", back_populates="purchases") 
\ No newline at end of file
+    product = relationship("Product", back_populates="purchases") 
+
+    __table_args__ = (
+        # Junção com purchases e vendas por produto
+        Index("ix_purchase_items_purchase_id", "purchase_id"),
+        Index("ix_purchase_items_product_id", "product_id"),
+    )
+
+# Tabelas de agregação diária (mantidas por src.database.rollups)
+
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+
+    day = Column(Date, primary_key=True)
+    category = Column(String(100), primary_key=True)
+    quantity = Column(Integer, nullable=False)
+    line_items = Column(Integer, nullable=False)
+    revenue = Column(Float, nullable=False)
+
+class DailySentiment(Base):
+    __tablename__ = "daily_sentiment"
+
+    day = Column(Date, primary_key=True)
+    category = Column(String(100), primary_key=True)
+    reviews = Column(Integer, nullable=False)
+    positive = Column(Integer, nullable=False)
+    neutral = Column(Integer, nullable=False)
+    negative = Column(Integer, nullable=False)
+    rating_sum = Column(Integer, nullable=False)
+    # Soma e quantidade de scores, para médias corretas em qualquer período
+    score_sum = Column(Float, nullable=False)
+    scored = Column(Integer, nullable=False)
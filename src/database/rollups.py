@@ -0,0 +1,251 @@
+"""
+Atualiza as tabelas de agregação diária usadas pelo dashboard
+
+daily_sales e daily_sentiment guardam, por dia e categoria, as somas e
+contagens das compras e das avaliações. A atualização é incremental:
+recalcula apenas a partir do último dia já agregado (que pode estar
+incompleto), com um DELETE + INSERT ... SELECT na mesma transação.
+
+Uso:
+    python -m src.database.rollups
+    python -m src.database.rollups --since 2024-01-01
+    python -m src.database.rollups --full
+"""
+import argparse
+from datetime import date, datetime, time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import Date, case, cast, delete, func, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from src.database.models import DailySales, DailySentiment, Product, Purchase, PurchaseItem, Review
+
+# Produtos sem categoria (a categoria faz parte da chave das agregações)
+UNCATEGORIZED = "Sem categoria"
+
+
+class RefreshResult(NamedTuple):
+    table: str
+    since: Optional[date]
+    rows: int
+
+
+def _sales_query():
+    day = func.date(Purchase.created_at)
+    category = func.coalesce(Product.category, UNCATEGORIZED)
+    return select(
+        day,
+        category,
+        func.sum(PurchaseItem.quantity),
+        func.count(PurchaseItem.id),
+        func.sum(PurchaseItem.price)
+    ).select_from(Purchase).join(
+        PurchaseItem, Purchase.id == PurchaseItem.purchase_id
+    ).outerjoin(
+        Product, Product.id == PurchaseItem.product_id
+    ).group_by(day, category)
+
+
+def _sentiment_query():
+    day = func.date(Review.created_at)
+    category = func.coalesce(Product.category, UNCATEGORIZED)
+
+    def label_count(label):
+        return func.sum(case((Review.sentiment == label, 1), else_=0))
+
+    return select(
+        day,
+        category,
+        func.count(Review.id),
+        label_count("POSITIVE"),
+        label_count("NEUTRAL"),
+        label_count("NEGATIVE"),
+        func.coalesce(func.sum(Review.rating), 0),
+        func.coalesce(func.sum(Review.sentiment_score), 0.0),
+        func.count(Review.sentiment_score)
+    ).select_from(Review).outerjoin(
+        Product, Product.id == Review.product_id
+    ).group_by(day, category)
+
+
+# Tabela de agregação -> (consulta nas tabelas de fatos, coluna de data dos fatos)
+ROLLUPS = {
+    "daily_sales": (DailySales, _sales_query, Purchase.created_at),
+    "daily_sentiment": (DailySentiment, _sentiment_query, Review.created_at)
+}
+
+
+def refresh_rollup(connection: Connection, table: str, since: Optional[date] = None, full: bool = False) -> RefreshResult:
+    """
+    Recalcula uma tabela de agregação a partir de um dia
+
+    Args:
+        connection: Conexão dentro de uma transação
+        table: 'daily_sales' ou 'daily_sentiment'
+        since: Primeiro dia a recalcular (padrão: último dia já agregado)
+        full: Recalcula todo o histórico
+
+    Returns:
+        Dia inicial recalculado (None = tudo) e linhas gravadas
+    """
+    model, build_query, created_at = ROLLUPS[table]
+    if full:
+        since = None
+    elif since is None:
+        # O último dia agregado pode ter recebido dados depois da última execução
+        since = connection.execute(select(func.max(model.day))).scalar()
+
+    query = build_query()
+    remove = delete(model)
+    if since is not None:
+        query = query.where(created_at >= datetime.combine(since, time.min))
+        remove = remove.where(model.day >= since)
+
+    connection.execute(remove)
+    columns = [column.name for column in model.__table__.columns]
+    rows = connection.execute(insert(model).from_select(columns, query)).rowcount
+    return RefreshResult(table, since, rows)
+
+
+def refresh_rollups(engine: Optional[Engine] = None, since: Optional[date] = None, full: bool = False) -> Dict[str, RefreshResult]:
+    """
+    Atualiza daily_sales e daily_sentiment, cada uma em sua transação
+
+    Args:
+        engine: Banco de destino (padrão: engine de src.database.config)
+        since: Primeiro dia a recalcular (ex.: após corrigir dados antigos)
+        full: Recalcula todo o histórico
+
+    Returns:
+        Resultado por tabela
+    """
+    if engine is None:
+        from src.database.config import engine
+
+    results = {}
+    for table in ROLLUPS:
+        with engine.begin() as connection:
+            results[table] = refresh_rollup(connection, table, since, full)
+    return results
+
+
+GRAINS = ('day', 'week', 'month')
+
+
+def period_start(column, grain: str, dialect: str):
+    """
+    Início do período (dia, semana ou mês) de uma coluna de data, calculado no banco
+
+    Semanas começam na segunda-feira, como no date_trunc do PostgreSQL.
+    """
+    if grain not in GRAINS:
+        raise ValueError(f"Granularidade desconhecida: {grain} (use {', '.join(GRAINS)})")
+    if grain == 'day':
+        return column
+    if dialect == 'postgresql':
+        return cast(func.date_trunc(grain, column), Date)
+    if dialect == 'sqlite':
+        if grain == 'week':
+            return func.date(column, 'weekday 0', '-6 days', type_=Date)
+        return func.date(column, 'start of month', type_=Date)
+    raise ValueError(f"Granularidade '{grain}' não suportada em {dialect}")
+
+
+def _period_query(db: Session, model, columns, start: Optional[date], end: Optional[date], grain: str):
+    period = period_start(model.day, grain, db.get_bind().dialect.name).label('date')
+    query = select(period, *columns).group_by(period).order_by(period)
+    if start is not None:
+        query = query.where(model.day >= start)
+    if end is not None:
+        query = query.where(model.day <= end)
+    return query
+
+
+def sales_by_period(
+    db: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    grain: str = 'day'
+) -> pd.DataFrame:
+    """
+    Vendas (quantidade) e receita por período, somando as categorias
+
+    O filtro de datas e o agrupamento são feitos no banco, sobre daily_sales.
+
+    Args:
+        db: Sessão síncrona
+        start: Primeiro dia (inclusive; None = sem limite)
+        end: Último dia (inclusive; None = sem limite)
+        grain: 'day', 'week' ou 'month'
+
+    Returns:
+        DataFrame com date (início do período), sales e revenue
+    """
+    rows = db.execute(_period_query(db, DailySales, [
+        func.sum(DailySales.quantity).label('sales'),
+        func.sum(DailySales.revenue).label('revenue')
+    ], start, end, grain)).all()
+    frame = pd.DataFrame(rows, columns=['date', 'sales', 'revenue'])
+    frame['date'] = pd.to_datetime(frame['date'])
+    return frame
+
+
+def sentiment_by_period(
+    db: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    grain: str = 'day'
+) -> pd.DataFrame:
+    """
+    Contagens por sentimento e score médio por período, somando as categorias
+
+    Args:
+        db: Sessão síncrona
+        start: Primeiro dia (inclusive; None = sem limite)
+        end: Último dia (inclusive; None = sem limite)
+        grain: 'day', 'week' ou 'month'
+
+    Returns:
+        DataFrame com date, reviews, positive, neutral, negative, score_sum,
+        scored e sentiment_score (média do período)
+    """
+    rows = db.execute(_period_query(db, DailySentiment, [
+        func.sum(DailySentiment.reviews).label('reviews'),
+        func.sum(DailySentiment.positive).label('positive'),
+        func.sum(DailySentiment.neutral).label('neutral'),
+        func.sum(DailySentiment.negative).label('negative'),
+        func.sum(DailySentiment.score_sum).label('score_sum'),
+        func.sum(DailySentiment.scored).label('scored')
+    ], start, end, grain)).all()
+    frame = pd.DataFrame(rows, columns=['date', 'reviews', 'positive', 'neutral', 'negative', 'score_sum', 'scored'])
+    frame['date'] = pd.to_datetime(frame['date'])
+    frame['sentiment_score'] = frame['score_sum'] / frame['scored'].where(frame['scored'] > 0)
+    return frame
+
+
+def date_bounds(db: Session) -> Tuple[Optional[date], Optional[date]]:
+    """Primeiro e último dia com vendas ou avaliações agregadas"""
+    bounds = [
+        db.execute(select(func.min(model.day), func.max(model.day))).one()
+        for model in (DailySales, DailySentiment)
+    ]
+    firsts = [first for first, _ in bounds if first is not None]
+    lasts = [last for _, last in bounds if last is not None]
+    return (min(firsts) if firsts else None, max(lasts) if lasts else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--since', type=date.fromisoformat, default=None, help='Primeiro dia a recalcular (AAAA-MM-DD)')
+    parser.add_argument('--full', action='store_true', help='Recalcula todo o histórico')
+    args = parser.parse_args()
+
+    for result in refresh_rollups(since=args.since, full=args.full).values():
+        since = result.since.isoformat() if result.since else "início"
+        print(f"{result.table}: {result.rows} linhas recalculadas desde {since}")
+
+
+if __name__ == '__main__':
+    main()
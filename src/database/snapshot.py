@@ -0,0 +1,360 @@
+"""
+Exporta as tabelas para um snapshot Parquet incremental, para treino e análises
+
+Cada tabela é lida em blocos com cursor no servidor (yield_per) e gravada em
+<destino>/<tabela>/month=AAAA-MM/part-<execução>.parquet, particionada pelo
+mês de created_at. Um arquivo _watermarks.json guarda, por tabela, o maior
+valor da coluna de watermark já exportado (updated_at, ou created_at em
+purchase_items); as execuções seguintes exportam as linhas mais novas,
+recuando DEFAULT_LAG a partir do watermark para pegar transações confirmadas
+depois com um valor anterior. Linhas alteradas (ou exportadas de novo na
+sobreposição) aparecem em arquivos novos: read_table mantém a versão mais
+recente de cada id, e compact_table reescreve as partições com muitos arquivos
+em um único arquivo sem as versões antigas (automaticamente a partir de
+COMPACT_AFTER_FILES arquivos, ou em todas com --compact).
+
+Exclusões não são capturadas: uma linha apagada no banco continua no snapshot
+até um --full.
+
+Requer pyarrow.
+
+Uso:
+    python -m src.database.snapshot data/snapshot
+    python -m src.database.snapshot data/snapshot --tables products reviews --batch-size 100000
+    python -m src.database.snapshot data/snapshot --full
+    python -m src.database.snapshot data/snapshot --lag-seconds 900
+    python -m src.database.snapshot data/snapshot --compact
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import Date, DateTime, Float, Integer, select
+from sqlalchemy.engine import Engine
+
+from src.database import models  # noqa: F401 (registra as tabelas em Base.metadata)
+from src.database.config import Base
+
+# Tabela -> coluna de watermark (linhas com valor maior são exportadas)
+WATERMARKS = {
+    'users': 'updated_at',
+    'products': 'updated_at',
+    'purchases': 'updated_at',
+    'purchase_items': 'created_at',
+    'reviews': 'updated_at'
+}
+PARTITION_COLUMN = 'created_at'
+WATERMARK_FILE = '_watermarks.json'
+DEFAULT_BATCH_SIZE = 50000
+# Sobreposição a cada execução incremental: updated_at vem do relógio do
+# cliente, então uma transação confirmada depois do último export pode ter
+# valor menor que o watermark
+DEFAULT_LAG = timedelta(minutes=5)
+# Arquivos por partição a partir dos quais export_snapshot compacta a partição
+COMPACT_AFTER_FILES = 8
+
+
+class ExportResult(NamedTuple):
+    table: str
+    rows: int
+    files: int
+    watermark: Optional[datetime]
+    seconds: float
+
+
+def arrow_schema(table) -> pa.Schema:
+    """Schema Arrow equivalente às colunas da tabela (estável entre execuções)"""
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp('us')
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def read_watermarks(output_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(output_dir, WATERMARK_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_watermarks(output_dir: str, watermarks: Dict[str, Any]):
+    tmp_path = os.path.join(output_dir, f".{WATERMARK_FILE}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_path, os.path.join(output_dir, WATERMARK_FILE))
+
+
+def export_table(
+    engine: Engine,
+    table_name: str,
+    output_dir: str,
+    since: Optional[datetime] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    run_id: Optional[str] = None,
+    lag: timedelta = DEFAULT_LAG
+) -> ExportResult:
+    """
+    Exporta as linhas de uma tabela com watermark maior que `since - lag`
+
+    Os arquivos são escritos com nomes temporários e só renomeados no fim,
+    então leitores nunca veem um arquivo incompleto.
+
+    Args:
+        engine: Banco de origem
+        table_name: Tabela em WATERMARKS
+        output_dir: Diretório do snapshot
+        since: Último watermark exportado (None = tabela inteira)
+        batch_size: Linhas por bloco lido do banco (e por row group)
+        run_id: Sufixo dos arquivos desta execução
+        lag: Quanto recuar a partir de `since` (as linhas repetidas são
+            descartadas em read_table)
+
+    Returns:
+        Linhas e arquivos escritos e o novo watermark (nunca menor que `since`)
+    """
+    table = Base.metadata.tables[table_name]
+    watermark_column = table.c[WATERMARKS[table_name]]
+    schema = arrow_schema(table)
+    run_id = run_id or datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    table_dir = os.path.join(output_dir, table_name)
+    start = time.perf_counter()
+
+    query = select(table)
+    if since is not None:
+        query = query.where(watermark_column > since - lag)
+
+    writers: Dict[str, pq.ParquetWriter] = {}
+    rows = 0
+    watermark = since
+    try:
+        with engine.connect() as connection:
+            # yield_per usa cursor no servidor (stream_results) no PostgreSQL
+            result = connection.execution_options(yield_per=batch_size).execute(query)
+            for chunk in result.partitions():
+                batch = pa.Table.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)],
+                    schema=schema
+                )
+                rows += batch.num_rows
+                chunk_max = pc.max(batch[watermark_column.name]).as_py()
+                if chunk_max is not None and (watermark is None or chunk_max > watermark):
+                    watermark = chunk_max
+                _write_partitions(batch, table_dir, run_id, writers)
+    except BaseException:
+        for path, writer in writers.items():
+            writer.close()
+            os.remove(path)
+        raise
+
+    for path, writer in writers.items():
+        writer.close()
+        os.replace(path, path.replace('.tmp-', ''))
+    return ExportResult(table_name, rows, len(writers), watermark, time.perf_counter() - start)
+
+
+def _write_partitions(batch: pa.Table, table_dir: str, run_id: str, writers: Dict[str, pq.ParquetWriter]):
+    """Divide um bloco pelo mês de created_at e grava cada parte no arquivo da partição"""
+    months = pc.fill_null(pc.strftime(batch[PARTITION_COLUMN], format='%Y-%m'), 'unknown')
+    for month in pc.unique(months).to_pylist():
+        part = batch.filter(pc.equal(months, month))
+        partition_dir = os.path.join(table_dir, f"month={month}")
+        path = os.path.join(partition_dir, f".tmp-part-{run_id}.parquet")
+        if path not in writers:
+            os.makedirs(partition_dir, exist_ok=True)
+            writers[path] = pq.ParquetWriter(path, batch.schema)
+        writers[path].write_table(part)
+
+
+def export_snapshot(
+    engine: Engine,
+    output_dir: str,
+    tables: Sequence[str] = tuple(WATERMARKS),
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    full: bool = False,
+    verbose: bool = False,
+    lag: timedelta = DEFAULT_LAG,
+    compact_after: Optional[int] = COMPACT_AFTER_FILES
+) -> List[ExportResult]:
+    """
+    Exporta as tabelas de forma incremental, atualizando os watermarks
+
+    Args:
+        engine: Banco de origem
+        output_dir: Diretório do snapshot
+        tables: Tabelas a exportar
+        batch_size: Linhas por bloco
+        full: Apaga o snapshot das tabelas e exporta tudo de novo
+        verbose: Mostra o resultado de cada tabela
+        lag: Sobreposição com a execução anterior (ver export_table)
+        compact_after: Compacta as partições com pelo menos esse número de
+            arquivos depois da exportação (None desativa)
+
+    Returns:
+        Resultado por tabela
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    watermarks = read_watermarks(output_dir)
+    run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    results = []
+    for table_name in tables:
+        if full:
+            shutil.rmtree(os.path.join(output_dir, table_name), ignore_errors=True)
+            watermarks.pop(table_name, None)
+        state = watermarks.get(table_name)
+        since = datetime.fromisoformat(state['value']) if state and state.get('value') else None
+
+        result = export_table(engine, table_name, output_dir, since, batch_size, run_id, lag)
+        # O watermark só avança depois que os arquivos foram publicados
+        watermarks[table_name] = {
+            'column': WATERMARKS[table_name],
+            'value': result.watermark.isoformat() if result.watermark else None,
+            'exported_at': datetime.utcnow().isoformat(timespec='seconds')
+        }
+        _write_watermarks(output_dir, watermarks)
+        results.append(result)
+        if verbose:
+            rate = result.rows / result.seconds if result.seconds > 0 else 0.0
+            print(f"{table_name}: {result.rows:,} linhas em {result.files} arquivo(s), "
+                  f"{result.seconds:.1f} s ({rate:,.0f} linhas/s)")
+        if compact_after is not None:
+            compacted = compact_table(output_dir, table_name, compact_after)
+            if verbose and compacted:
+                print(f"{table_name}: {compacted} partição(ões) compactada(s)")
+    return results
+
+
+def _latest_versions(data: pa.Table, watermark: str) -> pa.Table:
+    """Mantém a linha de maior watermark de cada id"""
+    if not data.num_rows or pc.count_distinct(data['id']).as_py() == data.num_rows:
+        return data
+    # Ordena por watermark e fica com a última ocorrência de cada id
+    data = data.sort_by([('id', 'ascending'), (watermark, 'ascending')])
+    ids = data['id'].to_numpy()
+    return data.filter(pa.array(np.append(ids[1:] != ids[:-1], True)))
+
+
+def _part_files(partition_dir: str) -> List[str]:
+    """Arquivos publicados de uma partição (ignora os temporários)"""
+    return sorted(
+        os.path.join(partition_dir, name) for name in os.listdir(partition_dir)
+        if name.startswith('part-') and name.endswith('.parquet')
+    )
+
+
+def compact_table(output_dir: str, table_name: str, min_files: int = 2) -> int:
+    """
+    Reescreve cada partição com pelo menos min_files arquivos em um único arquivo
+
+    Só a versão mais recente de cada id é mantida, então as cópias deixadas
+    pelas alterações e pela sobreposição (DEFAULT_LAG) deixam de ser lidas e
+    ordenadas em cada read_table. O arquivo novo é publicado antes de os
+    antigos serem removidos: uma leitura concorrente pode ver as duas versões
+    (descartadas por read_table), nunca nenhuma.
+
+    Args:
+        output_dir: Diretório do snapshot
+        table_name: Tabela em WATERMARKS
+        min_files: Arquivos a partir dos quais a partição é compactada
+
+    Returns:
+        Número de partições reescritas
+    """
+    table_dir = os.path.join(output_dir, table_name)
+    if not os.path.isdir(table_dir):
+        return 0
+    schema = arrow_schema(Base.metadata.tables[table_name])
+    run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    compacted = 0
+    for partition in sorted(os.listdir(table_dir)):
+        partition_dir = os.path.join(table_dir, partition)
+        if not os.path.isdir(partition_dir):
+            continue
+        files = _part_files(partition_dir)
+        if len(files) < max(min_files, 2):
+            continue
+        data = _latest_versions(ds.dataset(files, schema=schema, format='parquet').to_table(), WATERMARKS[table_name])
+        tmp_path = os.path.join(partition_dir, f".tmp-part-{run_id}.parquet")
+        pq.write_table(data, tmp_path)
+        os.replace(tmp_path, os.path.join(partition_dir, f"part-{run_id}.parquet"))
+        for path in files:
+            os.remove(path)
+        compacted += 1
+    return compacted
+
+
+def read_table(
+    snapshot_dir: str,
+    table_name: str,
+    columns: Optional[List[str]] = None,
+    filter: Optional[ds.Expression] = None,
+    latest: bool = True
+) -> pa.Table:
+    """
+    Lê uma tabela do snapshot como Arrow, apenas com as colunas pedidas
+
+    Args:
+        snapshot_dir: Diretório do snapshot
+        table_name: Tabela exportada
+        columns: Colunas a ler (padrão: todas)
+        filter: Filtro do pyarrow.dataset (ex.: ds.field('month') >= '2024-01'),
+            aplicado com poda de partições e de row groups
+        latest: Mantém só a versão mais recente de cada id (linhas alteradas
+            exportadas mais de uma vez)
+
+    Returns:
+        Tabela Arrow (to_pandas() converte sem cópia para colunas numéricas)
+    """
+    dataset = ds.dataset(os.path.join(snapshot_dir, table_name), format='parquet', partitioning='hive')
+    watermark = WATERMARKS[table_name]
+    wanted = columns or [name for name in dataset.schema.names if name != 'month']
+    read_columns = list(dict.fromkeys(wanted + (['id', watermark] if latest else [])))
+    data = dataset.to_table(columns=read_columns, filter=filter)
+
+    if latest:
+        data = _latest_versions(data, watermark)
+    return data.select(wanted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output_dir')
+    parser.add_argument('--tables', nargs='+', choices=list(WATERMARKS), default=list(WATERMARKS))
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--full', action='store_true', help='Descarta o snapshot e exporta tudo de novo')
+    parser.add_argument('--lag-seconds', type=float, default=DEFAULT_LAG.total_seconds(),
+                        help='Recuo a partir do watermark em cada execução incremental')
+    parser.add_argument('--compact', action='store_true',
+                        help='Compacta todas as partições com mais de um arquivo depois da exportação')
+    args = parser.parse_args()
+
+    from src.database.config import engine
+
+    export_snapshot(
+        engine, args.output_dir, args.tables, args.batch_size, args.full, verbose=True,
+        lag=timedelta(seconds=args.lag_seconds),
+        compact_after=2 if args.compact else COMPACT_AFTER_FILES
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+"""
+Gera um conjunto de dados sintético para benchmarks e testes de carga
+
+Os dados são produzidos em blocos (DataFrames), sem materializar as tabelas
+inteiras, e podem ser gravados em CSV/Parquet para o bulk_load ou carregados
+direto no banco.
+
+Uso:
+    python -m src.database.synthetic_data data/synthetic
+    python -m src.database.synthetic_data data/synthetic --users 1000000 --products 100000 \\
+        --purchase-items 10000000 --reviews 1000000 --format parquet
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# Ordem de carga respeitando as chaves estrangeiras
+TABLES = ('users', 'products', 'purchases', 'purchase_items', 'reviews')
+
+CATEGORIES = ["Eletrônicos", "Acessórios", "Livros", "Casa", "Esporte", "Moda", "Beleza", "Brinquedos"]
+
+# Vocabulário das descrições: termos da categoria deixam o modelo de
+# conteúdo com vizinhos coerentes
+CATEGORY_WORDS = {
+    "Eletrônicos": ["tela", "bateria", "processador", "câmera", "memória", "digital"],
+    "Acessórios": ["capa", "cabo", "suporte", "carregador", "adaptador", "bluetooth"],
+    "Livros": ["romance", "autor", "edição", "capítulos", "história", "leitura"],
+    "Casa": ["cozinha", "sala", "decoração", "inox", "organizador", "panela"],
+    "Esporte": ["treino", "corrida", "academia", "bicicleta", "bola", "fitness"],
+    "Moda": ["algodão", "camiseta", "tênis", "jaqueta", "estampa", "tamanho"],
+    "Beleza": ["pele", "cabelo", "perfume", "hidratante", "maquiagem", "creme"],
+    "Brinquedos": ["infantil", "boneca", "carrinho", "quebra-cabeça", "pelúcia", "jogo"]
+}
+GENERIC_WORDS = [
+    "qualidade", "produto", "resistente", "leve", "moderno", "prático", "original",
+    "garantia", "design", "confortável", "compacto", "premium", "durável", "novo"
+]
+
+REVIEW_TEXTS = {
+    1: ["Produto péssimo, não recomendo", "Chegou quebrado e o suporte não ajudou"],
+    2: ["Qualidade abaixo do esperado", "Não gostei, parece frágil"],
+    3: ["Produto razoável pelo preço", "Cumpre o básico, nada demais"],
+    4: ["Gostei bastante, bom produto", "Boa qualidade e entrega rápida"],
+    5: ["Excelente, superou as expectativas", "Produto perfeito, recomendo muito"]
+}
+RATING_SENTIMENTS = {1: "NEGATIVE", 2: "NEGATIVE", 3: "NEUTRAL", 4: "POSITIVE", 5: "POSITIVE"}
+
+
+class SyntheticDataset:
+    def __init__(
+        self,
+        n_users: int = 1000000,
+        n_products: int = 100000,
+        n_purchase_items: int = 10000000,
+        n_reviews: int = 1000000,
+        items_per_purchase: int = 4,
+        days: int = 365,
+        end: Optional[datetime] = None,
+        label_sentiment: bool = True,
+        chunk_size: int = 100000,
+        seed: int = 0
+    ):
+        """
+        Conjunto de dados sintético com as tabelas de src.database.models
+
+        Cada bloco usa um gerador aleatório próprio (semente, tabela, bloco),
+        então o resultado é determinístico e qualquer tabela pode ser gerada
+        de novo sem repetir as demais. Os IDs começam em 1 e são contíguos.
+
+        Args:
+            n_users: Número de usuários
+            n_products: Número de produtos
+            n_purchase_items: Número de itens de compra
+            n_reviews: Número de avaliações
+            items_per_purchase: Média de itens por compra (define o número de compras)
+            days: Janela de datas dos registros, terminando em `end`
+            end: Data mais recente (padrão: meia-noite de hoje)
+            label_sentiment: Preenche sentiment/sentiment_score a partir da nota;
+                se False, ficam nulos (para testar o reprocessamento de sentimento)
+            chunk_size: Linhas por bloco
+            seed: Semente aleatória
+        """
+        self.n_users = n_users
+        self.n_products = n_products
+        self.n_purchase_items = n_purchase_items
+        self.n_reviews = n_reviews
+        self.items_per_purchase = items_per_purchase
+        self.days = days
+        self.end = end or datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        self.label_sentiment = label_sentiment
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self._item_offsets = None
+        self._product_prices = None
+        self._purchase_times = None
+        self._purchase_totals = None
+
+    @property
+    def n_purchases(self) -> int:
+        return len(self.item_offsets) - 1
+
+    def tables(self) -> Iterator[tuple]:
+        """Pares (tabela, blocos) na ordem de carga"""
+        for table in TABLES:
+            yield table, self.generate(table)
+
+    def generate(self, table: str) -> Iterator[pd.DataFrame]:
+        """Blocos de uma tabela"""
+        if table not in TABLES:
+            raise ValueError(f"Tabela desconhecida: {table}")
+        total = {
+            'users': self.n_users,
+            'products': self.n_products,
+            'purchases': self.n_purchases,
+            'purchase_items': self.n_purchase_items,
+            'reviews': self.n_reviews
+        }[table]
+        build = getattr(self, f"_{table}")
+        for chunk, start in enumerate(range(0, total, self.chunk_size)):
+            yield build(chunk, start, min(start + self.chunk_size, total))
+
+    def _rng(self, table: str, chunk: int = 0) -> np.random.Generator:
+        return np.random.default_rng([self.seed, TABLES.index(table), chunk])
+
+    def _timestamps(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        seconds = rng.integers(0, self.days * 86400, size)
+        return np.datetime64(self.end, 's') - seconds.astype('timedelta64[s]')
+
+    @property
+    def item_offsets(self) -> np.ndarray:
+        """Posição do primeiro item de cada compra (a última entrada é o total de itens)"""
+        if self._item_offsets is None:
+            rng = self._rng('purchases')
+            expected = self.n_purchase_items // self.items_per_purchase + 1
+            # Entre 1 e 2*média-1 itens por compra; o excesso é cortado no fim
+            counts = rng.integers(1, 2 * self.items_per_purchase, expected * 2)
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+            n_purchases = int(np.searchsorted(offsets, self.n_purchase_items))
+            offsets = offsets[:n_purchases + 1]
+            offsets[-1] = self.n_purchase_items
+            self._item_offsets = offsets
+        return self._item_offsets
+
+    @property
+    def product_prices(self) -> np.ndarray:
+        if self._product_prices is None:
+            prices = self._rng('products').lognormal(4.5, 1.0, self.n_products)
+            self._product_prices = np.round(np.clip(prices, 5, 20000), 2)
+        return self._product_prices
+
+    @property
+    def purchase_times(self) -> np.ndarray:
+        if self._purchase_times is None:
+            self._purchase_times = np.sort(self._timestamps(self._rng('purchases', 1), self.n_purchases))
+        return self._purchase_times
+
+    @property
+    def purchase_totals(self) -> np.ndarray:
+        """Soma dos itens de cada compra (exige uma passada pelos itens)"""
+        if self._purchase_totals is None:
+            totals = np.zeros(self.n_purchases)
+            for chunk, start in enumerate(range(0, self.n_purchase_items, self.chunk_size)):
+                stop = min(start + self.chunk_size, self.n_purchase_items)
+                purchase_index, _, _, price = self._item_values(chunk, start, stop)
+                totals += np.bincount(purchase_index, weights=price, minlength=self.n_purchases)
+            self._purchase_totals = np.round(totals, 2)
+        return self._purchase_totals
+
+    def _item_values(self, chunk: int, start: int, stop: int):
+        rng = self._rng('purchase_items', chunk)
+        size = stop - start
+        purchase_index = np.searchsorted(self.item_offsets, np.arange(start, stop), side='right') - 1
+        # Popularidade com cauda longa: poucos produtos concentram as vendas
+        # (o posto na cauda é espalhado pelo catálogo para não favorecer IDs baixos)
+        rank = (rng.zipf(1.3, size) - 1) % self.n_products
+        product_index = (rank * 7919 + rng.integers(0, 3, size)) % self.n_products
+        quantity = rng.integers(1, 4, size)
+        price = np.round(self.product_prices[product_index] * quantity, 2)
+        return purchase_index, product_index, quantity, price
+
+    def _users(self, chunk: int, start: int, stop: int) -> pd.DataFrame:
+        ids = np.arange(start + 1, stop + 1)
+        created_at = self._timestamps(self._rng('users', chunk), len(ids))
+        id_strings = ids.astype(str).astype(object)
+        return pd.DataFrame({
+            'id': ids,
+            'name': "Usuário " + id_strings,
+            'email': "usuario" + id_strings + "@exemplo.com",
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+
+    def _products(self, chunk: int, start: int, stop: int) -> pd.DataFrame:
+        rng = self._rng('products', chunk + 1)
+        ids = np.arange(start + 1, stop + 1)
+        categories = np.asarray(CATEGORIES)[rng.integers(0, len(CATEGORIES), len(ids))]
+        specific = rng.integers(0, 6, (len(ids), 3))
+        generic = rng.integers(0, len(GENERIC_WORDS), (len(ids), 6))
+        descriptions = [
+            " ".join([CATEGORY_WORDS[category][i] for i in own] + [GENERIC_WORDS[i] for i in common])
+            for category, own, common in zip(categories, specific, generic)
+        ]
+        created_at = self._timestamps(rng, len(ids))
+        return pd.DataFrame({
+            'id': ids,
+            'name': "Produto " + ids.astype(str).astype(object),
+            'description': descriptions,
+            'price': self.product_prices[start:stop],
+            'category': categories,
+            'stock': rng.integers(0, 500, len(ids)),
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+
+    def _purchases(self, chunk: int, start: int, stop: int) -> pd.DataFrame:
+        rng = self._rng('purchases', chunk + 2)
+        created_at = self.purchase_times[start:stop]
+        return pd.DataFrame({
+            'id': np.arange(start + 1, stop + 1),
+            'user_id': rng.integers(1, self.n_users + 1, stop - start),
+            'total_amount': self.purchase_totals[start:stop],
+            'status': "completed",
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+
+    def _purchase_items(self, chunk: int, start: int, stop: int) -> pd.DataFrame:
+        purchase_index, product_index, quantity, price = self._item_values(chunk, start, stop)
+        return pd.DataFrame({
+            'id': np.arange(start + 1, stop + 1),
+            'purchase_id': purchase_index + 1,
+            'product_id': product_index + 1,
+            'quantity': quantity,
+            'price': price,
+            'created_at': self.purchase_times[purchase_index]
+        })
+
+    def _reviews(self, chunk: int, start: int, stop: int) -> pd.DataFrame:
+        rng = self._rng('reviews', chunk)
+        size = stop - start
+        # Notas concentradas em 4 e 5, como em lojas reais
+        ratings = rng.choice([1, 2, 3, 4, 5], size, p=[0.08, 0.07, 0.15, 0.3, 0.4])
+        variants = rng.integers(0, 2, size)
+        created_at = self._timestamps(rng, size)
+        frame = pd.DataFrame({
+            'id': np.arange(start + 1, stop + 1),
+            'user_id': rng.integers(1, self.n_users + 1, size),
+            'product_id': rng.integers(1, self.n_products + 1, size),
+            'rating': ratings,
+            'text': [REVIEW_TEXTS[rating][variant] for rating, variant in zip(ratings, variants)],
+            'sentiment': None,
+            'sentiment_score': np.nan,
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+        if self.label_sentiment:
+            frame['sentiment'] = [RATING_SENTIMENTS[rating] for rating in ratings]
+            frame['sentiment_score'] = np.round(rng.uniform(0.5, 1.0, size), 4)
+        return frame
+
+
+def write_dataset(dataset: SyntheticDataset, output_dir: str, file_format: str = 'csv') -> dict:
+    """
+    Grava cada tabela em <output_dir>/<tabela>.<formato>, bloco a bloco
+
+    Args:
+        dataset: Conjunto de dados a gravar
+        output_dir: Diretório de saída
+        file_format: 'csv' ou 'parquet' (requer pyarrow)
+
+    Returns:
+        Dicionário tabela -> caminho do arquivo
+    """
+    if file_format not in ('csv', 'parquet'):
+        raise ValueError(f"Formato desconhecido: {file_format}")
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for table, chunks in dataset.tables():
+        path = os.path.join(output_dir, f"{table}.{file_format}")
+        if file_format == 'csv':
+            for i, frame in enumerate(chunks):
+                frame.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            writer = None
+            try:
+                for frame in chunks:
+                    batch = pa.Table.from_pandas(frame, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, batch.schema)
+                    writer.write_table(batch)
+            finally:
+                if writer is not None:
+                    writer.close()
+        paths[table] = path
+    return paths
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Opções de escala compartilhadas com o bulk_load"""
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--purchase-items', type=int, default=10000000)
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--no-sentiment', action='store_true', help='Deixa o sentimento das avaliações nulo')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def from_arguments(args: argparse.Namespace, chunk_size: int = 100000) -> SyntheticDataset:
+    return SyntheticDataset(
+        n_users=args.users,
+        n_products=args.products,
+        n_purchase_items=args.purchase_items,
+        n_reviews=args.reviews,
+        label_sentiment=not args.no_sentiment,
+        chunk_size=chunk_size,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output_dir')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    dataset = from_arguments(args)
+    start = time.perf_counter()
+    for table, path in write_dataset(dataset, args.output_dir, args.format).items():
+        print(f"{table}: {path}")
+    print(f"Concluído em {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
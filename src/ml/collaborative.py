@@ -0,0 +1,313 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import List, Optional
+import os
+from dotenv import load_dotenv
+from src.ml.utils import top_n_indices, build_id_index, lookup_rows, save_artifact, load_artifact
+
+load_dotenv()
+
+# Peso de cada unidade comprada na matriz de interações
+PURCHASE_WEIGHT = 1.0
+# Peso de uma avaliação 5 estrelas (1-2 estrelas não contam como preferência)
+REVIEW_WEIGHT = 1.0
+
+
+def build_interactions(purchases: pd.DataFrame, reviews: pd.DataFrame) -> pd.DataFrame:
+    """
+    Combina compras e avaliações em interações implícitas usuário x produto
+
+    Args:
+        purchases: DataFrame com colunas user_id, product_id e quantity
+        reviews: DataFrame com colunas user_id, product_id e rating
+
+    Returns:
+        DataFrame com colunas user_id, product_id e weight (apenas pesos > 0)
+    """
+    purchase_weights = purchases.assign(
+        weight=purchases['quantity'].astype(np.float32) * PURCHASE_WEIGHT
+    )
+    review_weights = reviews.assign(
+        weight=np.clip(reviews['rating'].astype(np.float32) - 2, 0, None) / 3 * REVIEW_WEIGHT
+    )
+    interactions = pd.concat([
+        purchase_weights[['user_id', 'product_id', 'weight']],
+        review_weights[['user_id', 'product_id', 'weight']]
+    ])
+    interactions = interactions.dropna(subset=['user_id', 'product_id'])
+    interactions = interactions.groupby(['user_id', 'product_id'], as_index=False)['weight'].sum()
+    return interactions[interactions['weight'] > 0].reset_index(drop=True)
+
+
+def load_interactions(db) -> pd.DataFrame:
+    """
+    Carrega as interações usuário x produto das tabelas de compras e avaliações
+
+    Args:
+        db: Sessão do SQLAlchemy
+
+    Returns:
+        DataFrame com colunas user_id, product_id e weight
+    """
+    from sqlalchemy import func
+    from src.database.models import Purchase, PurchaseItem, Review
+
+    purchases = db.query(
+        Purchase.user_id,
+        PurchaseItem.product_id,
+        func.sum(PurchaseItem.quantity).label('quantity')
+    ).join(
+        PurchaseItem,
+        Purchase.id == PurchaseItem.purchase_id
+    ).group_by(
+        Purchase.user_id,
+        PurchaseItem.product_id
+    ).all()
+    reviews = db.query(Review.user_id, Review.product_id, Review.rating).all()
+
+    return build_interactions(
+        pd.DataFrame(purchases, columns=['user_id', 'product_id', 'quantity']),
+        pd.DataFrame(reviews, columns=['user_id', 'product_id', 'rating'])
+    )
+
+
+class CollaborativeRecommender:
+    def __init__(
+        self,
+        n_factors: int = 32,
+        regularization: float = 0.1,
+        alpha: float = 10.0,
+        n_iterations: int = 15,
+        cg_steps: int = 3,
+        n_candidates: int = 100,
+        block_size: int = 512,
+        mmap_mode: Optional[str] = None,
+        keep_versions: int = 3,
+        random_state: int = 42,
+        model_path: Optional[str] = None
+    ):
+        """
+        Filtragem colaborativa com ALS para feedback implícito (Hu, Koren e Volinsky)
+
+        Args:
+            n_factors: Dimensão dos fatores latentes (d)
+            regularization: Regularização L2 (λ)
+            alpha: Escala da confiança c = 1 + alpha * peso
+            n_iterations: Iterações do ALS
+            cg_steps: Passos de gradiente conjugado por iteração
+            n_candidates: Candidatos pré-computados por usuário (k)
+            block_size: Usuários/itens processados por bloco
+            mmap_mode: Modo de np.load para os arrays do artefato
+            keep_versions: Número de versões do artefato mantidas em disco
+            random_state: Semente da inicialização dos fatores
+            model_path: Diretório dos artefatos (padrão: MODEL_PATH)
+        """
+        self.model_path = model_path or os.getenv("MODEL_PATH", "./models")
+        self.n_factors = n_factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.n_iterations = n_iterations
+        self.cg_steps = cg_steps
+        self.n_candidates = n_candidates
+        self.block_size = block_size
+        self.mmap_mode = mmap_mode
+        self.keep_versions = keep_versions
+        self.random_state = random_state
+        self.model_version = None
+        self.user_ids = None
+        self.item_ids = None
+        self.user_to_row = None
+        self.item_to_row = None
+        self.user_factors = None
+        self.item_factors = None
+        self.candidates = None
+        self.popular_items = None
+
+    @property
+    def artifacts_path(self) -> str:
+        """Diretório com as versões do artefato colaborativo"""
+        return os.path.join(self.model_path, 'collaborative')
+
+    def fit(self, interactions: pd.DataFrame):
+        """
+        Treina os fatores latentes e pré-computa os candidatos de cada usuário
+
+        Args:
+            interactions: DataFrame com colunas user_id, product_id e weight
+        """
+        interactions = interactions.groupby(['user_id', 'product_id'], as_index=False)['weight'].sum()
+        interactions = interactions[interactions['weight'] > 0]
+
+        self.user_ids = np.unique(interactions['user_id'].to_numpy(dtype=np.int64))
+        self.item_ids = np.unique(interactions['product_id'].to_numpy(dtype=np.int64))
+        self.user_to_row = build_id_index(self.user_ids)
+        self.item_to_row = build_id_index(self.item_ids)
+
+        # Matriz esparsa usuário x item com (c - 1) = alpha * peso
+        confidence = sparse.csr_matrix(
+            (
+                self.alpha * interactions['weight'].to_numpy(dtype=np.float32),
+                (
+                    lookup_rows(self.user_to_row, interactions['user_id']),
+                    lookup_rows(self.item_to_row, interactions['product_id'])
+                )
+            ),
+            shape=(len(self.user_ids), len(self.item_ids)),
+            dtype=np.float32
+        )
+        item_confidence = confidence.T.tocsr()
+
+        rng = np.random.default_rng(self.random_state)
+        user_factors = rng.normal(scale=0.01, size=(len(self.user_ids), self.n_factors)).astype(np.float32)
+        item_factors = rng.normal(scale=0.01, size=(len(self.item_ids), self.n_factors)).astype(np.float32)
+        for _ in range(self.n_iterations):
+            user_factors = self._least_squares(confidence, user_factors, item_factors)
+            item_factors = self._least_squares(item_confidence, item_factors, user_factors)
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+
+        # Fallback para usuários sem histórico: itens com mais usuários
+        popularity = confidence.getnnz(axis=0).astype(np.float32)
+        self.popular_items = top_n_indices(popularity, min(self.n_candidates, len(self.item_ids))).astype(np.int32)
+        self.candidates = self._build_candidates(confidence)
+
+        self._save_model()
+
+    def recommend(self, user_id: int, n_recommendations: int = 5) -> List[int]:
+        """
+        Recomenda produtos para um usuário
+
+        Apenas os candidatos pré-computados do usuário são pontuados, então o
+        custo é O(k·d) e não depende do tamanho do catálogo.
+
+        Args:
+            user_id: ID do usuário
+            n_recommendations: Número de recomendações desejadas
+
+        Returns:
+            Lista de IDs dos produtos recomendados
+        """
+        if self.user_factors is None:
+            self._load_model()
+
+        row = lookup_rows(self.user_to_row, [user_id])[0]
+        if row < 0:
+            # Usuário sem histórico: recomenda os itens mais populares
+            return self.item_ids[self.popular_items[:n_recommendations]].tolist()
+
+        candidates = self.candidates[row]
+        candidates = candidates[candidates >= 0]
+        scores = self.item_factors[candidates] @ self.user_factors[row]
+        top = candidates[top_n_indices(scores, min(n_recommendations, len(candidates)))]
+        recommended = self.item_ids[top].tolist()
+
+        # Completa com itens populares quando o usuário já consumiu quase tudo
+        if len(recommended) < n_recommendations:
+            for item_id in self.item_ids[self.popular_items].tolist():
+                if item_id not in recommended:
+                    recommended.append(item_id)
+                if len(recommended) == n_recommendations:
+                    break
+        return recommended
+
+    def _least_squares(self, confidence: sparse.csr_matrix, factors: np.ndarray, fixed: np.ndarray) -> np.ndarray:
+        """
+        Atualiza uma matriz de fatores mantendo a outra fixa (um passo do ALS)
+
+        Resolve (YᵀY + Yᵀ(Cu - I)Y + λI) x_u = Yᵀ Cu p(u) para todas as linhas
+        de um bloco ao mesmo tempo, com alguns passos de gradiente conjugado
+        partindo da solução anterior, sem montar uma matriz d x d por usuário.
+
+        Args:
+            confidence: Matriz CSR com (c - 1) nas posições observadas
+            factors: Fatores a atualizar (X)
+            fixed: Fatores fixos (Y)
+
+        Returns:
+            Nova matriz de fatores
+        """
+        gram = fixed.T @ fixed + self.regularization * np.eye(self.n_factors, dtype=np.float32)
+        factors = factors.copy()
+        for start in range(0, factors.shape[0], self.block_size):
+            block = confidence[start:start + self.block_size]
+            rows = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))
+            observed = fixed[block.indices]
+
+            def apply(x):
+                # (YᵀY + λI) x + Yᵀ(Cu - I)Y x, só nos itens observados
+                projections = np.einsum('nd,nd->n', observed, x[rows])
+                weighted = sparse.csr_matrix((block.data * projections, block.indices, block.indptr), shape=block.shape)
+                return x @ gram + weighted @ fixed
+
+            # Yᵀ Cu p(u), com p = 1 e c = 1 + alpha * peso nos itens observados
+            target = sparse.csr_matrix((block.data + 1, block.indices, block.indptr), shape=block.shape) @ fixed
+
+            x = factors[start:start + self.block_size]
+            residual = target - apply(x)
+            direction = residual.copy()
+            rs_old = np.einsum('ij,ij->i', residual, residual)
+            for _ in range(self.cg_steps):
+                applied = apply(direction)
+                denominator = np.einsum('ij,ij->i', direction, applied)
+                step = np.divide(rs_old, denominator, out=np.zeros_like(rs_old), where=denominator > 0)
+                x += step[:, None] * direction
+                residual -= step[:, None] * applied
+                rs_new = np.einsum('ij,ij->i', residual, residual)
+                beta = np.divide(rs_new, rs_old, out=np.zeros_like(rs_new), where=rs_old > 0)
+                direction = residual + beta[:, None] * direction
+                rs_old = rs_new
+            factors[start:start + self.block_size] = x
+        return factors
+
+    def _build_candidates(self, confidence: sparse.csr_matrix) -> np.ndarray:
+        """Pré-computa os k itens de maior score de cada usuário (sem itens já consumidos)"""
+        n_candidates = min(self.n_candidates, len(self.item_ids))
+        candidates = np.full((len(self.user_ids), n_candidates), -1, dtype=np.int32)
+        for start in range(0, len(self.user_ids), self.block_size):
+            block = confidence[start:start + self.block_size]
+            scores = self.user_factors[start:start + self.block_size] @ self.item_factors.T
+            rows = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))
+            scores[rows, block.indices] = -np.inf
+
+            top = top_n_indices(scores, n_candidates)
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            candidates[start:start + block.shape[0]] = np.where(np.isfinite(top_scores), top, -1)
+        return candidates
+
+    def _save_model(self):
+        """Salva o modelo treinado em uma nova versão do artefato"""
+        self.model_version = save_artifact(
+            self.artifacts_path,
+            arrays={
+                'user_ids': self.user_ids,
+                'item_ids': self.item_ids,
+                'user_to_row': self.user_to_row,
+                'item_to_row': self.item_to_row,
+                'user_factors': self.user_factors,
+                'item_factors': self.item_factors,
+                'candidates': self.candidates,
+                'popular_items': self.popular_items
+            },
+            metadata={
+                'n_factors': self.n_factors,
+                'n_users': int(len(self.user_ids)),
+                'n_items': int(len(self.item_ids)),
+                'n_candidates': int(self.candidates.shape[1])
+            },
+            keep_versions=self.keep_versions
+        )
+
+    def _load_model(self):
+        """Carrega a versão atual do artefato (memory-mapped se mmap_mode for definido)"""
+        version, metadata, arrays = load_artifact(self.artifacts_path, mmap_mode=self.mmap_mode)
+        self.user_ids = arrays['user_ids']
+        self.item_ids = arrays['item_ids']
+        self.user_to_row = arrays['user_to_row']
+        self.item_to_row = arrays['item_to_row']
+        self.user_factors = arrays['user_factors']
+        self.item_factors = arrays['item_factors']
+        self.candidates = arrays['candidates']
+        self.popular_items = arrays['popular_items']
+        self.n_factors = metadata['n_factors']
+        self.model_version = version
@@ -0,0 +1,223 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from src.ml.sentiment_analyzer import SentimentAnalyzer
+
+# Tipos de pool para executar a inferência fora do event loop
+EXECUTORS = ('thread', 'process')
+
+# Analisador de cada processo do pool (modo 'process')
+_worker_analyzer: Optional[SentimentAnalyzer] = None
+
+
+def _init_worker(analyzer_kwargs: Dict[str, Any]):
+    """Cria e aquece o analisador de um processo do pool"""
+    global _worker_analyzer
+    _worker_analyzer = SentimentAnalyzer(**analyzer_kwargs)
+    _worker_analyzer.warmup()
+
+
+def _analyze_in_worker(reviews: List[Dict[str, Any]], batch_size: int) -> List[Dict[str, Any]]:
+    return _worker_analyzer.analyze_reviews(reviews, batch_size=batch_size)
+
+
+class SentimentInferenceService:
+    def __init__(
+        self,
+        analyzer_kwargs: Optional[Dict[str, Any]] = None,
+        max_batch_size: Optional[int] = None,
+        batch_window_ms: Optional[float] = None,
+        workers: Optional[int] = None,
+        executor: Optional[str] = None
+    ):
+        """
+        Serviço de inferência de sentimento com micro-batching
+
+        Requisições concorrentes entram em uma fila. Um coletor junta o que
+        chegar em até batch_window_ms (ou max_batch_size itens) e envia o lote
+        para um pool de threads ou processos, sem bloquear o event loop. Cada
+        chamador recebe o resultado da sua avaliação pelo seu future. Enquanto
+        todos os workers estão ocupados a fila cresce, então os lotes seguintes
+        saem maiores.
+
+        Args:
+            analyzer_kwargs: Argumentos do SentimentAnalyzer
+            max_batch_size: Máximo de avaliações por lote
+                (padrão: SENTIMENT_MAX_BATCH_SIZE ou 32)
+            batch_window_ms: Espera máxima, contada a partir da primeira
+                avaliação, para completar um lote (padrão:
+                SENTIMENT_BATCH_WINDOW_MS ou 5)
+            workers: Lotes executados em paralelo (padrão: SENTIMENT_WORKERS ou 1)
+            executor: 'thread' (um modelo compartilhado) ou 'process' (um
+                modelo por processo) (padrão: SENTIMENT_EXECUTOR ou 'thread')
+        """
+        self.analyzer_kwargs = analyzer_kwargs or {}
+        self.max_batch_size = max_batch_size or int(os.getenv("SENTIMENT_MAX_BATCH_SIZE", 32))
+        if batch_window_ms is None:
+            batch_window_ms = float(os.getenv("SENTIMENT_BATCH_WINDOW_MS", 5))
+        self.batch_window = batch_window_ms / 1000
+        self.workers = workers or int(os.getenv("SENTIMENT_WORKERS", 1))
+        self.executor_type = executor or os.getenv("SENTIMENT_EXECUTOR", "thread")
+        if self.executor_type not in EXECUTORS:
+            raise ValueError(f"executor deve ser um de {EXECUTORS}")
+
+        # No modo 'process' este analisador nunca carrega o modelo
+        self.analyzer = SentimentAnalyzer(**self.analyzer_kwargs)
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._executor: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._arrived: Optional[asyncio.Event] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._running = set()
+
+    @property
+    def is_running(self) -> bool:
+        return self._collector is not None
+
+    async def start(self):
+        """Cria o pool e inicia o coletor de lotes no event loop atual"""
+        if self.is_running:
+            return
+        if self.executor_type == 'process':
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.analyzer_kwargs,)
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sentiment')
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._arrived = asyncio.Event()
+        self._collector = asyncio.create_task(self._collect())
+
+    async def warmup(self):
+        """Carrega o modelo nos workers antes de receber tráfego"""
+        loop = asyncio.get_running_loop()
+        if self.executor_type == 'process':
+            # Executa um lote vazio em cada processo, o que dispara o initializer
+            await asyncio.gather(*[
+                loop.run_in_executor(self._executor, _analyze_in_worker, [], 1)
+                for _ in range(self.workers)
+            ])
+        else:
+            await loop.run_in_executor(self._executor, self.analyzer.warmup)
+
+    async def stop(self):
+        """Para o coletor, espera os lotes em execução e encerra o pool"""
+        if not self.is_running:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Serviço de inferência encerrado"))
+        self._executor.shutdown(wait=True)
+        self._collector = None
+        self._executor = None
+
+    async def analyze_review(self, review: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analisa uma avaliação dentro do próximo lote
+
+        Args:
+            review: Dicionário com text e rating
+
+        Returns:
+            A avaliação com sentiment e sentiment_score
+        """
+        if not self.is_running:
+            raise RuntimeError("Serviço de inferência não iniciado")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((review, future))
+        self._arrived.set()
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        """Tamanho dos lotes executados até agora"""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'queued': self._queue.qsize() if self._queue is not None else 0
+        }
+
+    async def _collect(self):
+        """Forma lotes a partir da fila enquanto houver worker livre"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.batch_window
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    # Espera um evento, e não queue.get(): cancelar a espera
+                    # por timeout nunca descarta uma avaliação
+                    self._arrived.clear()
+                    try:
+                        await asyncio.wait_for(self._arrived.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                # Cancelado no meio da coleta: as avaliações já retiradas da fila
+                # voltam para ela, e stop() avisa seus chamadores
+                for item in batch:
+                    self._queue.put_nowait(item)
+                self._slots.release()
+                raise
+
+            task = asyncio.create_task(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Executa um lote no pool e resolve o future de cada avaliação"""
+        try:
+            # Chamadores que desistiram (timeout, desconexão) não entram no lote
+            batch = [(review, future) for review, future in batch if not future.done()]
+            if not batch:
+                return
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+            reviews = [review for review, _ in batch]
+            loop = asyncio.get_running_loop()
+            try:
+                if self.executor_type == 'process':
+                    results = await loop.run_in_executor(
+                        self._executor, _analyze_in_worker, reviews, self.max_batch_size
+                    )
+                else:
+                    results = await loop.run_in_executor(
+                        self._executor, self.analyzer.analyze_reviews, reviews, self.max_batch_size
+                    )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
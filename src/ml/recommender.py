@@ -2,44 +2,392 @@ import numpy as np
 import pandas as pd
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
-from typing import List, Dict, Any
+from scipy import sparse
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
 import joblib
 import os
 from dotenv import load_dotenv
+from src.ml.collaborative import CollaborativeRecommender
+from src.ml.reranker import FEATURES, HybridReranker, default_features
+from src.ml.utils import top_n_indices, build_id_index, lookup_rows, save_artifact, load_artifact, load_artifact_object
 
 load_dotenv()
 
+
+def _product_content(products_df: pd.DataFrame) -> pd.Series:
+    """Combina informações relevantes dos produtos para o vetorizador"""
+    return products_df['name'].fillna('') + ' ' + \
+        products_df['category'].fillna('') + ' ' + \
+        products_df['description'].fillna('')
+
+
+# Campos que definem o conteúdo de um produto para o modelo
+CONTENT_FIELDS = ('name', 'category', 'description')
+
+
+def _content_hashes(products_df: pd.DataFrame) -> np.ndarray:
+    """Hash (uint64) dos campos de conteúdo de cada produto; nulo equivale a vazio"""
+    content = products_df.reindex(columns=list(CONTENT_FIELDS)).fillna('').astype(str)
+    return pd.util.hash_pandas_object(content, index=False).to_numpy(dtype=np.uint64)
+
+
+def _fingerprint(product_ids: np.ndarray, content_hashes: np.ndarray) -> str:
+    order = np.argsort(product_ids, kind='stable')
+    digest = hashlib.sha1(np.ascontiguousarray(product_ids[order], dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(content_hashes[order], dtype=np.uint64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def catalog_fingerprint(products_data: List[Dict[str, Any]]) -> str:
+    """
+    Impressão digital do catálogo usado no treino
+
+    Não depende da ordem dos produtos e só muda quando um ID ou um campo de
+    conteúdo (nome, categoria, descrição) muda. É gravada nos metadados do
+    artefato, permitindo decidir se um modelo salvo ainda serve ao catálogo.
+
+    Args:
+        products_data: Lista de dicionários com os produtos
+
+    Returns:
+        Hash hexadecimal de 16 caracteres
+    """
+    products_df = pd.DataFrame(products_data)
+    if products_df.empty:
+        return _fingerprint(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64))
+    return _fingerprint(products_df['id'].to_numpy(dtype=np.int64), _content_hashes(products_df))
+
+
+def _top_k_neighbors(
+    query_matrix,
+    corpus_matrix,
+    k: int,
+    block_size: int,
+    query_rows: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula os K vizinhos mais similares de cada linha de consulta em blocos
+
+    Como o TfidfVectorizer normaliza as linhas (norma L2), a similaridade de
+    cosseno é o produto escalar. Apenas um bloco denso de block_size x N fica
+    em memória por vez, então o pico de memória não depende de N².
+
+    Args:
+        query_matrix: Matriz esparsa (CSR) com os produtos consultados
+        corpus_matrix: Matriz esparsa (CSR) com todos os produtos do catálogo
+        k: Número de vizinhos por produto (no máximo N - 1)
+        block_size: Número de linhas processadas por bloco
+        query_rows: Linha de cada produto consultado no corpus, para que ele
+            não seja vizinho de si mesmo
+
+    Returns:
+        Tupla (índices, scores) com arrays M x K ordenados por similaridade
+        decrescente
+    """
+    n_queries = query_matrix.shape[0]
+    indices = np.zeros((n_queries, k), dtype=np.int32)
+    scores = np.zeros((n_queries, k), dtype=np.float32)
+    if k == 0:
+        return indices, scores
+
+    corpus_t = corpus_matrix.T.tocsr()
+    for start in range(0, n_queries, block_size):
+        stop = min(start + block_size, n_queries)
+        block = (query_matrix[start:stop] @ corpus_t).toarray()
+
+        # Remove o próprio produto dos candidatos
+        if query_rows is not None:
+            block[np.arange(stop - start), query_rows[start:stop]] = -np.inf
+
+        # Seleciona os K maiores sem ordenar a linha inteira
+        top = top_n_indices(block, k)
+        indices[start:stop] = top
+        scores[start:stop] = np.take_along_axis(block, top, axis=1)
+
+    return indices, scores
+
+
 class ProductRecommender:
-    def __init__(self):
-        self.model_path = os.getenv("MODEL_PATH", "./models")
-        self.vectorizer = TfidfVectorizer(stop_words='english')
+    def __init__(
+        self,
+        top_k: Optional[int] = None,
+        block_size: int = 256,
+        mmap_mode: Optional[str] = None,
+        keep_versions: int = 3,
+        reranker: Optional[HybridReranker] = None,
+        model_path: Optional[str] = None
+    ):
+        """
+        Args:
+            top_k: Se definido, guarda apenas os top_k vizinhos de cada produto
+                em vez da matriz de similaridade N x N completa
+            block_size: Linhas por bloco no cálculo dos vizinhos (modo top_k)
+            mmap_mode: Modo de np.load para os arrays do artefato ('r' faz
+                com que vários processos compartilhem o mesmo page cache)
+            keep_versions: Número de versões do artefato mantidas em disco
+            reranker: Re-ranker aplicado quando o artefato tem atributos dos
+                produtos (padrão: HybridReranker configurado pelo ambiente)
+            model_path: Diretório dos artefatos (padrão: MODEL_PATH)
+        """
+        self.model_path = model_path or os.getenv("MODEL_PATH", "./models")
+        if top_k is None and os.getenv("RECOMMENDER_TOP_K"):
+            top_k = int(os.getenv("RECOMMENDER_TOP_K"))
+        self.top_k = top_k
+        self.block_size = block_size
+        self.mmap_mode = mmap_mode
+        self.keep_versions = keep_versions
+        self.model_version = None
+        self.vectorizer = TfidfVectorizer(stop_words='english', dtype=np.float32)
         self.similarity_matrix = None
+        self.neighbor_indices = None
+        self.neighbor_scores = None
         self.products_df = None
-        
-    def fit(self, products_data: List[Dict[str, Any]]):
+        self.product_ids = None
+        self.id_to_row = None
+        self.tfidf_matrix = None
+        self.content_hashes = None
+        self.catalog_fingerprint = None
+        self.product_features = None
+        self.reranker = reranker or HybridReranker()
+        self.updates_since_fit = 0
+        self.user_model = CollaborativeRecommender(mmap_mode=mmap_mode, model_path=self.model_path)
+
+    def fit(self, products_data: List[Dict[str, Any]], product_features: Optional[pd.DataFrame] = None):
         """
         Treina o modelo de recomendação com os dados dos produtos
         
         Args:
             products_data: Lista de dicionários contendo informações dos produtos
+            product_features: Atributos de re-ranqueamento indexados por id
+                (src.ml.reranker.product_features); sem eles as recomendações
+                seguem só a similaridade
         """
         # Converte os dados para DataFrame
         self.products_df = pd.DataFrame(products_data)
         
         # Combina informações relevantes para o vetorizador
-        self.products_df['content'] = self.products_df['name'] + ' ' + \
-                                    self.products_df['category'] + ' ' + \
-                                    self.products_df['description']
+        self.products_df['content'] = _product_content(self.products_df)
         
+        self.product_ids = self.products_df['id'].to_numpy(dtype=np.int64)
+        self.content_hashes = _content_hashes(self.products_df)
+        self._build_id_index()
+        self.product_features = self._align_features(product_features) if product_features is not None else None
+
         # Cria matriz TF-IDF
         tfidf_matrix = self.vectorizer.fit_transform(self.products_df['content'])
+        self.updates_since_fit = 0
         
-        # Calcula similaridade entre produtos
-        self.similarity_matrix = cosine_similarity(tfidf_matrix, tfidf_matrix)
+        if self.top_k:
+            # Calcula apenas os vizinhos mais próximos, em blocos; a matriz
+            # TF-IDF é mantida para as atualizações incrementais
+            self.tfidf_matrix = tfidf_matrix
+            self.neighbor_indices, self.neighbor_scores = _top_k_neighbors(
+                tfidf_matrix, tfidf_matrix, self._neighbors_width(), self.block_size,
+                query_rows=np.arange(len(self.product_ids))
+            )
+            self.similarity_matrix = None
+        else:
+            # Calcula similaridade entre produtos
+            self.similarity_matrix = cosine_similarity(tfidf_matrix, tfidf_matrix)
+            self.tfidf_matrix = None
+            self.neighbor_indices = None
+            self.neighbor_scores = None
         
         # Salva o modelo
         self._save_model()
     
+    def add_products(self, products_data: List[Dict[str, Any]]):
+        """
+        Adiciona produtos ao catálogo sem retreinar o modelo
+        
+        Os novos produtos são vetorizados com o vocabulário existente e apenas
+        as listas de vizinhos afetadas são recalculadas. Como o IDF não é
+        atualizado, um fit completo periódico ainda é necessário.
+        
+        Args:
+            products_data: Lista de dicionários contendo informações dos produtos
+        """
+        self._add_products(products_data)
+    
+    def _add_products(self, products_data: List[Dict[str, Any]], features: Optional[np.ndarray] = None):
+        """
+        Implementação de add_products
+        
+        Args:
+            products_data: Lista de dicionários contendo informações dos produtos
+            features: Atributos de re-ranqueamento dos produtos, na mesma ordem
+                (padrão: atributos de produtos sem histórico)
+        """
+        self._prepare_incremental_update()
+        new_df = pd.DataFrame(products_data)
+        new_ids = new_df['id'].to_numpy(dtype=np.int64)
+        if len(np.unique(new_ids)) != len(new_ids) or (lookup_rows(self.id_to_row, new_ids) >= 0).any():
+            raise ValueError("Os produtos adicionados devem ter IDs novos e únicos")
+        
+        n_existing = len(self.product_ids)
+        new_matrix = self.vectorizer.transform(_product_content(new_df))
+        self.tfidf_matrix = sparse.vstack([self.tfidf_matrix, new_matrix], format='csr')
+        self.product_ids = np.concatenate([self.product_ids, new_ids])
+        if self.content_hashes is not None:
+            self.content_hashes = np.concatenate([self.content_hashes, _content_hashes(new_df)])
+        if self.product_features is not None:
+            if features is None:
+                in_stock = (new_df['stock'].fillna(0) > 0).to_numpy() if 'stock' in new_df else None
+                features = default_features(len(new_df), in_stock)
+            self.product_features = np.concatenate([self.product_features, features])
+        self._build_id_index()
+        
+        k = self._neighbors_width()
+        if k != self.neighbor_indices.shape[1]:
+            # Catálogo pequeno: a largura do índice mudou, recalcula todos
+            self._refresh_neighbors(np.arange(len(self.product_ids)))
+        else:
+            self._merge_new_neighbors(n_existing)
+            new_indices, new_scores = _top_k_neighbors(
+                new_matrix, self.tfidf_matrix, k, self.block_size,
+                query_rows=np.arange(n_existing, len(self.product_ids))
+            )
+            self.neighbor_indices = np.concatenate([self.neighbor_indices, new_indices])
+            self.neighbor_scores = np.concatenate([self.neighbor_scores, new_scores])
+        
+        self._finish_incremental_update()
+    
+    def update_products(self, products_data: List[Dict[str, Any]]):
+        """
+        Atualiza nome, categoria ou descrição de produtos existentes
+        
+        Equivale a remover e adicionar os produtos: as listas que apontavam
+        para eles são recalculadas e as novas similaridades são mescladas. Os
+        atributos de re-ranqueamento são mantidos; só in_stock acompanha o
+        stock informado.
+        
+        Args:
+            products_data: Lista de dicionários contendo informações dos produtos
+        """
+        self._prepare_incremental_update()
+        product_ids = [product['id'] for product in products_data]
+        features = None
+        if self.product_features is not None:
+            features = self.product_features[self._lookup_rows(product_ids)].copy()
+            stock = pd.DataFrame(products_data).reindex(columns=['stock'])['stock'].to_numpy(dtype=np.float64)
+            known = ~np.isnan(stock)
+            features[known, FEATURES.index('in_stock')] = stock[known] > 0
+        self.remove_products(product_ids, save=False)
+        self._add_products(products_data, features)
+    
+    def remove_products(self, product_ids: List[int], save: bool = True):
+        """
+        Remove produtos do catálogo sem retreinar o modelo
+        
+        Apenas os produtos que tinham algum removido entre os vizinhos têm a
+        lista recalculada.
+        
+        Args:
+            product_ids: IDs dos produtos a remover
+            save: Se False, não grava uma nova versão do artefato
+        """
+        self._prepare_incremental_update()
+        removed_rows = self._lookup_rows(product_ids)
+        
+        keep = np.ones(len(self.product_ids), dtype=bool)
+        keep[removed_rows] = False
+        affected = np.isin(self.neighbor_indices, removed_rows).any(axis=1)[keep]
+        
+        # Renumera as linhas restantes
+        new_row = np.cumsum(keep, dtype=np.int64) - 1
+        self.tfidf_matrix = self.tfidf_matrix[keep]
+        self.product_ids = self.product_ids[keep]
+        if self.content_hashes is not None:
+            self.content_hashes = self.content_hashes[keep]
+        if self.product_features is not None:
+            self.product_features = self.product_features[keep]
+        self._build_id_index()
+        
+        k = self._neighbors_width()
+        self.neighbor_indices = new_row[self.neighbor_indices[keep, :k]].astype(np.int32)
+        self.neighbor_scores = self.neighbor_scores[keep, :k]
+        self._refresh_neighbors(np.flatnonzero(affected))
+        
+        if save:
+            self._finish_incremental_update()
+    
+    def _prepare_incremental_update(self):
+        """Garante que o índice top-K, a matriz TF-IDF e o vocabulário estão em memória"""
+        if self.similarity_matrix is None and self.neighbor_indices is None:
+            self._load_model()
+        if self.neighbor_indices is None:
+            raise ValueError("Atualizações incrementais exigem o modo top_k")
+        if self.tfidf_matrix is None:
+            _, metadata, arrays = load_artifact(
+                self.artifacts_path, version=self.model_version,
+                names=['tfidf_data', 'tfidf_indices', 'tfidf_indptr', 'content_hashes']
+            )
+            self.tfidf_matrix = sparse.csr_matrix(
+                (arrays['tfidf_data'], arrays['tfidf_indices'], arrays['tfidf_indptr']),
+                shape=tuple(metadata['tfidf_shape'])
+            )
+            # Artefatos antigos não têm os hashes: a impressão digital fica indefinida
+            content_hashes = arrays.get('content_hashes')
+            self.content_hashes = np.array(content_hashes) if content_hashes is not None else None
+            self.vectorizer = load_artifact_object(self.artifacts_path, self.model_version, 'vectorizer')
+        # Arrays abertos com mmap são somente leitura
+        self.neighbor_indices = np.array(self.neighbor_indices)
+        self.neighbor_scores = np.array(self.neighbor_scores)
+        self.product_ids = np.array(self.product_ids)
+        # products_df descreve apenas os dados do último fit completo
+        self.products_df = None
+    
+    def _finish_incremental_update(self):
+        self.updates_since_fit += 1
+        self._save_model()
+    
+    def _neighbors_width(self) -> int:
+        """Número de vizinhos guardados por produto"""
+        return max(0, min(self.top_k, len(self.product_ids) - 1))
+    
+    def _refresh_neighbors(self, rows: np.ndarray):
+        """Recalcula do zero a lista de vizinhos das linhas informadas"""
+        k = self._neighbors_width()
+        if k != self.neighbor_indices.shape[1]:
+            self.neighbor_indices = np.zeros((len(self.product_ids), k), dtype=np.int32)
+            self.neighbor_scores = np.zeros((len(self.product_ids), k), dtype=np.float32)
+            rows = np.arange(len(self.product_ids))
+        if len(rows) == 0:
+            return
+        indices, scores = _top_k_neighbors(
+            self.tfidf_matrix[rows], self.tfidf_matrix, k, self.block_size, query_rows=rows
+        )
+        self.neighbor_indices[rows] = indices
+        self.neighbor_scores[rows] = scores
+    
+    def _merge_new_neighbors(self, n_existing: int):
+        """
+        Mescla os produtos novos (linhas >= n_existing) nas listas dos existentes
+        
+        Só as linhas em que algum produto novo supera o K-ésimo vizinho atual
+        são alteradas.
+        """
+        k = self.neighbor_indices.shape[1]
+        if k == 0:
+            return
+        new_t = self.tfidf_matrix[n_existing:].T.tocsr()
+        for start in range(0, n_existing, self.block_size):
+            stop = min(start + self.block_size, n_existing)
+            new_scores = (self.tfidf_matrix[start:stop] @ new_t).toarray()
+            changed = np.flatnonzero(new_scores.max(axis=1) > self.neighbor_scores[start:stop, -1])
+            if len(changed) == 0:
+                continue
+            rows = changed + start
+            scores = np.concatenate([self.neighbor_scores[rows], new_scores[changed]], axis=1)
+            candidates = np.concatenate([
+                self.neighbor_indices[rows],
+                np.broadcast_to(np.arange(n_existing, len(self.product_ids), dtype=np.int32), new_scores[changed].shape)
+            ], axis=1)
+            top = top_n_indices(scores, k)
+            self.neighbor_indices[rows] = np.take_along_axis(candidates, top, axis=1)
+            self.neighbor_scores[rows] = np.take_along_axis(scores, top, axis=1)
+    
     def recommend_products(self, product_id: int, n_recommendations: int = 5) -> List[int]:
         """
         Recomenda produtos similares a um produto específico
@@ -51,23 +399,101 @@ class ProductRecommender:
         Returns:
             Lista de IDs dos produtos recomendados
         """
-        if self.similarity_matrix is None:
+        if self.similarity_matrix is None and self.neighbor_indices is None:
             self._load_model()
             
         # Encontra o índice do produto
-        product_idx = self.products_df[self.products_df['id'] == product_id].index[0]
+        product_idx = self._lookup_row(product_id)
+        
+        if self.product_features is not None:
+            return self.product_ids[self._rerank(np.array([product_idx]), n_recommendations)[0]].tolist()
         
-        # Obtém similaridades
-        similar_products = list(enumerate(self.similarity_matrix[product_idx]))
+        if self.neighbor_indices is not None:
+            # Os vizinhos já estão ordenados e sem o próprio produto
+            neighbors = self.neighbor_indices[product_idx, :n_recommendations]
+            return self.product_ids[neighbors].tolist()
         
-        # Ordena por similaridade
-        similar_products = sorted(similar_products, key=lambda x: x[1], reverse=True)
+        # Obtém similaridades, removendo o próprio produto
+        scores = np.array(self.similarity_matrix[product_idx], dtype=np.float32)
+        scores[product_idx] = -np.inf
         
-        # Remove o próprio produto
-        similar_products = similar_products[1:n_recommendations+1]
+        # Seleciona os mais similares sem ordenar o catálogo inteiro
+        n_recommendations = min(n_recommendations, len(scores) - 1)
+        top = top_n_indices(scores, n_recommendations)
         
         # Retorna IDs dos produtos recomendados
-        return [self.products_df.iloc[i[0]]['id'] for i in similar_products]
+        return self.product_ids[top].tolist()
+    
+    def recommend_products_batch(self, product_ids: List[int], n_recommendations: int = 5) -> np.ndarray:
+        """
+        Recomenda produtos similares para vários produtos de uma vez
+        
+        As similaridades de todos os produtos base são selecionadas em uma
+        única operação matricial (em blocos de block_size linhas).
+        
+        Args:
+            product_ids: IDs dos produtos base
+            n_recommendations: Número de recomendações por produto
+            
+        Returns:
+            Array (len(product_ids), n) com os IDs recomendados para cada produto
+        """
+        if n_recommendations < 1:
+            raise ValueError(f"n_recommendations deve ser >= 1 (recebido: {n_recommendations})")
+        if self.similarity_matrix is None and self.neighbor_indices is None:
+            self._load_model()
+        
+        rows = self._lookup_rows(product_ids)
+        
+        if self.product_features is not None:
+            blocks = [
+                self._rerank(rows[start:start + self.block_size], n_recommendations)
+                for start in range(0, len(rows), self.block_size)
+            ]
+            if not blocks:
+                return np.empty((0, n_recommendations), dtype=self.product_ids.dtype)
+            return self.product_ids[np.concatenate(blocks)]
+        
+        if self.neighbor_indices is not None:
+            return self.product_ids[self.neighbor_indices[rows, :n_recommendations]]
+        
+        n_recommendations = min(n_recommendations, len(self.product_ids) - 1)
+        recommended = np.empty((len(rows), n_recommendations), dtype=self.product_ids.dtype)
+        for start in range(0, len(rows), self.block_size):
+            block_rows = rows[start:start + self.block_size]
+            scores = np.array(self.similarity_matrix[block_rows], dtype=np.float32)
+            scores[np.arange(len(block_rows)), block_rows] = -np.inf
+            recommended[start:start + len(block_rows)] = self.product_ids[top_n_indices(scores, n_recommendations)]
+        return recommended
+    
+    def _rerank(self, rows: np.ndarray, n_recommendations: int) -> np.ndarray:
+        """
+        Seleciona os vizinhos das linhas pelo score híbrido
+
+        Os n_candidates vizinhos mais similares de cada linha (do índice
+        top-K ou da matriz densa) são re-ranqueados pelo HybridReranker.
+
+        Returns:
+            Array (len(rows), n) com as linhas recomendadas
+        """
+        n_candidates = max(self.reranker.n_candidates, n_recommendations)
+        if self.neighbor_indices is not None:
+            candidates = self.neighbor_indices[rows, :n_candidates]
+            similarities = self.neighbor_scores[rows, :n_candidates]
+        else:
+            scores = np.array(self.similarity_matrix[rows], dtype=np.float32)
+            scores[np.arange(len(rows)), rows] = -np.inf
+            candidates = top_n_indices(scores, min(n_candidates, len(self.product_ids) - 1))
+            similarities = np.take_along_axis(scores, candidates, axis=1)
+        return self.reranker.rerank(candidates, similarities, self.product_features, n_recommendations)
+
+    def _align_features(self, product_features: pd.DataFrame) -> np.ndarray:
+        """Matriz de atributos na ordem de product_ids; produtos sem atributos usam o padrão"""
+        aligned = product_features.reindex(index=self.product_ids, columns=list(FEATURES))
+        missing = aligned.isna().any(axis=1).to_numpy()
+        features = aligned.to_numpy(dtype=np.float32)
+        features[missing] = default_features(int(missing.sum()))
+        return features
     
     def recommend_for_user(self, user_id: int, n_recommendations: int = 5) -> List[int]:
         """
@@ -80,22 +506,148 @@ class ProductRecommender:
         Returns:
             Lista de IDs dos produtos recomendados
         """
-        # TODO: Implementar recomendação baseada em histórico do usuário
-        # Por enquanto, retorna recomendações aleatórias
-        return np.random.choice(self.products_df['id'].values, n_recommendations, replace=False).tolist()
+        try:
+            return self.user_model.recommend(user_id, n_recommendations)
+        except FileNotFoundError:
+            # Sem modelo colaborativo treinado: usa os primeiros produtos do catálogo
+            if self.product_ids is None:
+                self._load_model()
+            return self.product_ids[:n_recommendations].tolist()
+    
+    def _build_id_index(self):
+        """Cria o mapeamento ID -> linha (lookup O(1)) a partir de product_ids"""
+        self.id_to_row = build_id_index(self.product_ids)
+    
+    def _lookup_row(self, product_id: int) -> int:
+        """Retorna a linha do produto no modelo"""
+        return int(self._lookup_rows([product_id])[0])
+    
+    def _lookup_rows(self, product_ids: List[int]) -> np.ndarray:
+        """Retorna as linhas de vários produtos no modelo"""
+        rows = lookup_rows(self.id_to_row, product_ids)
+        if (rows < 0).any():
+            missing = np.asarray(product_ids)[rows < 0].tolist()
+            raise ValueError(f"Produtos não encontrados no modelo: {missing}")
+        return rows
+    
+    @property
+    def artifacts_path(self) -> str:
+        """Diretório com as versões do artefato do recomendador"""
+        return os.path.join(self.model_path, 'recommender')
     
     def _save_model(self):
-        """Salva o modelo treinado"""
-        os.makedirs(self.model_path, exist_ok=True)
-        joblib.dump({
-            'vectorizer': self.vectorizer,
-            'similarity_matrix': self.similarity_matrix,
-            'products_df': self.products_df
-        }, os.path.join(self.model_path, 'recommender_model.joblib'))
+        """
+        Salva o modelo treinado em uma nova versão do artefato
+        
+        Arrays salvos em recommender/<versão>/ (ver src.ml.utils.save_artifact):
+            product_ids.npy        IDs dos produtos (int64)
+            id_to_row.npy          mapeamento ID -> linha
+            neighbor_*.npy         índice top-K (modo top_k)
+            similarity_matrix.npy  matriz densa (modo denso)
+            tfidf_*.npy            matriz TF-IDF em CSR (modo top_k)
+            content_hashes.npy     hash do conteúdo de cada produto (uint64)
+            product_features.npy   atributos de re-ranqueamento (N x len(FEATURES))
+            vectorizer.joblib      vocabulário TF-IDF
+        """
+        tfidf = self.tfidf_matrix
+        self.catalog_fingerprint = (
+            _fingerprint(self.product_ids, self.content_hashes) if self.content_hashes is not None else None
+        )
+        self.model_version = save_artifact(
+            self.artifacts_path,
+            arrays={
+                'product_ids': self.product_ids,
+                'id_to_row': self.id_to_row,
+                'neighbor_indices': self.neighbor_indices,
+                'neighbor_scores': self.neighbor_scores,
+                'similarity_matrix': self.similarity_matrix,
+                'tfidf_data': tfidf.data if tfidf is not None else None,
+                'tfidf_indices': tfidf.indices if tfidf is not None else None,
+                'tfidf_indptr': tfidf.indptr if tfidf is not None else None,
+                'content_hashes': self.content_hashes,
+                'product_features': self.product_features
+            },
+            metadata={
+                'mode': 'top_k' if self.neighbor_indices is not None else 'dense',
+                'top_k': self.top_k,
+                'n_products': int(len(self.product_ids)),
+                'tfidf_shape': list(tfidf.shape) if tfidf is not None else None,
+                'updates_since_fit': self.updates_since_fit,
+                'catalog_fingerprint': self.catalog_fingerprint,
+                'feature_names': list(FEATURES) if self.product_features is not None else None
+            },
+            objects={'vectorizer': self.vectorizer},
+            keep_versions=self.keep_versions
+        )
     
     def _load_model(self):
-        """Carrega o modelo treinado"""
-        model_data = joblib.load(os.path.join(self.model_path, 'recommender_model.joblib'))
+        """Carrega a versão atual do artefato (memory-mapped se mmap_mode for definido)"""
+        legacy_path = os.path.join(self.model_path, 'recommender_model.joblib')
+        if not os.path.exists(os.path.join(self.artifacts_path, 'LATEST')) and os.path.exists(legacy_path):
+            return self._load_legacy_model(legacy_path)
+        
+        version, metadata, arrays = load_artifact(
+            self.artifacts_path, mmap_mode=self.mmap_mode,
+            names=['product_ids', 'id_to_row', 'neighbor_indices', 'neighbor_scores', 'similarity_matrix', 'product_features']
+        )
+        self.product_ids = arrays['product_ids']
+        self.id_to_row = arrays['id_to_row']
+        self.neighbor_indices = arrays.get('neighbor_indices')
+        self.neighbor_scores = arrays.get('neighbor_scores')
+        self.similarity_matrix = arrays.get('similarity_matrix')
+        # Atributos salvos com outra lista de colunas não são compatíveis com o re-ranker atual
+        compatible = metadata.get('feature_names') == list(FEATURES)
+        self.product_features = arrays.get('product_features') if compatible else None
+        self.top_k = metadata['top_k']
+        self.updates_since_fit = metadata.get('updates_since_fit', 0)
+        self.catalog_fingerprint = metadata.get('catalog_fingerprint')
+        self.model_version = version
+        # A matriz TF-IDF e o vectorizer.joblib só são necessários para
+        # alterar o catálogo (ver _prepare_incremental_update)
+        self.tfidf_matrix = None
+        self.content_hashes = None
+        self.products_df = None
+    
+    def _load_legacy_model(self, path: str):
+        """Carrega o formato antigo (um único arquivo joblib)"""
+        model_data = joblib.load(path)
         self.vectorizer = model_data['vectorizer']
         self.similarity_matrix = model_data['similarity_matrix']
-        self.products_df = model_data['products_df'] 
\ No newline at end of file
+        self.neighbor_indices = model_data.get('neighbor_indices')
+        self.neighbor_scores = model_data.get('neighbor_scores')
+        self.top_k = model_data.get('top_k')
+        self.product_features = None
+        self.products_df = model_data['products_df']
+        self.product_ids = self.products_df['id'].to_numpy(dtype=np.int64)
+        self._build_id_index()
+
+
+def load_or_fit(
+    products_data: List[Dict[str, Any]],
+    fingerprint: Optional[str] = None,
+    product_features: Optional[Callable[[], pd.DataFrame]] = None,
+    **kwargs
+) -> ProductRecommender:
+    """
+    Carrega o artefato salvo se ele foi treinado com o catálogo atual; senão treina e salva
+
+    Args:
+        products_data: Catálogo atual
+        fingerprint: catalog_fingerprint(products_data), se já calculada
+        product_features: Retorna os atributos de re-ranqueamento; chamada
+            só quando for preciso treinar
+        **kwargs: Argumentos de ProductRecommender
+
+    Returns:
+        Recomendador pronto para uso
+    """
+    fingerprint = fingerprint or catalog_fingerprint(products_data)
+    recommender = ProductRecommender(**kwargs)
+    try:
+        recommender._load_model()
+    except FileNotFoundError:
+        pass
+    if recommender.catalog_fingerprint != fingerprint:
+        recommender = ProductRecommender(**kwargs)
+        recommender.fit(products_data, product_features() if product_features is not None else None)
+    return recommender
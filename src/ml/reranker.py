@@ -0,0 +1,163 @@
+"""
+Re-ranqueamento híbrido das recomendações por conteúdo
+
+O recomendador gera os M vizinhos mais similares (TF-IDF) e o re-ranker
+combina, em uma única operação vetorizada, a similaridade com atributos de
+cada produto calculados no treino: sentimento médio das avaliações, número de
+avaliações, popularidade nas compras e disponibilidade em estoque.
+"""
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.ml.utils import top_n_indices
+
+# Colunas da matriz de atributos (todas normalizadas para [0, 1])
+FEATURES = ('sentiment', 'reviews', 'popularity', 'in_stock')
+
+DEFAULT_WEIGHTS = {
+    'similarity': 1.0,
+    'sentiment': 0.3,
+    'reviews': 0.1,
+    'popularity': 0.2,
+    # Maior que qualquer diferença de similaridade: produtos sem estoque vão para o fim
+    'in_stock': 1.0
+}
+DEFAULT_CANDIDATES = 50
+
+# Média suavizada do sentimento: produtos com poucas avaliações ficam perto do neutro
+SENTIMENT_PRIOR = 0.5
+PRIOR_REVIEWS = 5
+
+
+def product_features(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula os atributos de re-ranqueamento a partir das estatísticas dos produtos
+
+    Args:
+        stats: DataFrame com id, stock, reviews (quantidade), score_sum e
+            scored (soma e quantidade de sentiment_score) e quantity
+            (unidades vendidas)
+
+    Returns:
+        DataFrame indexado por id com as colunas de FEATURES
+    """
+    stats = stats.fillna({'stock': 0, 'reviews': 0, 'score_sum': 0.0, 'scored': 0, 'quantity': 0})
+    reviews = stats['reviews'].to_numpy(dtype=np.float64)
+    quantity = stats['quantity'].to_numpy(dtype=np.float64)
+    features = pd.DataFrame({
+        'sentiment': (stats['score_sum'] + SENTIMENT_PRIOR * PRIOR_REVIEWS) / (stats['scored'] + PRIOR_REVIEWS),
+        # Escala logarítmica: poucos produtos concentram a maior parte das avaliações e vendas
+        'reviews': np.log1p(reviews) / np.log1p(max(reviews.max(initial=0), 1)),
+        'popularity': np.log1p(quantity) / np.log1p(max(quantity.max(initial=0), 1)),
+        'in_stock': (stats['stock'] > 0).astype(np.float64)
+    })
+    features.index = stats['id'].to_numpy(dtype=np.int64)
+    return features.astype(np.float32)
+
+
+def default_features(n: int, in_stock: Optional[np.ndarray] = None) -> np.ndarray:
+    """Atributos de produtos sem histórico (sentimento neutro, sem avaliações nem vendas)"""
+    features = np.zeros((n, len(FEATURES)), dtype=np.float32)
+    features[:, FEATURES.index('sentiment')] = SENTIMENT_PRIOR
+    features[:, FEATURES.index('in_stock')] = 1.0 if in_stock is None else in_stock
+    return features
+
+
+def load_product_stats(db) -> pd.DataFrame:
+    """
+    Estatísticas por produto usadas em product_features, agregadas no banco
+
+    Args:
+        db: Sessão do SQLAlchemy
+
+    Returns:
+        DataFrame com id, stock, reviews, score_sum, scored e quantity
+    """
+    from sqlalchemy import func, select
+    from src.database.models import Product, PurchaseItem, Review
+
+    reviews = select(
+        Review.product_id,
+        func.count(Review.id).label('reviews'),
+        func.sum(Review.sentiment_score).label('score_sum'),
+        func.count(Review.sentiment_score).label('scored')
+    ).group_by(Review.product_id).subquery()
+    sales = select(
+        PurchaseItem.product_id,
+        func.sum(PurchaseItem.quantity).label('quantity')
+    ).group_by(PurchaseItem.product_id).subquery()
+
+    rows = db.execute(
+        select(Product.id, Product.stock, reviews.c.reviews, reviews.c.score_sum, reviews.c.scored, sales.c.quantity)
+        .outerjoin(reviews, reviews.c.product_id == Product.id)
+        .outerjoin(sales, sales.c.product_id == Product.id)
+    ).all()
+    return pd.DataFrame(rows, columns=['id', 'stock', 'reviews', 'score_sum', 'scored', 'quantity'])
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """
+    Lê pesos no formato 'sentiment=0.5,in_stock=2'
+
+    Args:
+        spec: Pares nome=peso separados por vírgula
+
+    Returns:
+        Dicionário nome -> peso
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_WEIGHTS:
+            raise ValueError(f"Peso desconhecido: {name} (use {', '.join(DEFAULT_WEIGHTS)})")
+        weights[name] = float(value)
+    return weights
+
+
+class HybridReranker:
+    def __init__(self, weights: Optional[Dict[str, float]] = None, n_candidates: Optional[int] = None):
+        """
+        Args:
+            weights: Pesos de 'similarity' e de cada atributo em FEATURES;
+                os ausentes usam DEFAULT_WEIGHTS (padrão: RERANK_WEIGHTS)
+            n_candidates: Vizinhos por conteúdo considerados antes do
+                re-ranqueamento (padrão: RERANK_CANDIDATES ou 50)
+        """
+        if weights is None:
+            weights = parse_weights(os.getenv("RERANK_WEIGHTS", ""))
+        self.weights = {**DEFAULT_WEIGHTS, **weights}
+        unknown = set(self.weights) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Pesos desconhecidos: {sorted(unknown)}")
+        self.n_candidates = n_candidates or int(os.getenv("RERANK_CANDIDATES", DEFAULT_CANDIDATES))
+        self.similarity_weight = np.float32(self.weights['similarity'])
+        self.feature_weights = np.array([self.weights[name] for name in FEATURES], dtype=np.float32)
+
+    def score(self, candidates: np.ndarray, similarities: np.ndarray, features: np.ndarray) -> np.ndarray:
+        """
+        Score híbrido dos candidatos
+
+        Args:
+            candidates: Linhas dos candidatos, (M,) ou (B, M)
+            similarities: Similaridade de conteúdo de cada candidato, mesmo formato
+            features: Matriz de atributos do catálogo (N, len(FEATURES))
+
+        Returns:
+            Scores no formato de candidates
+        """
+        return self.similarity_weight * similarities + features[candidates] @ self.feature_weights
+
+    def rerank(self, candidates: np.ndarray, similarities: np.ndarray, features: np.ndarray, n: int) -> np.ndarray:
+        """
+        Seleciona os n candidatos de maior score híbrido
+
+        Returns:
+            Linhas selecionadas, (n,) ou (B, n), em ordem decrescente de score
+        """
+        scores = self.score(candidates, similarities, features)
+        top = top_n_indices(scores, min(n, candidates.shape[-1]))
+        return np.take_along_axis(candidates, top, axis=-1)
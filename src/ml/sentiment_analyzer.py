@@ -1,38 +1,157 @@
-from transformers import pipeline
+import numpy as np
+import hashlib
 import os
+import shutil
+import threading
+import uuid
 from dotenv import load_dotenv
-from typing import Dict, Any
-import joblib
+from typing import Dict, Any, List, Optional, Tuple
+from src.ml.sentiment_backends import BACKENDS, load_backend
+from src.ml.sentiment_cache import SentimentCache
 
 load_dotenv()
 
+DEFAULT_MODEL = "neuralmind/bert-base-portuguese-cased"
+
+# Estratégias para textos maiores que a janela do modelo
+TRUNCATION_STRATEGIES = ('head', 'head_tail', 'sliding_window')
+
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        max_length: int = 512,
+        truncation: Optional[str] = None,
+        window_stride: Optional[int] = None,
+        max_windows: int = 4,
+        cache: Optional[SentimentCache] = None,
+        backend: Optional[str] = None
+    ):
+        """
+        O modelo só é carregado no primeiro uso (ou em warmup()), então criar
+        o analisador é barato e não importa transformers nem PyTorch.
+        
+        Args:
+            model_name: Nome no Hugging Face Hub ou diretório local do modelo
+            max_length: Número máximo de tokens por entrada do modelo
+            truncation: Tratamento de textos longos: 'head' (primeiros tokens),
+                'head_tail' (início + fim do texto) ou 'sliding_window'
+                (janelas sobrepostas com média das probabilidades)
+            window_stride: Passo entre janelas em tokens (padrão: meia janela)
+            max_windows: Máximo de janelas por texto no modo sliding_window
+            cache: Cache de resultados (padrão: configurado por
+                SENTIMENT_CACHE_SIZE e SENTIMENT_CACHE_PATH)
+            backend: Execução do modelo em CPU: 'torch' (eager, precisão
+                total), 'quantized' (int8 dinâmico) ou 'onnx' (ONNX Runtime)
+        """
         self.model_path = os.getenv("MODEL_PATH", "./models")
-        self.sentiment_pipeline = None
-        self._load_model()
+        self.model_name = model_name or os.getenv("SENTIMENT_MODEL", DEFAULT_MODEL)
+        self.max_length = max_length
+        self.truncation = truncation or os.getenv("SENTIMENT_TRUNCATION", "head")
+        if self.truncation not in TRUNCATION_STRATEGIES:
+            raise ValueError(f"truncation deve ser um de {TRUNCATION_STRATEGIES}")
+        self.window_stride = window_stride
+        self.max_windows = max_windows
+        self.cache = cache or SentimentCache(
+            max_size=int(os.getenv("SENTIMENT_CACHE_SIZE", 10000)),
+            db_path=os.getenv("SENTIMENT_CACHE_PATH") or None
+        )
+        self.backend_name = backend or os.getenv("SENTIMENT_BACKEND", "torch")
+        if self.backend_name not in BACKENDS:
+            raise ValueError(f"backend deve ser um de {sorted(BACKENDS)}")
+        self.tokenizer = None
+        # Só a configuração (num_labels, id2label) fica no analisador: o modelo
+        # PyTorch pertence ao backend, que pode descartá-lo (quantized, onnx)
+        self.config = None
+        self.backend = None
+        self._load_lock = threading.Lock()
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Indica se o modelo já está em memória"""
+        return self.backend is not None
+    
+    def warmup(self):
+        """
+        Carrega o modelo e executa uma inferência de aquecimento
+        
+        Workers devem chamar antes de receber tráfego, para que a primeira
+        requisição não pague a carga do modelo.
+        """
+        self._ensure_loaded()
+        self._score_texts(["aquecimento"], batch_size=1)
+    
+    def _ensure_loaded(self):
+        """Carrega o modelo uma única vez, mesmo com várias threads concorrentes"""
+        if self.backend is not None:
+            return
+        with self._load_lock:
+            if self.backend is None:
+                self._load_model()
     
     def _load_model(self):
-        """Carrega o modelo de análise de sentimento"""
+        """Carrega o tokenizer, o modelo e o backend de inferência"""
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        
+        source = self._model_source()
+        tokenizer = AutoTokenizer.from_pretrained(source)
+        model = AutoModelForSequenceClassification.from_pretrained(source).eval()
+        if not os.path.isdir(source):
+            # Baixado do Hub: guarda uma cópia local para as próximas cargas
+            self._save_model(tokenizer, model)
+        
+        self.tokenizer = tokenizer
+        self.config = model.config
+        # O backend é atribuído por último: é ele que marca o modelo como carregado
+        self.backend = load_backend(self.backend_name, model, self._export_dir())
+    
+    def _model_source(self) -> str:
+        """Diretório local do modelo, se existir; senão o nome no Hub"""
+        if os.path.isdir(self.model_name):
+            return self.model_name
+        local_dir = self._local_model_dir()
+        if os.path.exists(os.path.join(local_dir, 'config.json')):
+            return local_dir
+        return self.model_name
+    
+    def _artifact_name(self) -> str:
+        """Nome de diretório estável para o modelo configurado"""
+        name = os.path.basename(os.path.normpath(self.model_name))
+        digest = hashlib.sha1(self.model_name.encode('utf-8')).hexdigest()[:8]
+        return f"{name}-{digest}"
+    
+    def _local_model_dir(self) -> str:
+        """Diretório da cópia local (save_pretrained) de um modelo do Hub"""
+        return os.path.join(self.model_path, 'sentiment', self._artifact_name())
+    
+    def _export_dir(self) -> str:
+        """Diretório dos artefatos derivados do modelo (ex.: export ONNX)"""
+        return os.path.join(self.model_path, 'sentiment_exports', self._artifact_name())
+    
+    def _save_model(self, tokenizer, model):
+        """
+        Salva o tokenizer e os pesos com save_pretrained
+        
+        Os arquivos são escritos em um diretório temporário e renomeados no
+        final, então outro processo nunca carrega uma cópia incompleta.
+        """
+        local_dir = self._local_model_dir()
+        tmp_dir = f"{local_dir}.tmp-{uuid.uuid4().hex[:8]}"
+        tokenizer.save_pretrained(tmp_dir)
+        model.save_pretrained(tmp_dir)
         try:
-            # Tenta carregar o modelo salvo
-            model_data = joblib.load(os.path.join(self.model_path, 'sentiment_model.joblib'))
-            self.sentiment_pipeline = model_data['pipeline']
-        except:
-            # Se não encontrar o modelo, carrega um novo
-            self.sentiment_pipeline = pipeline(
-                "sentiment-analysis",
-                model="neuralmind/bert-base-portuguese-cased",
-                tokenizer="neuralmind/bert-base-portuguese-cased"
-            )
-            self._save_model()
+            os.rename(tmp_dir, local_dir)
+        except OSError:
+            # Outro processo publicou a cópia primeiro
+            shutil.rmtree(tmp_dir, ignore_errors=True)
     
-    def _save_model(self):
-        """Salva o modelo de análise de sentimento"""
-        os.makedirs(self.model_path, exist_ok=True)
-        joblib.dump({
-            'pipeline': self.sentiment_pipeline
-        }, os.path.join(self.model_path, 'sentiment_model.joblib'))
+    @property
+    def model_version(self) -> str:
+        """Identifica o modelo e a configuração que determinam os resultados"""
+        return (
+            f"{self.model_name}|{self.backend_name}|{self.truncation}|"
+            f"{self.max_length}|{self.window_stride}|{self.max_windows}"
+        )
     
     def analyze_text(self, text: str) -> Dict[str, Any]:
         """
@@ -44,21 +163,137 @@ class SentimentAnalyzer:
         Returns:
             Dicionário com o resultado da análise
         """
-        if not text.strip():
-            return {
-                'sentiment': 'NEUTRAL',
-                'score': 0.5
-            }
+        # O limite de tamanho é aplicado em tokens, no mesmo caminho do lote
+        return self.analyze_texts([text])[0]
+    
+    def analyze_texts(self, texts: List[str], batch_size: int = 32) -> List[Dict[str, Any]]:
+        """
+        Analisa o sentimento de vários textos em lotes
+        
+        Resultados já calculados (mesmo texto normalizado e mesma versão do
+        modelo) vêm do cache, e textos repetidos no lote são pontuados uma vez.
+        
+        Args:
+            texts: Textos a serem analisados
+            batch_size: Número de segmentos por forward pass
+            
+        Returns:
+            Lista com o resultado da análise de cada texto, na ordem de entrada
+        """
+        results = [{'sentiment': 'NEUTRAL', 'score': 0.5} for _ in texts]
+        pending = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not pending:
+            return results
+        
+        model_version = self.model_version
+        keys = [SentimentCache.make_key(texts[i], model_version) for i in pending]
+        cached = self.cache.get_many(list(dict.fromkeys(keys)))
+        
+        # Textos ainda não pontuados, sem repetição
+        to_score = {}
+        for i, key in zip(pending, keys):
+            if key not in cached and key not in to_score:
+                to_score[key] = texts[i]
+        if to_score:
+            scored = dict(zip(to_score, self._score_texts(list(to_score.values()), batch_size)))
+            self.cache.set_many(scored)
+            cached.update(scored)
+        
+        for i, key in zip(pending, keys):
+            results[i] = dict(cached[key])
+        return results
+    
+    def _score_texts(self, texts: List[str], batch_size: int) -> List[Dict[str, Any]]:
+        """
+        Executa o modelo sobre textos não vazios
+        
+        Os textos são tokenizados de uma vez e divididos em segmentos que
+        cabem na janela do modelo (conforme a estratégia de truncation). Os
+        segmentos são ordenados por número de tokens, então cada lote tem
+        entradas de tamanho parecido e pouco padding. As probabilidades dos
+        segmentos de um mesmo texto são combinadas pela média.
+        """
+        self._ensure_loaded()
+        tokenizer = self.tokenizer
+        config = self.config
+        token_ids = tokenizer(
+            texts,
+            add_special_tokens=False,
+            truncation=False,
+            verbose=False
+        )['input_ids']
+        
+        segments = []
+        owners = []
+        for owner, ids in enumerate(token_ids):
+            for segment in self._segments(ids):
+                segments.append(tokenizer.build_inputs_with_special_tokens(segment))
+                owners.append(owner)
+        owners = np.asarray(owners)
+        order = np.argsort([len(ids) for ids in segments], kind='stable')
+        
+        probabilities = np.zeros((len(segments), config.num_labels), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            batch_idx = order[start:start + batch_size]
+            input_ids, attention_mask = self._pad_batch([segments[j] for j in batch_idx], tokenizer.pad_token_id)
+            logits = self.backend(input_ids, attention_mask)
+            # Softmax numericamente estável
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilities[batch_idx] = exp / exp.sum(axis=1, keepdims=True)
+        
+        # Média das probabilidades dos segmentos de cada texto
+        text_probabilities = np.zeros((len(texts), probabilities.shape[1]), dtype=np.float32)
+        np.add.at(text_probabilities, owners, probabilities)
+        text_probabilities /= np.bincount(owners, minlength=len(texts))[:, None]
+        
+        results = []
+        for row in text_probabilities:
+            label = int(row.argmax())
+            results.append(self._format_result(config.id2label[label], float(row[label])))
+        return results
+    
+    def _segments(self, token_ids: List[int]) -> List[List[int]]:
+        """
+        Divide os tokens de um texto em segmentos que cabem na janela do modelo
+        
+        Args:
+            token_ids: Tokens do texto, sem tokens especiais
+            
+        Returns:
+            Lista de segmentos (sem tokens especiais)
+        """
+        self._ensure_loaded()
+        budget = self.max_length - self.tokenizer.num_special_tokens_to_add(pair=False)
+        if len(token_ids) <= budget:
+            return [token_ids]
         
-        # Limita o tamanho do texto para o modelo
-        max_length = 512
-        if len(text) > max_length:
-            text = text[:max_length]
+        if self.truncation == 'head':
+            return [token_ids[:budget]]
         
-        # Realiza a análise
-        result = self.sentiment_pipeline(text)[0]
+        if self.truncation == 'head_tail':
+            # Início e fim costumam concentrar a opinião (1/4 início, 3/4 fim)
+            head = budget // 4
+            return [token_ids[:head] + token_ids[len(token_ids) - (budget - head):]]
         
-        # Converte o resultado para o formato desejado
+        stride = self.window_stride or budget // 2
+        starts = list(range(0, len(token_ids) - budget, stride)) + [len(token_ids) - budget]
+        if len(starts) > self.max_windows:
+            # Limita o custo por texto mantendo janelas espalhadas pelo texto todo
+            starts = [starts[i] for i in np.linspace(0, len(starts) - 1, self.max_windows).round().astype(int)]
+        return [token_ids[start:start + budget] for start in starts]
+    
+    @staticmethod
+    def _pad_batch(sequences: List[List[int]], pad_token_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Monta input_ids e attention_mask de um lote, com padding até a maior sequência"""
+        input_ids = np.full((len(sequences), max(len(ids) for ids in sequences)), pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros_like(input_ids)
+        for i, ids in enumerate(sequences):
+            input_ids[i, :len(ids)] = ids
+            attention_mask[i, :len(ids)] = 1
+        return input_ids, attention_mask
+    
+    def _format_result(self, label: str, score: float) -> Dict[str, Any]:
+        """Converte a saída do modelo para o formato desejado"""
         sentiment_map = {
             'POSITIVE': 'POSITIVE',
             'NEGATIVE': 'NEGATIVE',
@@ -66,8 +301,8 @@ class SentimentAnalyzer:
         }
         
         return {
-            'sentiment': sentiment_map.get(result['label'], 'NEUTRAL'),
-            'score': result['score']
+            'sentiment': sentiment_map.get(label, 'NEUTRAL'),
+            'score': score
         }
     
     def analyze_review(self, review: Dict[str, Any]) -> Dict[str, Any]:
@@ -99,6 +334,36 @@ class SentimentAnalyzer:
             'sentiment_score': final_sentiment['score']
         }
     
+    def analyze_reviews(self, reviews: List[Dict[str, Any]], batch_size: int = 32) -> List[Dict[str, Any]]:
+        """
+        Analisa o sentimento de várias avaliações em lotes
+        
+        Args:
+            reviews: Lista de dicionários com os dados das avaliações
+            batch_size: Número de textos por forward pass
+            
+        Returns:
+            Lista de avaliações com sentiment e sentiment_score, na ordem de entrada
+        """
+        sentiment_results = self.analyze_texts(
+            [review.get('text') or '' for review in reviews],
+            batch_size=batch_size
+        )
+        
+        analyzed = []
+        for review, sentiment_result in zip(reviews, sentiment_results):
+            final_sentiment = self._combine_sentiment_and_rating(
+                sentiment_result['sentiment'],
+                sentiment_result['score'],
+                review.get('rating', 0)
+            )
+            analyzed.append({
+                **review,
+                'sentiment': final_sentiment['sentiment'],
+                'sentiment_score': final_sentiment['score']
+            })
+        return analyzed
+    
     def _combine_sentiment_and_rating(
         self,
         sentiment: str,
@@ -0,0 +1,140 @@
+import numpy as np
+import os
+from typing import Dict
+
+# torch é importado dentro das funções: importar este módulo não carrega o
+# PyTorch, só criar um backend
+
+
+class TorchBackend:
+    """Execução eager do modelo PyTorch em precisão total"""
+
+    name = 'torch'
+
+    def __init__(self, model: "torch.nn.Module", export_dir: str = None):
+        self.model = model.eval()
+
+    def __call__(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """
+        Executa o modelo em um lote
+
+        Args:
+            input_ids: Array (B, L) com os tokens
+            attention_mask: Array (B, L) com 1 nos tokens reais e 0 no padding
+
+        Returns:
+            Array (B, n_labels) com os logits
+        """
+        import torch
+
+        with torch.inference_mode():
+            return self.model(
+                input_ids=torch.from_numpy(input_ids),
+                attention_mask=torch.from_numpy(attention_mask)
+            ).logits.float().numpy()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """
+    Quantização dinâmica int8 das camadas lineares (pesos int8, ativações quantizadas em tempo de execução)
+
+    A quantização é feita no próprio modelo (inplace): os pesos fp32 das
+    camadas lineares são liberados em vez de ficarem ao lado da cópia int8.
+    """
+
+    name = 'quantized'
+
+    def __init__(self, model: "torch.nn.Module", export_dir: str = None):
+        import torch
+
+        super().__init__(torch.quantization.quantize_dynamic(
+            model.eval(), {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        ))
+
+
+class OnnxBackend:
+    """
+    Sessão do ONNX Runtime em CPU, exportada a partir do modelo PyTorch local
+
+    O modelo PyTorch só é usado no export e não é guardado: depois de criada a
+    sessão, ele pode ser liberado.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model: "torch.nn.Module", export_dir: str):
+        import onnxruntime
+
+        onnx_path = os.path.join(export_dir, 'model.onnx')
+        if not os.path.exists(onnx_path):
+            export_onnx(model, onnx_path)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+
+    def __call__(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return self.session.run(['logits'], {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask
+        })[0]
+
+
+def export_onnx(model: "torch.nn.Module", onnx_path: str, opset_version: int = 14):
+    """
+    Exporta o classificador para ONNX com eixos de lote e sequência dinâmicos
+
+    A exportação usa apenas o modelo já carregado, então funciona offline.
+    O arquivo é escrito com outro nome e renomeado no final, para que outros
+    processos nunca abram um export incompleto.
+
+    Args:
+        model: Modelo PyTorch (ex.: BertForSequenceClassification)
+        onnx_path: Caminho do arquivo .onnx
+        opset_version: Versão do opset ONNX
+    """
+    import torch
+
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+    dummy = torch.ones((1, 8), dtype=torch.long)
+    tmp_path = f"{onnx_path}.{os.getpid()}.tmp"
+    model = model.eval()
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (dummy, dummy),
+            tmp_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=opset_version
+        )
+    os.replace(tmp_path, onnx_path)
+
+
+BACKENDS: Dict[str, type] = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend
+}
+
+
+def load_backend(name: str, model: "torch.nn.Module", export_dir: str):
+    """
+    Cria o backend de inferência escolhido
+
+    Args:
+        name: 'torch', 'quantized' ou 'onnx'
+        model: Modelo PyTorch carregado
+        export_dir: Diretório para artefatos derivados (ex.: model.onnx)
+
+    Returns:
+        Objeto chamável (input_ids, attention_mask) -> logits; o backend
+        'quantized' altera o modelo recebido
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de sentimento desconhecido: {name} (opções: {sorted(BACKENDS)})")
+    return BACKENDS[name](model, export_dir)
@@ -0,0 +1,282 @@
+"""
+Preenche sentiment e sentiment_score das avaliações já gravadas
+
+As avaliações sem sentimento são lidas em blocos ordenados por id (paginação
+por chave, sem OFFSET), pontuadas em lotes pelo SentimentAnalyzer, em um ou
+mais processos, e gravadas com um UPDATE em lote por bloco. Depois de cada
+bloco confirmado o checkpoint guarda o último id, então uma execução
+interrompida continua de onde parou. Ao final, daily_sentiment é recalculada a
+partir do dia mais antigo alterado.
+
+Uso:
+    python -m src.ml.sentiment_backfill
+    python -m src.ml.sentiment_backfill --workers 4 --chunk-size 2000
+    python -m src.ml.sentiment_backfill --rescore --restart
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import Float, Integer, String, bindparam, column, func, select, true, update, values
+from sqlalchemy.engine import Connection, Engine
+
+from src.database.models import Review
+from src.database.rollups import refresh_rollup
+from src.ml.inference_service import _analyze_in_worker, _init_worker
+from src.ml.sentiment_analyzer import SentimentAnalyzer
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_BATCH_SIZE = 32
+CHECKPOINT_FILE = "sentiment_backfill.json"
+
+reviews = Review.__table__
+
+
+class BackfillResult(NamedTuple):
+    scored: int
+    last_id: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.scored / self.seconds if self.seconds > 0 else 0.0
+
+
+def default_checkpoint_path() -> str:
+    """Checkpoint ao lado dos artefatos dos modelos (MODEL_PATH)"""
+    return os.path.join(os.getenv("MODEL_PATH", "./models"), CHECKPOINT_FILE)
+
+
+def read_checkpoint(path: str) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_checkpoint(path: str, state: Dict[str, Any]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _pending(rescore: bool):
+    """Filtro das avaliações a pontuar"""
+    return true() if rescore else reviews.c.sentiment_score.is_(None)
+
+
+def _read_chunks(engine: Engine, after_id: int, chunk_size: int, rescore: bool, limit: Optional[int]):
+    """Blocos de avaliações com id maior que after_id, em ordem de id"""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(reviews.c.id, reviews.c.text, reviews.c.rating, reviews.c.created_at)
+                .where(reviews.c.id > after_id, _pending(rescore))
+                .order_by(reviews.c.id)
+                .limit(size)
+            ).all()
+        if not rows:
+            return
+        after_id = rows[-1].id
+        if remaining is not None:
+            remaining -= len(rows)
+        yield rows
+
+
+def sentiment_update(rows: List[Dict[str, Any]]):
+    """
+    UPDATE ... FROM (VALUES ...) que grava o sentimento de várias avaliações
+
+    Usado no PostgreSQL; o SQLite não aceita VALUES com nomes de colunas no FROM.
+    """
+    data = values(
+        column("id", Integer), column("sentiment", String), column("sentiment_score", Float), name="scored"
+    ).data([(row["id"], row["sentiment"], row["sentiment_score"]) for row in rows])
+    return update(reviews).where(reviews.c.id == data.c.id).values(
+        sentiment=data.c.sentiment,
+        sentiment_score=data.c.sentiment_score
+    )
+
+
+def write_sentiments(connection: Connection, rows: List[Dict[str, Any]]):
+    """
+    Grava sentiment e sentiment_score de um bloco de avaliações em um único comando
+
+    Args:
+        connection: Conexão dentro de uma transação
+        rows: Dicionários com id, sentiment e sentiment_score
+    """
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql":
+        connection.execute(sentiment_update(rows))
+        return
+    connection.execute(
+        update(reviews).where(reviews.c.id == bindparam("review_id")).values(
+            sentiment=bindparam("new_sentiment"),
+            sentiment_score=bindparam("new_score")
+        ),
+        [
+            {"review_id": row["id"], "new_sentiment": row["sentiment"], "new_score": row["sentiment_score"]}
+            for row in rows
+        ]
+    )
+
+
+def _format_eta(seconds: float) -> str:
+    return str(timedelta(seconds=int(seconds)))
+
+
+def backfill(
+    engine: Optional[Engine] = None,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_path: Optional[str] = None,
+    rescore: bool = False,
+    restart: bool = False,
+    limit: Optional[int] = None,
+    analyzer_kwargs: Optional[Dict[str, Any]] = None,
+    verbose: bool = False
+) -> BackfillResult:
+    """
+    Pontua as avaliações sem sentimento e grava o resultado no banco
+
+    Com workers > 1 cada processo carrega o seu modelo e até 2 blocos por
+    processo ficam em andamento enquanto o processo principal lê os próximos
+    e grava os já pontuados, sempre na ordem dos ids (o checkpoint só avança
+    sobre blocos confirmados).
+
+    Args:
+        engine: Banco de destino (padrão: engine de src.database.config)
+        workers: Processos de inferência (1 = no próprio processo)
+        chunk_size: Avaliações por bloco lido, pontuado e gravado
+        batch_size: Textos por forward pass
+        checkpoint_path: Arquivo do checkpoint (padrão: MODEL_PATH/sentiment_backfill.json)
+        rescore: Pontua de novo todas as avaliações, não só as sem sentimento
+        restart: Ignora o checkpoint existente
+        limit: Máximo de avaliações nesta execução
+        analyzer_kwargs: Argumentos do SentimentAnalyzer
+        verbose: Mostra progresso, taxa e tempo restante a cada bloco
+
+    Returns:
+        Avaliações pontuadas, último id confirmado e duração
+    """
+    if engine is None:
+        from src.database.config import engine
+
+    analyzer_kwargs = analyzer_kwargs or {}
+    checkpoint_path = checkpoint_path or default_checkpoint_path()
+    analyzer = SentimentAnalyzer(**analyzer_kwargs)
+    model_version = analyzer.model_version
+
+    state = {} if restart else read_checkpoint(checkpoint_path)
+    # Checkpoint de outro modelo ou de outro modo não vale para esta execução
+    if state.get("model_version") != model_version or state.get("rescore") != rescore:
+        state = {}
+    last_id = state.get("last_id", 0)
+
+    with engine.connect() as connection:
+        total = connection.execute(
+            select(func.count()).select_from(reviews).where(reviews.c.id > last_id, _pending(rescore))
+        ).scalar()
+    if limit is not None:
+        total = min(total, limit)
+    if verbose:
+        print(f"{total:,} avaliações a pontuar (a partir do id {last_id})")
+
+    # Com um worker o analisador roda aqui mesmo; com mais, um modelo por processo
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(analyzer_kwargs,))
+
+    def submit(chunk):
+        if executor is not None:
+            return executor.submit(_analyze_in_worker, chunk, batch_size)
+        return analyzer.analyze_reviews(chunk, batch_size=batch_size)
+
+    scored = 0
+    first_day = None
+    start = time.perf_counter()
+    in_flight = deque()
+
+    def commit_oldest():
+        nonlocal scored, last_id, first_day
+        rows, pending = in_flight.popleft()
+        results = pending.result() if executor is not None else pending
+        with engine.begin() as connection:
+            write_sentiments(connection, results)
+        scored += len(results)
+        last_id = rows[-1].id
+        days = [row.created_at for row in rows if row.created_at is not None]
+        if days:
+            first_day = min(days + ([first_day] if first_day else []))
+        _write_checkpoint(checkpoint_path, {
+            "last_id": last_id,
+            "scored": state.get("scored", 0) + scored,
+            "model_version": model_version,
+            "rescore": rescore,
+            "updated_at": datetime.utcnow().isoformat(timespec="seconds")
+        })
+        if verbose:
+            elapsed = time.perf_counter() - start
+            rate = scored / elapsed if elapsed > 0 else 0.0
+            eta = _format_eta((total - scored) / rate) if rate > 0 else "?"
+            print(f"  {scored:,}/{total:,} avaliações ({rate:,.0f}/s, restante {eta})")
+
+    try:
+        for rows in _read_chunks(engine, last_id, chunk_size, rescore, limit):
+            chunk = [{"id": row.id, "text": row.text or "", "rating": row.rating} for row in rows]
+            in_flight.append((rows, submit(chunk)))
+            if executor is None or len(in_flight) >= workers * 2:
+                commit_oldest()
+        while in_flight:
+            commit_oldest()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if first_day is not None:
+        # As contagens por sentimento dos dias alterados mudaram
+        with engine.begin() as connection:
+            refresh_rollup(connection, "daily_sentiment", since=first_day.date())
+    return BackfillResult(scored, last_id, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=1, help="Processos de inferência")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Avaliações por bloco")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Textos por forward pass")
+    parser.add_argument("--checkpoint", default=None, help="Arquivo do checkpoint")
+    parser.add_argument("--rescore", action="store_true", help="Pontua de novo todas as avaliações")
+    parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint e começa do início")
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de avaliações nesta execução")
+    args = parser.parse_args()
+
+    result = backfill(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+        rescore=args.rescore,
+        restart=args.restart,
+        limit=args.limit,
+        verbose=True
+    )
+    print(f"{result.scored:,} avaliações pontuadas em {result.seconds:.1f} s "
+          f"({result.rows_per_second:,.0f}/s), último id {result.last_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+
+class SentimentCache:
+    def __init__(self, max_size: int = 10000, db_path: Optional[str] = None):
+        """
+        Cache de resultados de sentimento indexado pelo hash do texto normalizado
+
+        Tem um nível LRU em memória e, opcionalmente, um nível SQLite em disco
+        que sobrevive a reinicializações. Resultados lidos do disco são
+        promovidos para a memória.
+
+        Args:
+            max_size: Número máximo de entradas em memória
+            db_path: Arquivo SQLite do nível em disco (None desativa)
+        """
+        self.max_size = max_size
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment_cache "
+                "(key TEXT PRIMARY KEY, sentiment TEXT NOT NULL, score REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normaliza Unicode e espaços para que variações triviais coincidam
+
+        A caixa é mantida: o modelo padrão (cased) pode pontuar "Ótimo" e
+        "ótimo" de forma diferente.
+        """
+        return ' '.join(unicodedata.normalize('NFKC', text).split())
+
+    @classmethod
+    def make_key(cls, text: str, model_version: str) -> str:
+        """Chave do cache: hash do texto normalizado + versão do modelo"""
+        return hashlib.sha256(f"{model_version}\0{cls.normalize(text)}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Busca várias chaves, primeiro em memória e depois em disco
+
+        Args:
+            keys: Chaves a buscar
+
+        Returns:
+            Dicionário chave -> resultado apenas com as chaves encontradas
+        """
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+
+            if self._db is not None and missing:
+                disk = self._read_disk(missing)
+                self.disk_hits += len(disk)
+                for key, result in disk.items():
+                    self._store_memory(key, result)
+                found.update(disk)
+                missing = [key for key in missing if key not in disk]
+
+            self.misses += len(missing)
+        return found
+
+    def set_many(self, results: Dict[str, Dict[str, Any]]):
+        """Grava resultados nos dois níveis"""
+        with self._lock:
+            for key, result in results.items():
+                self._store_memory(key, result)
+            if self._db is not None and results:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO sentiment_cache (key, sentiment, score) VALUES (?, ?, ?)",
+                    [(key, result['sentiment'], result['score']) for key, result in results.items()]
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de acertos e falhas, para medir quanta inferência o cache evita"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / total if total else 0.0,
+                'memory_size': len(self._memory)
+            }
+
+    def clear(self):
+        """Esvazia os dois níveis e zera os contadores"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM sentiment_cache")
+                self._db.commit()
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def _store_memory(self, key: str, result: Dict[str, Any]):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        # Respeita o limite de parâmetros por consulta do SQLite
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._db.execute(
+                f"SELECT key, sentiment, score FROM sentiment_cache WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            for key, sentiment, score in rows:
+                found[key] = {'sentiment': sentiment, 'score': score}
+        return found
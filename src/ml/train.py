@@ -0,0 +1,121 @@
+"""
+Treina os modelos de recomendação a partir do banco de dados ou de um snapshot Parquet
+
+Uso:
+    python -m src.ml.train
+    python -m src.ml.train --snapshot data/snapshot
+"""
+import argparse
+from typing import Optional
+
+import pandas as pd
+
+from src.database.config import get_db
+from src.database.models import Product
+from src.ml.recommender import ProductRecommender
+from src.ml.collaborative import CollaborativeRecommender, build_interactions, load_interactions
+from src.ml.reranker import load_product_stats, product_features
+
+
+def load_products(db):
+    """Carrega os produtos usados pelo modelo de conteúdo"""
+    products = db.query(Product.id, Product.name, Product.category, Product.description).all()
+    return [
+        {
+            "id": p.id,
+            "name": p.name,
+            "category": p.category,
+            "description": p.description
+        }
+        for p in products
+    ]
+
+
+def load_snapshot_products(snapshot_dir: str):
+    """Carrega do snapshot Parquet apenas as colunas usadas pelo modelo de conteúdo"""
+    from src.database.snapshot import read_table
+
+    table = read_table(snapshot_dir, "products", columns=["id", "name", "category", "description"])
+    return table.sort_by("id").to_pylist()
+
+
+def load_snapshot_product_stats(snapshot_dir: str) -> pd.DataFrame:
+    """Estatísticas por produto do re-ranker (ver load_product_stats) a partir do snapshot Parquet"""
+    from src.database.snapshot import read_table
+
+    products = read_table(snapshot_dir, "products", columns=["id", "stock"]).to_pandas()
+    reviews = read_table(snapshot_dir, "reviews", columns=["product_id", "sentiment_score"]).to_pandas()
+    items = read_table(snapshot_dir, "purchase_items", columns=["product_id", "quantity"]).to_pandas()
+
+    review_stats = reviews.groupby("product_id").agg(
+        reviews=("product_id", "size"),
+        score_sum=("sentiment_score", "sum"),
+        scored=("sentiment_score", "count")
+    )
+    sales = items.groupby("product_id")["quantity"].sum()
+    stats = products.join(review_stats, on="id").join(sales, on="id")
+    return stats[["id", "stock", "reviews", "score_sum", "scored", "quantity"]]
+
+
+def load_snapshot_interactions(snapshot_dir: str) -> pd.DataFrame:
+    """
+    Monta as interações usuário x produto a partir do snapshot Parquet
+
+    Lê só as colunas necessárias de purchases, purchase_items e reviews e
+    aplica as mesmas regras de load_interactions.
+    """
+    from src.database.snapshot import read_table
+
+    purchases = read_table(snapshot_dir, "purchases", columns=["id", "user_id"]).to_pandas()
+    items = read_table(snapshot_dir, "purchase_items", columns=["purchase_id", "product_id", "quantity"]).to_pandas()
+    reviews = read_table(snapshot_dir, "reviews", columns=["user_id", "product_id", "rating"]).to_pandas()
+
+    purchased = items.merge(purchases, left_on="purchase_id", right_on="id")
+    purchased = purchased.groupby(["user_id", "product_id"], as_index=False)["quantity"].sum()
+    return build_interactions(purchased, reviews)
+
+
+def train(snapshot_dir: Optional[str] = None):
+    """
+    Treina os modelos de conteúdo e colaborativo
+
+    Args:
+        snapshot_dir: Diretório de um snapshot Parquet (src.database.snapshot);
+            None lê direto do banco
+    """
+    if snapshot_dir is not None:
+        products = load_snapshot_products(snapshot_dir)
+        print(f"Treinando modelo de conteúdo com {len(products)} produtos...")
+        ProductRecommender().fit(products, product_features(load_snapshot_product_stats(snapshot_dir)))
+        _fit_collaborative(load_snapshot_interactions(snapshot_dir))
+        print("Modelos treinados com sucesso!")
+        return
+
+    db = next(get_db())
+    try:
+        products = load_products(db)
+        print(f"Treinando modelo de conteúdo com {len(products)} produtos...")
+        ProductRecommender().fit(products, product_features(load_product_stats(db)))
+        _fit_collaborative(load_interactions(db))
+        print("Modelos treinados com sucesso!")
+    finally:
+        db.close()
+
+
+def _fit_collaborative(interactions: pd.DataFrame):
+    if interactions.empty:
+        print("Sem compras ou avaliações: modelo colaborativo não treinado")
+    else:
+        print(f"Treinando modelo colaborativo com {len(interactions)} interações...")
+        CollaborativeRecommender().fit(interactions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", default=None, help="Treina a partir de um snapshot Parquet em vez do banco")
+    args = parser.parse_args()
+    train(args.snapshot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import numpy as np
+import joblib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Versão do layout em disco dos artefatos dos modelos
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def top_n_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """
+    Retorna os índices dos n maiores scores no último eixo, em ordem decrescente
+
+    Usa np.argpartition para não ordenar o vetor inteiro: apenas os n
+    candidatos selecionados são ordenados.
+
+    Args:
+        scores: Vetor (N,) ou matriz (B, N) de scores
+        n: Número de índices desejados (deve ser menor ou igual a N)
+
+    Returns:
+        Array de índices com formato (n,) ou (B, n)
+    """
+    if n <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+    if n < scores.shape[-1]:
+        top = np.argpartition(-scores, n - 1, axis=-1)[..., :n]
+    else:
+        top = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape).copy()
+    top_scores = np.take_along_axis(scores, top, axis=-1)
+    order = np.argsort(-top_scores, axis=-1, kind='stable')
+    return np.take_along_axis(top, order, axis=-1)
+
+
+def build_id_index(ids: np.ndarray) -> np.ndarray:
+    """
+    Cria o mapeamento ID -> linha como um array denso indexado pelo ID
+
+    Os IDs vêm de chaves autoincrementais, então o array é compacto e o
+    lookup é O(1) e vetorizável, sem hashing. Posições sem ID valem -1.
+
+    Args:
+        ids: Array com os IDs na ordem das linhas do modelo
+
+    Returns:
+        Array int32 de tamanho max(ids) + 1
+    """
+    max_id = int(ids.max()) if len(ids) else -1
+    id_to_row = np.full(max_id + 1, -1, dtype=np.int32)
+    id_to_row[ids] = np.arange(len(ids), dtype=np.int32)
+    return id_to_row
+
+
+def lookup_rows(id_to_row: np.ndarray, ids) -> np.ndarray:
+    """
+    Converte IDs em linhas do modelo; IDs desconhecidos viram -1
+
+    Args:
+        id_to_row: Array criado por build_id_index
+        ids: Lista ou array de IDs
+
+    Returns:
+        Array int32 com as linhas
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    valid = (ids >= 0) & (ids < len(id_to_row))
+    rows = np.full(len(ids), -1, dtype=np.int32)
+    rows[valid] = id_to_row[ids[valid]]
+    return rows
+
+
+def read_latest_version(base_path: str) -> Optional[str]:
+    """Retorna a versão publicada em base_path/LATEST (ou None)"""
+    try:
+        with open(os.path.join(base_path, 'LATEST')) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def save_artifact(
+    base_path: str,
+    arrays: Dict[str, Optional[np.ndarray]],
+    metadata: Dict[str, Any],
+    objects: Optional[Dict[str, Any]] = None,
+    keep_versions: int = 3
+) -> str:
+    """
+    Salva uma nova versão de um artefato de modelo
+
+    Layout em disco:
+        <base_path>/LATEST                  nome da versão atual
+        <base_path>/<versão>/metadata.json  versão do formato e metadados
+        <base_path>/<versão>/<nome>.npy     um arquivo por array
+        <base_path>/<versão>/<nome>.joblib  objetos Python (ex.: vectorizer)
+
+    A versão é escrita em um diretório temporário e só então publicada via
+    LATEST, então leitores nunca veem um artefato incompleto.
+
+    Args:
+        base_path: Diretório do artefato
+        arrays: Arrays a salvar (valores None são ignorados)
+        metadata: Metadados do modelo
+        objects: Objetos serializados com joblib
+        keep_versions: Número de versões mantidas em disco
+
+    Returns:
+        Nome da versão criada
+    """
+    os.makedirs(base_path, exist_ok=True)
+    # Prefixo com microssegundos: a ordem lexicográfica é a cronológica
+    version = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+    tmp_dir = os.path.join(base_path, f".tmp-{version}")
+    os.makedirs(tmp_dir)
+
+    saved_arrays = {name: array for name, array in arrays.items() if array is not None}
+    for name, array in saved_arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+    for name, obj in (objects or {}).items():
+        joblib.dump(obj, os.path.join(tmp_dir, f"{name}.joblib"))
+
+    metadata = {
+        **metadata,
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'version': version,
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'arrays': sorted(saved_arrays)
+    }
+    with open(os.path.join(tmp_dir, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    os.rename(tmp_dir, os.path.join(base_path, version))
+    latest_tmp = os.path.join(base_path, f".LATEST-{version}")
+    with open(latest_tmp, 'w') as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(base_path, 'LATEST'))
+
+    _prune_versions(base_path, keep_versions, current=version)
+    return version
+
+
+def _prune_versions(base_path: str, keep_versions: int, current: str):
+    """Remove versões antigas, mantendo as keep_versions mais recentes"""
+    versions = sorted(
+        name for name in os.listdir(base_path)
+        if not name.startswith('.') and name != 'LATEST'
+    )
+    for name in versions[:-keep_versions]:
+        if name == current:
+            continue
+        # Processos com a versão antiga mapeada continuam lendo normalmente
+        shutil.rmtree(os.path.join(base_path, name), ignore_errors=True)
+
+
+def load_artifact(
+    base_path: str,
+    version: Optional[str] = None,
+    mmap_mode: Optional[str] = None,
+    names: Optional[List[str]] = None
+) -> Tuple[str, Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Carrega uma versão de um artefato de modelo
+
+    Args:
+        base_path: Diretório do artefato
+        version: Versão a carregar (padrão: a apontada por LATEST)
+        mmap_mode: Modo de np.load ('r' compartilha o page cache entre processos)
+        names: Arrays a carregar (padrão: todos); nomes ausentes são ignorados
+
+    Returns:
+        Tupla (versão, metadados, arrays)
+    """
+    version = version or read_latest_version(base_path)
+    if version is None:
+        raise FileNotFoundError(f"Nenhum artefato encontrado em {base_path}")
+
+    version_path = os.path.join(base_path, version)
+    with open(os.path.join(version_path, 'metadata.json')) as f:
+        metadata = json.load(f)
+    if metadata['format_version'] != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Formato de artefato {metadata['format_version']} não suportado "
+            f"(esperado {ARTIFACT_FORMAT_VERSION})"
+        )
+
+    arrays = {
+        name: np.load(os.path.join(version_path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in metadata['arrays']
+        if names is None or name in names
+    }
+    return version, metadata, arrays
+
+
+def load_artifact_object(base_path: str, version: str, name: str) -> Any:
+    """Carrega um objeto joblib de uma versão do artefato"""
+    return joblib.load(os.path.join(base_path, version, f"{name}.joblib"))
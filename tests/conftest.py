@@ -0,0 +1,45 @@
+import os
+import pytest
+from benchmarks.tiny_model import build_tiny_model
+
+# Os testes não dependem de um PostgreSQL: src.database.config só precisa de
+# uma URL válida para ser importado, e os testes da API usam um SQLite próprio
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+@pytest.fixture(scope="session")
+def tiny_model_dir(tmp_path_factory):
+    """Modelo BERT minúsculo salvo localmente, para testes sem download"""
+    return build_tiny_model(str(tmp_path_factory.mktemp("tiny-bert")))
+
+@pytest.fixture
+def synthetic_engine(tmp_path):
+    """
+    Cria bancos SQLite temporários com o schema atual e dados sintéticos
+
+    Retorna make(before_load=None, **dataset_kwargs): before_load(engine) roda
+    depois de criar as tabelas e antes de carregar os dados; dataset_kwargs vão
+    para SyntheticDataset (end padrão: 30/06/2024). Os engines são descartados
+    no fim do teste.
+    """
+    from datetime import datetime
+    from sqlalchemy import create_engine
+    from src.database.bulk_load import load_frames
+    from src.database.config import Base
+    from src.database.synthetic_data import SyntheticDataset
+
+    engines = []
+
+    def make(before_load=None, **dataset_kwargs):
+        engine = create_engine(f"sqlite:///{tmp_path / f'synthetic-{len(engines)}.db'}")
+        engines.append(engine)
+        Base.metadata.create_all(engine)
+        if before_load is not None:
+            before_load(engine)
+        dataset = SyntheticDataset(**{"end": datetime(2024, 6, 30), **dataset_kwargs})
+        for table, chunks in dataset.tables():
+            load_frames(engine, table, chunks)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
@@ -0,0 +1,258 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from src.api import main
+from src.api.cache import ResponseCache
+from src.api.model_registry import ModelRegistry
+from src.api.products import ProductHydrator
+from src.database import models
+from src.database.config import Base, get_async_db
+from src.ml.inference_service import SentimentInferenceService
+from src.ml.recommender import ProductRecommender
+
+CATEGORIES = ["Eletrônicos", "Acessórios", "Livros"]
+
+@pytest.fixture
+def products():
+    return [
+        {
+            "id": i,
+            "name": f"Produto {i}",
+            "category": CATEGORIES[i % 3],
+            "price": 10.0 * i,
+            "description": f"{CATEGORIES[i % 3]} modelo {i % 5} com garantia"
+        }
+        for i in range(1, 31)
+    ]
+
+@pytest.fixture
+def database_url(tmp_path, products):
+    """Banco SQLite com o schema da aplicação e um catálogo pequeno"""
+    path = tmp_path / "api.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.Product), products)
+    engine.dispose()
+    return f"sqlite+aiosqlite:///{path}"
+
+@pytest.fixture
+def async_engine(database_url):
+    return create_async_engine(database_url)
+
+@pytest.fixture
+def queries(async_engine):
+    """Comandos SQL executados pela API durante o teste"""
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+@pytest.fixture
+def client(tiny_model_dir, tmp_path, monkeypatch, async_engine, products):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    ProductRecommender(top_k=10).fit(products)
+    monkeypatch.setattr(main, "registry", ModelRegistry(lambda: ProductRecommender(mmap_mode='r'), poll_interval=0))
+    monkeypatch.setattr(main, "product_hydrator", ProductHydrator())
+    monkeypatch.setattr(main, "response_cache", ResponseCache(max_size=100, ttl=60, db_path=""))
+    monkeypatch.setattr(main, "sentiment_service", SentimentInferenceService(
+        analyzer_kwargs={"model_name": tiny_model_dir},
+        batch_window_ms=5
+    ))
+
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def get_test_db():
+        async with session_factory() as db:
+            yield db
+
+    main.app.dependency_overrides[get_async_db] = get_test_db
+    with TestClient(main.app) as client:
+        yield client
+    main.app.dependency_overrides.clear()
+
+def _all_pages(client, **params):
+    """Percorre /products/ seguindo next_cursor"""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get("/products/", params={**params, **({"after_id": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append(response.json()["items"])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return pages
+
+def test_get_products_keyset_pagination(client, products):
+    pages = _all_pages(client, limit=7)
+
+    assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+    assert [p["id"] for page in pages for p in page] == [p["id"] for p in products]
+    assert pages[0][0] == {key: products[0][key] for key in ("id", "name", "category", "price", "description")}
+
+def test_get_products_by_category_with_fields(client, products):
+    pages = _all_pages(client, limit=4, category="Livros", fields="name,price")
+    items = [p for page in pages for p in page]
+
+    assert [p["id"] for p in items] == [p["id"] for p in products if p["category"] == "Livros"]
+    assert all(set(p) == {"id", "name", "price"} for p in items)
+
+def test_get_products_unknown_field(client):
+    response = client.get("/products/", params={"fields": "name,password"})
+
+    assert response.status_code == 400
+
+def test_get_recommendations_returns_products_in_rank_order(client):
+    expected = main.registry.current.recommend_products(1, 4)
+    response = client.get("/products/1/recommendations", params={"limit": 4})
+
+    assert response.status_code == 200
+    assert [p["id"] for p in response.json()] == expected
+    assert all(p["category"] == "Acessórios" for p in response.json())
+
+def test_recommendations_use_one_query_then_cache(client, queries):
+    first = client.get("/products/2/recommendations", params={"limit": 5}).json()
+    assert len(queries) == 1
+
+    # Produtos já vistos vêm do cache de produtos
+    second = client.get("/products/2/recommendations", params={"limit": 3}).json()
+    assert len(queries) == 1
+    assert second == first[:3]
+
+@pytest.fixture
+def recommend_calls(client, monkeypatch):
+    """Conta as chamadas ao recomendador feitas pela API"""
+    calls = []
+    original = main.registry.current.recommend_products
+    monkeypatch.setattr(main.registry.current, "recommend_products", lambda *args: calls.append(args) or original(*args))
+    return calls
+
+def test_recommendations_response_cache_and_etag(client, recommend_calls):
+    first = client.get("/products/3/recommendations", params={"limit": 4})
+    second = client.get("/products/3/recommendations", params={"limit": 4})
+
+    assert len(recommend_calls) == 1
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+    assert "max-age" in first.headers["cache-control"]
+
+    not_modified = client.get(
+        "/products/3/recommendations", params={"limit": 4}, headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+def test_cached_ranking_serves_current_product_data(client, recommend_calls, async_engine):
+    first = client.get("/products/3/recommendations", params={"limit": 4})
+    changed_id = first.json()[0]["id"]
+
+    with create_engine(async_engine.url.set(drivername="sqlite")).begin() as connection:
+        connection.execute(update(models.Product).where(models.Product.id == changed_id).values(price=1.5))
+    # Expiração do cache de produtos (PRODUCT_CACHE_TTL)
+    main.product_hydrator.cache.clear()
+    second = client.get(
+        "/products/3/recommendations", params={"limit": 4}, headers={"If-None-Match": first.headers["etag"]}
+    )
+
+    # O ranking veio do cache, mas o preço é o atual e o ETag antigo não vale mais
+    assert len(recommend_calls) == 1
+    assert second.status_code == 200
+    assert second.json()[0]["price"] == 1.5
+    assert second.headers["etag"] != first.headers["etag"]
+
+def test_response_cache_invalidated_by_new_model_version(client, recommend_calls):
+    client.get("/products/3/recommendations", params={"limit": 4})
+    version = main.registry.current.model_version
+
+    # Alteração do catálogo salva um novo artefato e muda a versão do modelo
+    main.registry.current.add_products([
+        {"id": 31, "name": "Produto 31", "category": "Livros", "description": "Livros modelo 1 com garantia"}
+    ])
+    client.get("/products/3/recommendations", params={"limit": 4})
+
+    assert main.registry.current.model_version != version
+    assert len(recommend_calls) == 2
+    assert main.response_cache.model_version == main.registry.current.model_version
+
+def test_response_cache_hits_survive_alternating_routes(client, recommend_calls, monkeypatch):
+    user_calls = []
+    original = main.registry.current.recommend_for_user
+    monkeypatch.setattr(
+        main.registry.current, "recommend_for_user", lambda *args: user_calls.append(args) or original(*args)
+    )
+
+    for _ in range(3):
+        assert client.get("/products/3/recommendations", params={"limit": 4}).status_code == 200
+        assert client.get("/users/1/recommendations", params={"limit": 3}).status_code == 200
+
+    assert len(recommend_calls) == 1 and len(user_calls) == 1
+    assert main.response_cache.stats()["hits"] == 4
+
+def test_batch_recommendations_returns_products(client, queries):
+    response = client.post("/products/recommendations/batch", json={"product_ids": [1, 2, 1], "limit": 3})
+
+    assert response.status_code == 200
+    expected = main.registry.current.recommend_products_batch([1, 2, 1], 3).tolist()
+    body = response.json()
+    assert [item["product_id"] for item in body] == [1, 2, 1]
+    assert [[p["id"] for p in item["recommendations"]] for item in body] == expected
+    assert body[0]["recommendations"][0]["name"] == f"Produto {expected[0][0]}"
+    assert len(queries) == 1
+
+@pytest.mark.parametrize("payload", [
+    {"product_ids": [], "limit": 3},
+    {"product_ids": list(range(1, main.MAX_BATCH_PRODUCTS + 2)), "limit": 3},
+    {"product_ids": [1, 2], "limit": 0},
+    {"product_ids": [1, 2], "limit": -1},
+    {"product_ids": [1, 2], "limit": 101}
+])
+def test_batch_recommendations_reject_invalid_payload(client, payload):
+    assert client.post("/products/recommendations/batch", json=payload).status_code == 422
+
+def test_get_recommendations_unknown_product(client):
+    assert client.get("/products/999/recommendations").status_code == 404
+
+@pytest.mark.parametrize("path", ["/products/1/recommendations", "/users/1/recommendations"])
+@pytest.mark.parametrize("limit", [0, -3, 101])
+def test_recommendations_reject_invalid_limit(client, path, limit):
+    assert client.get(path, params={"limit": limit}).status_code == 422
+
+def test_get_user_recommendations(client):
+    response = client.get("/users/1/recommendations", params={"limit": 3})
+
+    # Sem modelo colaborativo treinado: usa os primeiros produtos do catálogo
+    assert response.status_code == 200
+    assert [p["id"] for p in response.json()] == [1, 2, 3]
+
+def test_admin_reload_swaps_model(client, products, monkeypatch):
+    assert client.get("/products/31/recommendations").status_code == 404
+    old_model = main.registry.current
+
+    # Treino em outro processo publica uma nova versão
+    ProductRecommender(top_k=10).fit(products + [
+        {"id": 31, "name": "Produto 31", "category": "Livros", "description": "Livros modelo 1 com garantia"}
+    ])
+    monkeypatch.setenv("ADMIN_TOKEN", "segredo")
+    assert client.post("/admin/models/reload").status_code == 403
+
+    response = client.post("/admin/models/reload", headers={"X-Admin-Token": "segredo"})
+    assert response.status_code == 200
+    assert response.json()["reloaded"] is True
+    assert response.json()["recommender"] != old_model.model_version
+    assert client.get("/products/31/recommendations").status_code == 200
+    # Quem já tinha a referência antiga continua funcionando
+    assert old_model.recommend_products(1, 2)
+
+    again = client.post("/admin/models/reload", headers={"X-Admin-Token": "segredo"})
+    assert again.json()["reloaded"] is False
+
+def test_create_review_runs_sentiment(client):
+    review = {"id": 1, "user_id": 1, "product_id": 1, "rating": 5, "text": "produto excelente, recomendo"}
+    response = client.post("/reviews/", json=review)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == 1
+    assert body["sentiment"] in ("POSITIVE", "NEUTRAL", "NEGATIVE")
+    assert 0.0 <= body["sentiment_score"] <= 1.0
+    assert main.sentiment_service.stats()["items"] == 1
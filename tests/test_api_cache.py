@@ -0,0 +1,56 @@
+from src.api.cache import ResponseCache, TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=30, clock=clock)
+    cache.set_many({1: "a", 2: "b"})
+
+    clock.now = 29
+    assert cache.get_many([1, 2, 3]) == {1: "a", 2: "b"}
+
+    clock.now = 31
+    assert cache.get(1) is None
+    assert cache.stats()["size"] == 1  # entrada expirada removida na leitura
+    assert cache.stats()["hits"] == 2
+
+def test_lru_eviction():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set_many({1: "a", 2: "b"})
+    cache.get(1)
+    cache.set(3, "c")
+
+    assert cache.get_many([1, 2, 3]) == {1: "a", 3: "c"}
+
+def test_invalidate_and_disabled_cache():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set_many({1: "a", 2: "b"})
+    cache.invalidate([1])
+    assert cache.get_many([1, 2]) == {2: "b"}
+
+    disabled = TTLCache(max_size=10, ttl=0)
+    disabled.set(1, "a")
+    assert disabled.get(1) is None
+
+def test_response_cache_disk_tier_and_version_sync(tmp_path):
+    db_path = str(tmp_path / "responses.db")
+    writer = ResponseCache(max_size=10, ttl=60, db_path=db_path)
+    writer.sync_model_version("v1")
+    key = ResponseCache.make_key("product_recommendations", 1, 5, "v1")
+    entry = writer.set(key, b"[1,2,3]")
+
+    # Outro worker lê a mesma resposta do disco
+    reader = ResponseCache(max_size=10, ttl=60, db_path=db_path)
+    assert reader.get(key) == entry
+    assert reader.stats()["disk_hits"] == 1
+
+    # Nova versão do modelo descarta as respostas antigas
+    reader.sync_model_version("v2")
+    assert reader.get(key) is None
+    assert ResponseCache(max_size=10, ttl=60, db_path=db_path).get(key) is None
@@ -0,0 +1,92 @@
+from datetime import datetime
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func, select
+from src.database import init_db, models
+from src.database.bulk_load import load_directory, load_frames
+from src.database.config import Base
+from src.database.synthetic_data import SyntheticDataset, write_dataset
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def dataset():
+    return SyntheticDataset(
+        n_users=200, n_products=50, n_purchase_items=1000, n_reviews=300,
+        end=datetime(2024, 6, 30), chunk_size=128, seed=1
+    )
+
+def count(engine, model):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(model)).scalar()
+
+def test_synthetic_dataset_is_consistent(dataset):
+    purchases = pd.concat(dataset.generate("purchases"))
+    items = pd.concat(dataset.generate("purchase_items"))
+
+    assert len(items) == 1000
+    assert purchases["id"].tolist() == list(range(1, dataset.n_purchases + 1))
+    # Toda compra tem itens, e o total é a soma deles
+    totals = items.groupby("purchase_id")["price"].sum()
+    assert totals.index.tolist() == purchases["id"].tolist()
+    assert totals.values == pytest.approx(purchases["total_amount"].values)
+    assert items["product_id"].between(1, 50).all()
+    assert (items["created_at"] <= datetime(2024, 6, 30)).all()
+
+    # Mesma semente, mesmos dados
+    again = SyntheticDataset(
+        n_users=200, n_products=50, n_purchase_items=1000, n_reviews=300,
+        end=datetime(2024, 6, 30), chunk_size=128, seed=1
+    )
+    pd.testing.assert_frame_equal(pd.concat(again.generate("purchase_items")), items)
+
+def test_load_directory_from_csv(tmp_path, engine, dataset):
+    write_dataset(dataset, str(tmp_path / "data"))
+    stats = load_directory(engine, str(tmp_path / "data"), batch_size=100, commit_every=250)
+
+    assert [s.table for s in stats] == ["users", "products", "purchases", "purchase_items", "reviews"]
+    assert count(engine, models.User) == 200
+    assert count(engine, models.PurchaseItem) == 1000
+    assert count(engine, models.Review) == 300
+    with engine.connect() as connection:
+        created_at = connection.execute(select(func.max(models.Purchase.created_at))).scalar()
+    assert isinstance(created_at, datetime)
+
+def test_parquet_input_and_null_sentiment(tmp_path, engine):
+    pytest.importorskip("pyarrow")
+    dataset = SyntheticDataset(n_users=20, n_products=10, n_purchase_items=50, n_reviews=40, label_sentiment=False)
+    write_dataset(dataset, str(tmp_path / "data"), file_format="parquet")
+    load_directory(engine, str(tmp_path / "data"))
+
+    with engine.connect() as connection:
+        labelled = connection.execute(
+            select(func.count()).select_from(models.Review).where(models.Review.sentiment.isnot(None))
+        ).scalar()
+    assert count(engine, models.Review) == 40
+    assert labelled == 0
+
+def test_unknown_column_is_rejected(engine):
+    frame = pd.DataFrame({"id": [1], "name": ["Ana"], "email": ["ana@exemplo.com"], "idade": [30]})
+    with pytest.raises(ValueError, match="idade"):
+        load_frames(engine, "users", [frame])
+    assert count(engine, models.User) == 0
+
+def test_seed_db_inserts_in_bulk(monkeypatch, engine):
+    monkeypatch.setattr(init_db, "engine", engine)
+    init_db.seed_db()
+
+    assert count(engine, models.User) == 3
+    assert count(engine, models.Review) == 9
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(models.Purchase.total_amount, func.sum(models.PurchaseItem.price))
+            .join(models.PurchaseItem, models.PurchaseItem.purchase_id == models.Purchase.id)
+            .group_by(models.Purchase.id)
+        ).all()
+    assert len(rows) == 3
+    assert all(total == pytest.approx(items_total) for total, items_total in rows)
@@ -0,0 +1,104 @@
+import pytest
+from src.ml.collaborative import CollaborativeRecommender, build_interactions
+from src.ml.recommender import ProductRecommender
+import pandas as pd
+import numpy as np
+
+@pytest.fixture
+def interactions():
+    # Dois grupos de usuários com gostos distintos: 1-10 compram os produtos
+    # 101-105 e 11-20 compram os produtos 201-205. Cada usuário deixa de
+    # comprar um produto do seu grupo.
+    rows = []
+    for user_id in range(1, 21):
+        group = [101, 102, 103, 104, 105] if user_id <= 10 else [201, 202, 203, 204, 205]
+        skipped = group[user_id % 5]
+        for product_id in group:
+            if product_id != skipped:
+                rows.append({"user_id": user_id, "product_id": product_id, "weight": 1.0})
+    return pd.DataFrame(rows)
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    return tmp_path
+
+def test_build_interactions():
+    purchases = pd.DataFrame([
+        {"user_id": 1, "product_id": 10, "quantity": 2},
+        {"user_id": 1, "product_id": 11, "quantity": 1}
+    ])
+    reviews = pd.DataFrame([
+        {"user_id": 1, "product_id": 10, "rating": 5},
+        {"user_id": 2, "product_id": 11, "rating": 1}
+    ])
+    result = build_interactions(purchases, reviews).set_index(["user_id", "product_id"])["weight"]
+
+    assert result[(1, 10)] == pytest.approx(3.0)
+    assert result[(1, 11)] == pytest.approx(1.0)
+    assert (2, 11) not in result.index  # Avaliação negativa não é preferência
+
+def test_recommend_unseen_items_from_same_group(interactions, model_path):
+    model = CollaborativeRecommender(n_factors=4, n_iterations=10)
+    model.fit(interactions)
+
+    for user_id in (1, 15):
+        seen = set(interactions[interactions["user_id"] == user_id]["product_id"])
+        group = 100 if user_id <= 10 else 200
+        recommendations = model.recommend(user_id, n_recommendations=1)
+
+        assert len(recommendations) == 1
+        assert recommendations[0] not in seen
+        assert recommendations[0] // 100 * 100 == group
+
+def test_recommend_fills_up_to_n(interactions, model_path):
+    model = CollaborativeRecommender(n_factors=4)
+    model.fit(interactions)
+
+    recommendations = model.recommend(1, n_recommendations=8)
+
+    assert len(recommendations) == 8
+    assert len(set(recommendations)) == 8
+    assert all(isinstance(rec_id, int) for rec_id in recommendations)
+
+def test_unknown_user_gets_popular_items(interactions, model_path):
+    model = CollaborativeRecommender(n_factors=4)
+    model.fit(interactions)
+
+    assert len(model.recommend(999, n_recommendations=3)) == 3
+
+def test_load_model_mmap(interactions, model_path):
+    trained = CollaborativeRecommender(n_factors=4)
+    trained.fit(interactions)
+
+    loaded = CollaborativeRecommender(mmap_mode='r')
+    loaded._load_model()
+
+    assert loaded.model_version == trained.model_version
+    assert isinstance(loaded.user_factors, np.memmap)
+    assert loaded.recommend(3, 3) == trained.recommend(3, 3)
+
+def test_product_recommender_uses_user_model(interactions, model_path):
+    CollaborativeRecommender(n_factors=4).fit(interactions)
+
+    recommender = ProductRecommender()
+    seen = set(interactions[interactions["user_id"] == 2]["product_id"])
+    recommendations = recommender.recommend_for_user(user_id=2, n_recommendations=1)
+
+    assert recommendations[0] not in seen
+
+def test_model_path_is_shared_with_product_recommender(interactions, model_path):
+    # Modelos diferentes em dois diretórios: cada recomendador usa só o seu
+    first, second = model_path / "first", model_path / "second"
+    CollaborativeRecommender(n_factors=4, model_path=str(first)).fit(interactions)
+    CollaborativeRecommender(n_factors=4, model_path=str(second)).fit(interactions[interactions["user_id"] <= 10])
+
+    loaded = {}
+    for path in (first, second):
+        recommender = ProductRecommender(model_path=str(path))
+        recommender.recommend_for_user(user_id=2, n_recommendations=1)
+        loaded[path] = recommender.user_model
+        assert recommender.user_model.model_path == str(path)
+
+    assert loaded[first].model_version != loaded[second].model_version
+    assert not (model_path / "collaborative").exists()
@@ -0,0 +1,88 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import func, select
+from src.database.migrations import MIGRATIONS, applied_versions, migrate
+from src.database.models import Purchase, PurchaseItem, Review
+
+INDEXED = [
+    "ix_products_category_id",
+    "ix_reviews_product_id_created_at",
+    "ix_reviews_user_id_created_at",
+    "ix_reviews_created_at",
+    "ix_purchases_user_id_created_at",
+    "ix_purchases_created_at",
+    "ix_purchase_items_purchase_id",
+    "ix_purchase_items_product_id"
+]
+
+# Consultas dos acessos analíticos -> índice esperado no plano
+QUERIES = {
+    "product_reviews": (
+        select(Review.id, Review.rating).where(Review.product_id == 7).order_by(Review.created_at.desc()).limit(20),
+        "ix_reviews_product_id_created_at"
+    ),
+    "user_reviews": (
+        select(Review.id).where(Review.user_id == 3).order_by(Review.created_at.desc()),
+        "ix_reviews_user_id_created_at"
+    ),
+    "user_purchases": (
+        select(Purchase.id, Purchase.total_amount).where(Purchase.user_id == 3).order_by(Purchase.created_at.desc()),
+        "ix_purchases_user_id_created_at"
+    ),
+    "daily_sentiment": (
+        select(func.date(Review.created_at), Review.sentiment, func.count())
+        .where(Review.created_at >= datetime(2024, 6, 1))
+        .group_by(func.date(Review.created_at), Review.sentiment),
+        "ix_reviews_created_at"
+    ),
+    "product_sales": (
+        select(func.sum(PurchaseItem.quantity)).where(PurchaseItem.product_id == 5),
+        "ix_purchase_items_product_id"
+    )
+}
+
+@pytest.fixture
+def legacy_engine(synthetic_engine):
+    """Banco populado com o schema anterior aos índices (como um banco já em produção)"""
+    def drop_indexes(engine):
+        with engine.begin() as connection:
+            for name in INDEXED:
+                connection.exec_driver_sql(f"DROP INDEX {name}")
+
+    return synthetic_engine(drop_indexes, n_users=500, n_products=200, n_purchase_items=5000, n_reviews=3000)
+
+def query_plan(engine, query):
+    sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        return " | ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+def test_migration_indexes_analytics_queries(legacy_engine):
+    for query, _ in QUERIES.values():
+        assert "SCAN" in query_plan(legacy_engine, query)
+
+    assert migrate(legacy_engine) == [m.version for m in MIGRATIONS]
+
+    for name, (query, index) in QUERIES.items():
+        plan = query_plan(legacy_engine, query)
+        assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, name
+        assert "SCAN" not in plan, name
+        # Ordem cronológica sai do próprio índice
+        assert "TEMP B-TREE FOR ORDER BY" not in plan, name
+
+def test_daily_sales_join_uses_indexes(legacy_engine):
+    migrate(legacy_engine)
+    query = (
+        select(func.date(Purchase.created_at), func.sum(PurchaseItem.quantity), func.sum(PurchaseItem.price))
+        .join(PurchaseItem, Purchase.id == PurchaseItem.purchase_id)
+        .where(Purchase.created_at >= datetime(2024, 6, 1))
+        .group_by(func.date(Purchase.created_at))
+    )
+    plan = query_plan(legacy_engine, query)
+
+    assert "ix_purchases_created_at" in plan
+    assert "ix_purchase_items_purchase_id" in plan
+
+def test_migrate_is_idempotent(legacy_engine):
+    migrate(legacy_engine)
+    assert migrate(legacy_engine) == []
+    assert applied_versions(legacy_engine) == [m.version for m in MIGRATIONS]
@@ -0,0 +1,104 @@
+import pytest
+import asyncio
+from src.ml.inference_service import SentimentInferenceService
+from src.ml.sentiment_analyzer import SentimentAnalyzer
+from benchmarks.tiny_model import synthetic_reviews
+
+@pytest.fixture
+def reviews():
+    return synthetic_reviews(48, max_words=40)
+
+@pytest.fixture
+def expected(tiny_model_dir, tmp_path, monkeypatch, reviews):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    return SentimentAnalyzer(model_name=tiny_model_dir).analyze_reviews(reviews)
+
+def _run_concurrently(service, reviews):
+    async def run():
+        await service.start()
+        try:
+            return await asyncio.gather(*[service.analyze_review(review) for review in reviews])
+        finally:
+            await service.stop()
+    return asyncio.run(run())
+
+def _assert_same_results(results, expected):
+    assert [r['id'] for r in results] == [e['id'] for e in expected]
+    for result, reference in zip(results, expected):
+        assert result['sentiment'] == reference['sentiment']
+        assert result['sentiment_score'] == pytest.approx(reference['sentiment_score'], abs=1e-4)
+
+def test_concurrent_requests_are_micro_batched(tiny_model_dir, reviews, expected):
+    service = SentimentInferenceService(
+        analyzer_kwargs={"model_name": tiny_model_dir},
+        max_batch_size=16,
+        batch_window_ms=50
+    )
+    results = _run_concurrently(service, reviews)
+
+    _assert_same_results(results, expected)
+    stats = service.stats()
+    assert stats['items'] == len(reviews)
+    assert stats['largest_batch'] <= 16
+    assert stats['batches'] <= len(reviews) // 4
+
+def test_batch_window_bounds_latency(tiny_model_dir, reviews):
+    service = SentimentInferenceService(
+        analyzer_kwargs={"model_name": tiny_model_dir},
+        max_batch_size=1000,
+        batch_window_ms=10
+    )
+
+    async def run():
+        await service.start()
+        await service.warmup()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        # Uma avaliação sozinha não espera o lote encher
+        await service.analyze_review(reviews[0])
+        elapsed = loop.time() - start
+        await service.stop()
+        return elapsed
+
+    assert asyncio.run(run()) < 1.0
+    assert service.stats()['batches'] == 1
+
+def test_errors_reach_every_caller(tiny_model_dir, reviews, monkeypatch):
+    service = SentimentInferenceService(analyzer_kwargs={"model_name": tiny_model_dir}, batch_window_ms=20)
+
+    def fail(reviews, batch_size):
+        raise RuntimeError("falha no modelo")
+
+    monkeypatch.setattr(service.analyzer, "analyze_reviews", fail)
+
+    async def run():
+        await service.start()
+        try:
+            return await asyncio.gather(
+                *[service.analyze_review(review) for review in reviews[:4]],
+                return_exceptions=True
+            )
+        finally:
+            await service.stop()
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_process_pool_executor(tiny_model_dir, reviews, expected):
+    service = SentimentInferenceService(
+        analyzer_kwargs={"model_name": tiny_model_dir},
+        max_batch_size=16,
+        batch_window_ms=20,
+        workers=2,
+        executor="process"
+    )
+    results = _run_concurrently(service, reviews)
+
+    _assert_same_results(results, expected)
+    # O modelo só é carregado nos processos do pool
+    assert not service.analyzer.is_loaded
+
+def test_requires_start(tiny_model_dir, reviews):
+    service = SentimentInferenceService(analyzer_kwargs={"model_name": tiny_model_dir})
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.analyze_review(reviews[0]))
@@ -0,0 +1,58 @@
+import pytest
+import asyncio
+import numpy as np
+from src.api.model_registry import ModelRegistry
+from src.ml.recommender import ProductRecommender
+from src.ml.utils import save_artifact
+
+@pytest.fixture
+def products():
+    return [
+        {"id": i, "name": f"Produto {i}", "category": "Livros" if i % 2 else "Casa", "description": f"item {i % 4}"}
+        for i in range(1, 21)
+    ]
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch, products):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    ProductRecommender(top_k=5).fit(products)
+    registry = ModelRegistry(lambda: ProductRecommender(mmap_mode='r'), poll_interval=0.05)
+    assert registry.load_latest()
+    return registry
+
+def test_invalid_artifact_is_rejected(registry):
+    served = registry.current
+    # Artefato publicado com o índice de vizinhos truncado
+    save_artifact(
+        served.artifacts_path,
+        arrays={
+            'product_ids': np.arange(1, 21, dtype=np.int64),
+            'id_to_row': np.arange(-1, 20, dtype=np.int32),
+            'neighbor_indices': np.zeros((3, 5), dtype=np.int32),
+            'neighbor_scores': np.zeros((3, 5), dtype=np.float32)
+        },
+        metadata={'mode': 'top_k', 'top_k': 5, 'n_products': 20}
+    )
+
+    with pytest.raises(ValueError):
+        registry.load_latest()
+    assert registry.current is served
+    assert "vizinhos" in registry.last_error
+
+def test_poller_swaps_new_version(registry, products):
+    served = registry.current
+
+    async def run():
+        await registry.start()
+        ProductRecommender(top_k=5).fit(products[:10])
+        for _ in range(100):
+            if registry.current is not served:
+                break
+            await asyncio.sleep(0.02)
+        await registry.stop()
+
+    asyncio.run(run())
+    assert registry.current is not served
+    assert len(registry.current.product_ids) == 10
+    # O modelo antigo continua utilizável por requisições em andamento
+    assert len(served.recommend_products(15, 3)) == 3
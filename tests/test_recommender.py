@@ -1,5 +1,7 @@
 import pytest
-from src.ml.recommender import ProductRecommender
+from src.ml.recommender import ProductRecommender, catalog_fingerprint, load_or_fit
+from src.ml.collaborative import CollaborativeRecommender
+from src.ml.reranker import product_features
 import pandas as pd
 import numpy as np
 
@@ -57,4 +59,273 @@ def test_recommend_for_user(sample_products):
     
     assert len(recommendations) == 2
     assert all(isinstance(rec_id, int) for rec_id in recommendations)
-    assert len(set(recommendations)) == len(recommendations)  # Não deve haver duplicatas 
\ No newline at end of file
+    assert len(set(recommendations)) == len(recommendations)  # Não deve haver duplicatas 
+
+def test_recommender_fit_top_k(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    recommender = ProductRecommender(top_k=1)
+    recommender.fit(sample_products)
+
+    assert recommender.similarity_matrix is None
+    assert recommender.neighbor_indices.shape == (len(sample_products), 1)
+    assert recommender.neighbor_scores.shape == (len(sample_products), 1)
+
+    recommendations = recommender.recommend_products(product_id=1, n_recommendations=2)
+    assert len(recommendations) == 1
+    assert 1 not in recommendations
+
+
+def test_top_k_matches_dense_ranking(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    products = [
+        {
+            "id": i + 1,
+            "name": f"Produto {i % 7}",
+            "category": ["Eletrônicos", "Acessórios", "Casa"][i % 3],
+            "description": f"descricao item {i % 5} modelo {i % 11}"
+        }
+        for i in range(40)
+    ]
+    dense = ProductRecommender()
+    dense.fit(products)
+    sparse = ProductRecommender(top_k=5, block_size=7)
+    sparse.fit(products)
+
+    similarity = dense.similarity_matrix.copy()
+    np.fill_diagonal(similarity, -np.inf)
+    expected_scores = -np.sort(-similarity, axis=1)[:, :5]
+
+    np.testing.assert_allclose(sparse.neighbor_scores, expected_scores, rtol=1e-5, atol=1e-6)
+    assert not (sparse.neighbor_indices == np.arange(40)[:, None]).any()
+
+
+def test_recommend_products_unknown_id(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    recommender = ProductRecommender()
+    recommender.fit(sample_products)
+
+    with pytest.raises(ValueError):
+        recommender.recommend_products(product_id=99)
+
+
+def test_recommend_products_batch(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    for top_k in (None, 2):
+        recommender = ProductRecommender(top_k=top_k)
+        recommender.fit(sample_products)
+
+        recommendations = recommender.recommend_products_batch([1, 3, 2], n_recommendations=2)
+
+        assert recommendations.shape == (3, 2)
+        for product_id, row in zip([1, 3, 2], recommendations):
+            assert row.tolist() == recommender.recommend_products(product_id, n_recommendations=2)
+            assert product_id not in row
+
+        for n in (0, -1):
+            with pytest.raises(ValueError):
+                recommender.recommend_products_batch([1, 3], n_recommendations=n)
+
+
+def test_save_and_load_mmap_artifact(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    for top_k in (None, 2):
+        trained = ProductRecommender(top_k=top_k)
+        trained.fit(sample_products)
+
+        loaded = ProductRecommender(mmap_mode='r')
+        loaded._load_model()
+
+        assert loaded.model_version == trained.model_version
+        assert isinstance(loaded.product_ids, np.memmap)
+        for product in sample_products:
+            assert loaded.recommend_products(product["id"], 2) == trained.recommend_products(product["id"], 2)
+
+    latest = (tmp_path / "recommender" / "LATEST").read_text()
+    assert latest == trained.model_version
+    assert (tmp_path / "recommender" / latest / "metadata.json").exists()
+
+
+def test_old_artifact_versions_are_pruned(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    recommender = ProductRecommender(keep_versions=2)
+    for _ in range(4):
+        recommender.fit(sample_products)
+
+    versions = [p.name for p in (tmp_path / "recommender").iterdir() if p.name != "LATEST"]
+    assert len(versions) == 2
+    assert recommender.model_version in versions
+
+
+def _catalog(ids):
+    return [
+        {
+            "id": i,
+            "name": f"Produto {i % 7}",
+            "category": ["Eletrônicos", "Acessórios", "Casa"][i % 3],
+            "description": f"descricao item {i % 5} modelo {i % 11}"
+        }
+        for i in ids
+    ]
+
+
+def _assert_index_is_exact(recommender):
+    from src.ml.recommender import _top_k_neighbors
+
+    n_products = len(recommender.product_ids)
+    _, expected_scores = _top_k_neighbors(
+        recommender.tfidf_matrix, recommender.tfidf_matrix, recommender.neighbor_indices.shape[1],
+        recommender.block_size, query_rows=np.arange(n_products)
+    )
+    np.testing.assert_allclose(recommender.neighbor_scores, expected_scores, rtol=1e-5, atol=1e-6)
+    assert not (recommender.neighbor_indices == np.arange(n_products)[:, None]).any()
+
+
+def test_incremental_catalog_updates(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    recommender = ProductRecommender(top_k=5, block_size=8)
+    recommender.fit(_catalog(range(1, 41)))
+
+    recommender.add_products(_catalog(range(41, 51)))
+    _assert_index_is_exact(recommender)
+
+    recommender.remove_products([3, 17, 45])
+    _assert_index_is_exact(recommender)
+    with pytest.raises(ValueError):
+        recommender.recommend_products(17)
+
+    updated = _catalog([5])[0]
+    updated["description"] = "descricao item 2 modelo 9"
+    recommender.update_products([updated])
+    _assert_index_is_exact(recommender)
+
+    # O índice atualizado é persistido e pode ser carregado por outro processo
+    loaded = ProductRecommender(mmap_mode='r')
+    assert loaded.recommend_products(48, 5) == recommender.recommend_products(48, 5)
+    assert loaded.updates_since_fit == 3
+
+    # Um carregado a partir do disco também aceita atualizações
+    loaded.add_products(_catalog([60]))
+    _assert_index_is_exact(loaded)
+
+
+def test_incremental_updates_require_top_k(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    recommender = ProductRecommender()
+    recommender.fit(sample_products)
+
+    with pytest.raises(ValueError):
+        recommender.add_products(_catalog([10]))
+
+
+def test_add_products_grows_small_catalog(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    recommender = ProductRecommender(top_k=5)
+    recommender.fit(sample_products)
+    assert recommender.neighbor_indices.shape[1] == 2
+
+    recommender.add_products(_catalog([10, 11]))
+
+    assert recommender.neighbor_indices.shape == (5, 4)
+    _assert_index_is_exact(recommender)
+
+
+def test_catalog_fingerprint_follows_incremental_updates(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    catalog = _catalog(range(1, 31))
+    assert catalog_fingerprint(catalog[::-1]) == catalog_fingerprint(catalog)
+
+    recommender = ProductRecommender(top_k=5)
+    recommender.fit(catalog)
+    assert recommender.catalog_fingerprint == catalog_fingerprint(catalog)
+
+    # Sem os hashes em memória: vêm do artefato
+    loaded = ProductRecommender()
+    loaded._load_model()
+    assert loaded.catalog_fingerprint == recommender.catalog_fingerprint
+
+    loaded.add_products(_catalog([40]))
+    loaded.remove_products([2])
+    updated = _catalog([5])[0]
+    updated["description"] = "descricao nova"
+    loaded.update_products([updated])
+
+    current = [p for p in catalog if p["id"] not in (2, 5)] + _catalog([40]) + [updated]
+    assert loaded.catalog_fingerprint == catalog_fingerprint(current)
+    assert loaded.catalog_fingerprint != recommender.catalog_fingerprint
+
+
+def test_load_or_fit_refits_only_when_catalog_changes(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    first = load_or_fit(sample_products)
+    assert first.model_version is not None
+
+    # Mesmo catálogo (em outra ordem e com campos extras): reaproveita o artefato
+    same = [{**p, "price": 10.0} for p in reversed(sample_products)]
+    assert load_or_fit(same, mmap_mode='r').model_version == first.model_version
+
+    changed = [dict(p) for p in sample_products]
+    changed[0]["description"] = "Smartphone com tela dobrável"
+    refit = load_or_fit(changed)
+    assert refit.model_version != first.model_version
+    assert refit.catalog_fingerprint == catalog_fingerprint(changed)
+
+
+def test_load_or_fit_with_own_model_path_keeps_shared_artifact(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path / "shared"))
+    served = load_or_fit(sample_products)
+    latest = tmp_path / "shared" / "recommender" / "LATEST"
+    published = latest.read_text()
+
+    changed = [dict(p) for p in sample_products]
+    changed[0]["description"] = "Smartphone com tela dobrável"
+    stats = pd.DataFrame({
+        'id': [p['id'] for p in changed],
+        'stock': [0] + [10] * (len(changed) - 1),
+        'reviews': 0, 'score_sum': 0.0, 'scored': 0, 'quantity': 0
+    })
+    calls = []
+
+    def features():
+        calls.append(1)
+        return product_features(stats)
+
+    own = load_or_fit(changed, product_features=features, model_path=str(tmp_path / "dashboard"))
+    assert own.model_version != served.model_version
+    assert latest.read_text() == published
+    assert (tmp_path / "dashboard" / "recommender" / "LATEST").exists()
+    assert own.product_features is not None and own.product_features[0, -1] == 0
+    assert calls == [1]
+
+    # Artefato reaproveitado: os atributos não são recalculados
+    load_or_fit(changed, product_features=features, model_path=str(tmp_path / "dashboard"))
+    assert calls == [1]
+
+
+def test_dashboard_refit_leaves_api_model_directory_untouched(sample_products, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    interactions = pd.DataFrame({
+        "user_id": [1, 1, 2, 2, 3],
+        "product_id": [1, 2, 2, 3, 1],
+        "weight": 1.0
+    })
+    load_or_fit(sample_products)
+    CollaborativeRecommender(n_factors=2).fit(interactions)
+
+    def api_files():
+        return {
+            str(path.relative_to(tmp_path)): path.stat().st_mtime_ns
+            for name in ("recommender", "collaborative")
+            for path in (tmp_path / name).rglob("*")
+        }
+
+    before = api_files()
+    changed = [dict(p) for p in sample_products]
+    changed[0]["description"] = "Smartphone com tela dobrável"
+
+    # Mesmo caminho padrão do dashboard (MODEL_PATH/dashboard)
+    dashboard = load_or_fit(changed, mmap_mode='r', model_path=str(tmp_path / "dashboard"))
+    dashboard.user_model.fit(interactions)
+
+    assert api_files() == before
+    assert dashboard.user_model.model_path == str(tmp_path / "dashboard")
+    assert (tmp_path / "dashboard" / "collaborative").exists()
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from src.database.config import Base
+from src.database.models import Product, Purchase, PurchaseItem, Review, User
+from src.ml.recommender import ProductRecommender
+from src.ml.reranker import FEATURES, HybridReranker, load_product_stats, parse_weights, product_features
+
+def _catalog(ids):
+    return [
+        {
+            "id": i,
+            "name": f"Produto {i % 7}",
+            "category": ["Eletrônicos", "Acessórios", "Casa"][i % 3],
+            "description": f"descricao item {i % 5} modelo {i % 11}"
+        }
+        for i in ids
+    ]
+
+def _stats(ids, rng):
+    return pd.DataFrame({
+        "id": list(ids),
+        "stock": rng.integers(0, 3, len(ids)),
+        "reviews": rng.integers(0, 50, len(ids)),
+        "score_sum": rng.random(len(ids)) * 20,
+        "scored": rng.integers(20, 40, len(ids)),
+        "quantity": rng.integers(0, 1000, len(ids))
+    })
+
+# Só a similaridade conta: mesma ordem do ranking por conteúdo
+SIMILARITY_ONLY = {"similarity": 1.0, **{name: 0.0 for name in FEATURES}}
+
+def test_product_features_are_normalized():
+    stats = pd.DataFrame({
+        "id": [10, 11, 12],
+        "stock": [5, 0, None],
+        "reviews": [100, 1, None],
+        "score_sum": [90.0, 1.0, None],
+        "scored": [100, 1, None],
+        "quantity": [1000, 0, None]
+    })
+    features = product_features(stats)
+
+    assert list(features.columns) == list(FEATURES)
+    assert features.loc[10].tolist() == pytest.approx([(90 + 2.5) / 105, 1.0, 1.0, 1.0])
+    # Uma única avaliação ótima quase não tira o produto do neutro
+    assert features.loc[11, "sentiment"] == pytest.approx(3.5 / 6)
+    assert features.loc[11, "in_stock"] == 0.0
+    assert features.loc[12].tolist() == pytest.approx([0.5, 0.0, 0.0, 0.0])
+
+@pytest.mark.parametrize("top_k", [None, 20])
+def test_similarity_only_weights_keep_content_ranking(tmp_path, monkeypatch, top_k):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    catalog = _catalog(range(1, 61))
+    plain = ProductRecommender(top_k=top_k)
+    plain.fit(catalog)
+    features = product_features(_stats(range(1, 61), np.random.default_rng(0)))
+    reranked = ProductRecommender(top_k=top_k, reranker=HybridReranker(SIMILARITY_ONLY, n_candidates=20))
+    reranked.fit(catalog, features)
+
+    dense = ProductRecommender()
+    dense.fit(catalog)
+    for product_id in (1, 17, 42):
+        similarity = dense.similarity_matrix[dense._lookup_row(product_id)]
+        expected = plain.recommend_products(product_id, 5)
+        result = reranked.recommend_products(product_id, 5)
+        # Empates de similaridade podem sair em outra ordem
+        np.testing.assert_allclose(
+            similarity[dense._lookup_rows(result)], similarity[dense._lookup_rows(expected)], rtol=1e-5
+        )
+
+def test_out_of_stock_and_poorly_reviewed_products_drop(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    catalog = _catalog(range(1, 61))
+    stats = _stats(range(1, 61), np.random.default_rng(1)).assign(stock=5)
+    plain = ProductRecommender(top_k=20)
+    plain.fit(catalog)
+    neighbors = plain.recommend_products(1, 5)
+    sold_out, badly_reviewed = neighbors[0], neighbors[1]
+    stats.loc[stats["id"] == sold_out, "stock"] = 0
+    stats.loc[stats["id"] == badly_reviewed, ["reviews", "score_sum", "scored"]] = [500, 0.0, 500]
+
+    recommender = ProductRecommender(top_k=20)
+    recommender.fit(catalog, product_features(stats))
+    result = recommender.recommend_products(1, 5)
+
+    assert sold_out not in result and badly_reviewed not in result
+    batch = recommender.recommend_products_batch([1, 2, 3], 5)
+    assert batch[0].tolist() == result
+    assert batch[2].tolist() == recommender.recommend_products(3, 5)
+
+def test_features_are_persisted_and_follow_catalog_updates(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    stats = _stats(range(1, 41), np.random.default_rng(2))
+    recommender = ProductRecommender(top_k=10)
+    # O produto 40 não tem estatísticas: recebe os atributos padrão
+    recommender.fit(_catalog(range(1, 41)), product_features(stats[stats["id"] < 40]))
+    assert recommender.product_features[-1].tolist() == pytest.approx([0.5, 0.0, 0.0, 1.0])
+
+    loaded = ProductRecommender(mmap_mode="r")
+    assert loaded.recommend_products(7, 5) == recommender.recommend_products(7, 5)
+    np.testing.assert_array_equal(loaded.product_features, recommender.product_features)
+
+    new_products = [dict(product, stock=0) for product in _catalog([41, 42])]
+    loaded.add_products(new_products)
+    loaded.remove_products([3])
+    assert loaded.product_features.shape == (len(loaded.product_ids), len(FEATURES))
+    assert loaded.product_features[-2:, FEATURES.index("in_stock")].tolist() == [0.0, 0.0]
+    np.testing.assert_array_equal(
+        loaded.product_features[:-2], np.delete(recommender.product_features, 2, axis=0)
+    )
+
+    # Editar um produto mantém sentimento, avaliações e popularidade; só o estoque muda
+    before = loaded.product_features[loaded._lookup_row(5)].copy()
+    loaded.update_products([dict(_catalog([5])[0], description="descricao nova", stock=0)])
+    after = loaded.product_features[loaded._lookup_row(5)]
+    assert after[:3].tolist() == pytest.approx(before[:3].tolist())
+    assert after[FEATURES.index("in_stock")] == 0.0
+    loaded.update_products([dict(_catalog([6])[0], description="outra descricao")])
+    np.testing.assert_array_equal(
+        loaded.product_features[loaded._lookup_row(6)], recommender.product_features[recommender._lookup_row(6)]
+    )
+
+def test_load_product_stats_aggregates_reviews_and_sales():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(insert(User), [{"id": 1, "name": "Ana", "email": "ana@example.com"}])
+        db.execute(insert(Product), [
+            {"id": 1, "name": "A", "price": 10.0, "stock": 3},
+            {"id": 2, "name": "B", "price": 20.0, "stock": 0}
+        ])
+        db.execute(insert(Review), [
+            {"user_id": 1, "product_id": 1, "rating": 5, "sentiment_score": 0.9},
+            {"user_id": 1, "product_id": 1, "rating": 4, "sentiment_score": None}
+        ])
+        db.execute(insert(Purchase), [{"id": 1, "user_id": 1, "total_amount": 50.0, "status": "completed"}])
+        db.execute(insert(PurchaseItem), [
+            {"purchase_id": 1, "product_id": 1, "quantity": 2, "price": 10.0},
+            {"purchase_id": 1, "product_id": 1, "quantity": 1, "price": 10.0}
+        ])
+        stats = load_product_stats(db).set_index("id")
+
+    assert stats.loc[1].tolist() == [3, 2, 0.9, 1, 3]
+    assert stats.loc[2, "stock"] == 0 and stats.loc[2, ["reviews", "quantity"]].isna().all()
+
+def test_parse_weights():
+    assert parse_weights("sentiment=0.5, in_stock=2") == {"sentiment": 0.5, "in_stock": 2.0}
+    assert HybridReranker(parse_weights("")).weights["similarity"] == 1.0
+    with pytest.raises(ValueError):
+        parse_weights("price=1")
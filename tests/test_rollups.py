@@ -0,0 +1,92 @@
+from datetime import date, datetime
+import pandas as pd
+import pytest
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+from src.database.models import DailySales, DailySentiment, Purchase, PurchaseItem, Review
+from sqlalchemy.dialects import postgresql
+from src.database.rollups import date_bounds, period_start, refresh_rollups, sales_by_period, sentiment_by_period
+
+@pytest.fixture
+def engine(synthetic_engine):
+    return synthetic_engine(n_users=100, n_products=40, n_purchase_items=2000, n_reviews=1500, days=30)
+
+def scalar(engine, query):
+    with engine.connect() as connection:
+        return connection.execute(query).scalar()
+
+def test_full_refresh_matches_fact_tables(engine):
+    results = refresh_rollups(engine, full=True)
+    assert results["daily_sales"].rows > 0
+
+    assert scalar(engine, select(func.sum(DailySales.revenue))) == pytest.approx(
+        scalar(engine, select(func.sum(PurchaseItem.price)))
+    )
+    assert scalar(engine, select(func.sum(DailySales.line_items))) == 2000
+    assert scalar(engine, select(func.sum(DailySentiment.reviews))) == 1500
+    assert scalar(engine, select(func.sum(DailySentiment.positive))) == scalar(
+        engine, select(func.count()).select_from(Review).where(Review.sentiment == "POSITIVE")
+    )
+
+    with Session(engine) as db:
+        sales = sales_by_period(db)
+        sentiment = sentiment_by_period(db)
+        reviews = pd.DataFrame(db.execute(select(Review.created_at, Review.sentiment_score)).all())
+    assert sales["date"].is_monotonic_increasing
+    assert sales["sales"].sum() == scalar(engine, select(func.sum(PurchaseItem.quantity)))
+    # Média do dia a partir de soma/contagem, igual à média das avaliações do dia
+    expected = reviews.groupby(reviews["created_at"].dt.normalize())["sentiment_score"].mean()
+    assert sentiment.set_index("date")["sentiment_score"].values == pytest.approx(expected.values)
+
+def test_incremental_refresh_only_touches_new_days(engine):
+    refresh_rollups(engine, full=True)
+    first_day = scalar(engine, select(func.min(DailySales.day)))
+    last_day = scalar(engine, select(func.max(DailySales.day)))
+    with engine.begin() as connection:
+        # Marca um dia antigo: não pode ser recalculado na atualização incremental
+        connection.execute(update(DailySales).where(DailySales.day == first_day).values(revenue=-1.0))
+        purchase_id = connection.execute(
+            insert(Purchase).values(user_id=1, total_amount=50.0, status="completed", created_at=datetime(2024, 7, 2, 10))
+        ).inserted_primary_key[0]
+        connection.execute(insert(PurchaseItem).values(purchase_id=purchase_id, product_id=1, quantity=2, price=50.0))
+
+    results = refresh_rollups(engine)
+
+    assert results["daily_sales"].since == last_day
+    assert results["daily_sentiment"].since == scalar(engine, select(func.max(DailySentiment.day)))
+    with engine.connect() as connection:
+        new_day = connection.execute(
+            select(func.sum(DailySales.quantity), func.sum(DailySales.revenue)).where(DailySales.day == date(2024, 7, 2))
+        ).one()
+        assert tuple(new_day) == (2, 50.0)
+        assert set(connection.execute(select(DailySales.revenue).where(DailySales.day == first_day)).scalars()) == {-1.0}
+
+    # A reconstrução completa corrige o dia antigo
+    refresh_rollups(engine, full=True)
+    assert scalar(engine, select(func.min(DailySales.revenue))) > 0
+
+@pytest.mark.parametrize("grain", ["week", "month"])
+def test_period_grouping_and_range_run_in_sql(engine, grain):
+    refresh_rollups(engine, full=True)
+    start, end = date(2024, 6, 5), date(2024, 6, 26)
+    with Session(engine) as db:
+        assert date_bounds(db) == (date(2024, 5, 31), date(2024, 6, 29))
+        daily = sales_by_period(db, start, end)
+        grouped = sales_by_period(db, start, end, grain=grain)
+        sentiment = sentiment_by_period(db, start, end, grain=grain)
+
+    assert daily["date"].min() == pd.Timestamp(start) and daily["date"].max() == pd.Timestamp(end)
+    assert grouped["sales"].sum() == daily["sales"].sum()
+    assert grouped["revenue"].sum() == pytest.approx(daily["revenue"].sum())
+    expected = daily.groupby(daily["date"].dt.to_period("W" if grain == "week" else "M").dt.start_time)["sales"].sum()
+    assert grouped.set_index("date")["sales"].to_dict() == expected.to_dict()
+    assert len(sentiment) == len(grouped)
+    assert (sentiment["sentiment_score"] == sentiment["score_sum"] / sentiment["scored"]).all()
+
+def test_period_start_uses_date_trunc_on_postgres():
+    sql = str(select(period_start(DailySales.day, "week", "postgresql")).compile(dialect=postgresql.dialect()))
+    assert "date_trunc" in sql and "AS DATE" in sql
+    with pytest.raises(ValueError):
+        period_start(DailySales.day, "year", "postgresql")
+    with pytest.raises(ValueError):
+        period_start(DailySales.day, "week", "mysql")
@@ -1,4 +1,6 @@
 import pytest
+import threading
+import time
 from src.ml.sentiment_analyzer import SentimentAnalyzer
 
 @pytest.fixture
@@ -93,4 +95,154 @@ def test_combine_sentiment_and_rating(sentiment_analyzer):
         rating=3
     )
     assert result['sentiment'] == "NEUTRAL"
-    assert 0.3 <= result['score'] <= 0.7 
\ No newline at end of file
+    assert 0.3 <= result['score'] <= 0.7 
+@pytest.fixture
+def tiny_analyzer(tiny_model_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    return SentimentAnalyzer(model_name=tiny_model_dir)
+
+def _reference_pipeline(analyzer):
+    """Pipeline do transformers sobre o mesmo modelo, usado como referência"""
+    from transformers import pipeline
+    analyzer.warmup()
+    return pipeline("sentiment-analysis", model=analyzer.backend.model, tokenizer=analyzer.tokenizer)
+
+def test_analyze_texts_matches_pipeline(tiny_analyzer):
+    texts = [
+        "Produto excelente, superou minhas expectativas!",
+        "",
+        "ruim",
+        "Chegou rápido e a qualidade é muito boa, recomendo a loja para todos",
+        "   ",
+        "produto ruim " * 400
+    ]
+    results = tiny_analyzer.analyze_texts(texts, batch_size=2)
+    reference = _reference_pipeline(tiny_analyzer)
+
+    assert len(results) == len(texts)
+    for text, result in zip(texts, results):
+        if not text.strip():
+            assert result == {'sentiment': 'NEUTRAL', 'score': 0.5}
+            continue
+        expected = reference(text, truncation=True, max_length=512)[0]
+        assert result['sentiment'] == expected['label']
+        assert result['score'] == pytest.approx(expected['score'], abs=1e-4)
+        assert tiny_analyzer.analyze_text(text) == result
+
+def test_segments_strategies(tiny_model_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    token_ids = list(range(20))
+
+    # max_length=10 deixa 8 tokens de conteúdo ([CLS] e [SEP] ocupam 2)
+    head = SentimentAnalyzer(model_name=tiny_model_dir, max_length=10, truncation='head')
+    assert head._segments(token_ids) == [list(range(8))]
+    assert head._segments(token_ids[:5]) == [token_ids[:5]]
+
+    head_tail = SentimentAnalyzer(model_name=tiny_model_dir, max_length=10, truncation='head_tail')
+    assert head_tail._segments(token_ids) == [[0, 1] + list(range(14, 20))]
+
+    sliding = SentimentAnalyzer(model_name=tiny_model_dir, max_length=10, truncation='sliding_window')
+    assert sliding._segments(token_ids) == [list(range(s, s + 8)) for s in (0, 4, 8, 12)]
+
+    sliding.max_windows = 2
+    assert sliding._segments(token_ids) == [list(range(0, 8)), list(range(12, 20))]
+
+def test_sliding_window_averages_segments(tiny_model_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    analyzer = SentimentAnalyzer(model_name=tiny_model_dir, max_length=10, truncation='sliding_window')
+    text = "produto excelente chegou rápido mas a embalagem veio errado e o atendimento foi ruim demais"
+    result = analyzer.analyze_text(text)
+
+    reference = _reference_pipeline(analyzer)
+    tokenizer = analyzer.tokenizer
+    token_ids = tokenizer(text, add_special_tokens=False)['input_ids']
+    windows = [tokenizer.decode(segment) for segment in analyzer._segments(token_ids)]
+    probabilities = [reference(window, top_k=None) for window in windows]
+    mean = {}
+    for window_scores in probabilities:
+        for item in window_scores:
+            mean[item['label']] = mean.get(item['label'], 0) + item['score'] / len(windows)
+    label = max(mean, key=mean.get)
+
+    assert len(windows) > 1
+    assert result['sentiment'] == label
+    assert result['score'] == pytest.approx(mean[label], abs=1e-4)
+
+def test_invalid_truncation_strategy(tiny_model_dir):
+    with pytest.raises(ValueError):
+        SentimentAnalyzer(model_name=tiny_model_dir, truncation='middle')
+
+def test_analyze_reviews(tiny_analyzer, sample_reviews):
+    results = tiny_analyzer.analyze_reviews(sample_reviews + [{"id": 4, "rating": 4, "text": None}])
+
+    assert len(results) == len(sample_reviews) + 1
+    for review, result in zip(sample_reviews, results):
+        expected = tiny_analyzer.analyze_review(review)
+        assert result['id'] == review['id']
+        assert result['sentiment'] == expected['sentiment']
+        assert result['sentiment_score'] == pytest.approx(expected['sentiment_score'], abs=1e-4)
+
+def test_analyze_texts_uses_cache(tiny_analyzer, monkeypatch):
+    texts = ["Ótimo produto", " Ótimo   produto", "Chegou rápido", "Ótimo produto"]
+    first = tiny_analyzer.analyze_texts(texts)
+
+    scored = []
+    original = tiny_analyzer._score_texts
+    monkeypatch.setattr(tiny_analyzer, "_score_texts", lambda t, b: scored.extend(t) or original(t, b))
+    second = tiny_analyzer.analyze_texts(texts + ["produto ruim"])
+
+    assert second[:4] == first
+    assert first[0] == first[1] == first[3]
+    assert scored == ["produto ruim"]
+    assert tiny_analyzer.cache.stats()["hits"] == 2
+
+def test_model_is_loaded_lazily(tiny_analyzer):
+    assert not tiny_analyzer.is_loaded
+    assert tiny_analyzer.config is None
+
+    # Textos vazios não precisam do modelo
+    tiny_analyzer.analyze_texts(["", "   "])
+    assert not tiny_analyzer.is_loaded
+
+    tiny_analyzer.warmup()
+    assert tiny_analyzer.is_loaded
+    assert tiny_analyzer.tokenizer is not None
+
+def test_concurrent_first_use_loads_once(tiny_analyzer, monkeypatch):
+    loads = []
+    original = tiny_analyzer._load_model
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.05)
+        original()
+
+    monkeypatch.setattr(tiny_analyzer, "_load_model", slow_load)
+    results = [None] * 8
+
+    def worker(i):
+        results[i] = tiny_analyzer.analyze_text(f"produto bom {i}")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(result is not None for result in results)
+
+def test_hub_model_uses_local_copy(tiny_analyzer, tmp_path):
+    tiny_analyzer.warmup()
+    hub = SentimentAnalyzer(model_name="acme/bert-sentimento")
+    assert hub._model_source() == "acme/bert-sentimento"
+
+    # Simula a cópia feita após o primeiro download
+    hub._save_model(tiny_analyzer.tokenizer, tiny_analyzer.backend.model)
+    assert hub._model_source() == hub._local_model_dir()
+
+    hub.warmup()
+    text = "chegou rápido e a qualidade é boa"
+    assert hub.analyze_text(text)['sentiment'] == tiny_analyzer.analyze_text(text)['sentiment']
+    # Nenhum pipeline serializado com joblib
+    assert not list(tmp_path.rglob("*.joblib"))
@@ -0,0 +1,82 @@
+import gc
+import weakref
+import pytest
+import numpy as np
+import src.ml.sentiment_analyzer as sentiment_analyzer
+from src.ml.sentiment_analyzer import SentimentAnalyzer
+from benchmarks.tiny_model import synthetic_reviews
+
+@pytest.fixture
+def texts():
+    return [review["text"] for review in synthetic_reviews(64, max_words=80)]
+
+@pytest.fixture
+def reference(tiny_model_dir, tmp_path, monkeypatch, texts):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    return SentimentAnalyzer(model_name=tiny_model_dir, backend="torch").analyze_texts(texts)
+
+def _agreement(results, reference):
+    return np.mean([r['sentiment'] == e['sentiment'] for r, e in zip(results, reference)])
+
+def test_quantized_backend_parity(tiny_model_dir, texts, reference):
+    analyzer = SentimentAnalyzer(model_name=tiny_model_dir, backend="quantized")
+    results = analyzer.analyze_texts(texts)
+
+    assert _agreement(results, reference) >= 0.9
+
+def test_onnx_backend_parity(tiny_model_dir, tmp_path, texts, reference):
+    pytest.importorskip("onnxruntime")
+    analyzer = SentimentAnalyzer(model_name=tiny_model_dir, backend="onnx")
+    results = analyzer.analyze_texts(texts)
+
+    assert _agreement(results, reference) == 1.0
+    np.testing.assert_allclose(
+        [r['score'] for r in results], [e['score'] for e in reference], atol=1e-4
+    )
+    # O export fica salvo localmente e é reaproveitado
+    assert list(tmp_path.glob("sentiment_exports/*/model.onnx"))
+
+@pytest.fixture
+def loaded_models(monkeypatch):
+    """Referências fracas aos modelos PyTorch entregues aos backends"""
+    refs = []
+    original = sentiment_analyzer.load_backend
+
+    def load_backend(name, model, export_dir):
+        refs.append(weakref.ref(model))
+        return original(name, model, export_dir)
+
+    monkeypatch.setattr(sentiment_analyzer, "load_backend", load_backend)
+    return refs
+
+def test_quantized_backend_keeps_no_fp32_linear_layers(tiny_model_dir, tmp_path, monkeypatch, loaded_models):
+    import torch
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    analyzer = SentimentAnalyzer(model_name=tiny_model_dir, backend="quantized")
+    analyzer.warmup()
+
+    assert not hasattr(analyzer, "model")
+    # Quantizado no lugar: o único modelo vivo é o do backend, sem camadas fp32
+    assert loaded_models[0]() is analyzer.backend.model
+    assert not any(type(module) is torch.nn.Linear for module in analyzer.backend.model.modules())
+
+def test_onnx_backend_releases_torch_model(tiny_model_dir, tmp_path, monkeypatch, loaded_models):
+    pytest.importorskip("onnxruntime")
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    analyzer = SentimentAnalyzer(model_name=tiny_model_dir, backend="onnx")
+    analyzer.warmup()
+    gc.collect()
+
+    assert loaded_models[0]() is None
+    assert analyzer.config.num_labels == 3
+
+def test_backend_is_part_of_model_version(tiny_model_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    eager = SentimentAnalyzer(model_name=tiny_model_dir, backend="torch")
+    quantized = SentimentAnalyzer(model_name=tiny_model_dir, backend="quantized")
+
+    assert eager.model_version != quantized.model_version
+
+def test_unknown_backend(tiny_model_dir):
+    with pytest.raises(ValueError):
+        SentimentAnalyzer(model_name=tiny_model_dir, backend="tensorrt")
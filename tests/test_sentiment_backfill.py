@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from src.database.models import DailySentiment, Review
+from src.database.rollups import refresh_rollups
+from src.ml.sentiment_analyzer import SentimentAnalyzer
+from src.ml.sentiment_backfill import backfill, read_checkpoint, sentiment_update
+
+@pytest.fixture
+def engine(synthetic_engine, tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path / "models"))
+    engine = synthetic_engine(
+        n_users=50, n_products=20, n_purchase_items=100, n_reviews=120, days=10, label_sentiment=False
+    )
+    refresh_rollups(engine, full=True)
+    return engine
+
+def stored(engine):
+    with engine.connect() as connection:
+        return {row.id: row for row in connection.execute(
+            select(Review.id, Review.text, Review.rating, Review.sentiment, Review.sentiment_score)
+        )}
+
+def unscored(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).where(Review.sentiment_score.is_(None))).scalar()
+
+def test_backfill_scores_all_reviews_and_refreshes_rollup(engine, tiny_model_dir):
+    kwargs = {"model_name": tiny_model_dir}
+    result = backfill(engine, chunk_size=50, batch_size=16, analyzer_kwargs=kwargs)
+
+    assert result.scored == 120 and unscored(engine) == 0
+    rows = stored(engine)
+    expected = SentimentAnalyzer(**kwargs).analyze_reviews(
+        [{"id": r.id, "text": r.text, "rating": r.rating} for r in rows.values()]
+    )
+    for reference in expected:
+        assert rows[reference["id"]].sentiment == reference["sentiment"]
+        assert rows[reference["id"]].sentiment_score == pytest.approx(reference["sentiment_score"])
+    with engine.connect() as connection:
+        assert connection.execute(select(func.sum(DailySentiment.scored))).scalar() == 120
+
+def test_backfill_resumes_from_checkpoint(engine, tiny_model_dir, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    kwargs = {"model_name": tiny_model_dir}
+    first = backfill(engine, chunk_size=30, checkpoint_path=checkpoint, limit=60, analyzer_kwargs=kwargs)
+
+    assert first.scored == 60 and unscored(engine) == 60
+    assert read_checkpoint(checkpoint)["last_id"] == first.last_id == 60
+
+    second = backfill(engine, chunk_size=30, checkpoint_path=checkpoint, analyzer_kwargs=kwargs)
+    assert second.scored == 60 and unscored(engine) == 0
+    assert read_checkpoint(checkpoint)["scored"] == 120
+    # Nada novo: a próxima execução termina sem pontuar
+    assert backfill(engine, checkpoint_path=checkpoint, analyzer_kwargs=kwargs).scored == 0
+    # Outro modo não reaproveita o checkpoint
+    assert backfill(engine, chunk_size=60, checkpoint_path=checkpoint, rescore=True, analyzer_kwargs=kwargs).scored == 120
+
+def test_backfill_with_worker_processes(engine, tiny_model_dir, tmp_path):
+    kwargs = {"model_name": tiny_model_dir}
+    backfill(engine, chunk_size=25, checkpoint_path=str(tmp_path / "single.json"), analyzer_kwargs=kwargs)
+    single = stored(engine)
+
+    result = backfill(
+        engine, workers=2, chunk_size=25, checkpoint_path=str(tmp_path / "pool.json"),
+        rescore=True, analyzer_kwargs=kwargs
+    )
+
+    assert result.scored == 120 and result.last_id == 120
+    for review_id, row in stored(engine).items():
+        assert row.sentiment == single[review_id].sentiment
+        assert row.sentiment_score == pytest.approx(single[review_id].sentiment_score)
+
+def test_postgres_update_joins_values_list():
+    statement = sentiment_update([
+        {"id": 1, "sentiment": "POSITIVE", "sentiment_score": 0.9},
+        {"id": 2, "sentiment": "NEGATIVE", "sentiment_score": 0.1}
+    ])
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "UPDATE reviews SET" in sql and "FROM (VALUES" in sql
@@ -0,0 +1,35 @@
+import pytest
+from src.ml.sentiment_cache import SentimentCache
+
+def test_normalized_texts_share_key():
+    assert SentimentCache.make_key("Ótimo   produto", "v1") == SentimentCache.make_key(" Ótimo produto\n", "v1")
+    # Compatibilidade NFKC (ﬁ -> fi), mas a caixa distingue as chaves (modelo cased)
+    assert SentimentCache.make_key("ﬁcou ótimo", "v1") == SentimentCache.make_key("ficou ótimo", "v1")
+    assert SentimentCache.make_key("Ótimo produto", "v1") != SentimentCache.make_key("ótimo produto", "v1")
+    assert SentimentCache.make_key("Ótimo produto", "v1") != SentimentCache.make_key("Ótimo produto", "v2")
+    assert SentimentCache.make_key("Ótimo produto", "v1") != SentimentCache.make_key("Péssimo produto", "v1")
+
+def test_lru_eviction_and_counters():
+    cache = SentimentCache(max_size=2)
+    cache.set_many({"a": {"sentiment": "POSITIVE", "score": 0.9}, "b": {"sentiment": "NEGATIVE", "score": 0.8}})
+    cache.get_many(["a"])
+    cache.set_many({"c": {"sentiment": "NEUTRAL", "score": 0.6}})
+
+    found = cache.get_many(["a", "b", "c"])
+
+    assert set(found) == {"a", "c"}  # "b" era o menos usado
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(0.75)
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "sentiment_cache.db")
+    SentimentCache(db_path=db_path).set_many({"a": {"sentiment": "POSITIVE", "score": 0.9}})
+
+    cache = SentimentCache(db_path=db_path)
+    assert cache.get_many(["a", "z"]) == {"a": {"sentiment": "POSITIVE", "score": 0.9}}
+    assert cache.get_many(["a"])  # promovido para a memória
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from src.database.models import Product, Review
+from src.ml.collaborative import load_interactions
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+from src.database.snapshot import compact_table, export_snapshot, read_table, read_watermarks
+from src.ml.train import load_products, load_snapshot_interactions, load_snapshot_products
+
+@pytest.fixture
+def engine(synthetic_engine):
+    return synthetic_engine(n_users=100, n_products=50, n_purchase_items=2000, n_reviews=800, days=90)
+
+def test_export_partitions_by_month_and_reads_selected_columns(engine, tmp_path):
+    out = tmp_path / "snapshot"
+    results = {r.table: r for r in export_snapshot(engine, str(out), batch_size=300)}
+
+    assert results["purchase_items"].rows == 2000
+    assert results["reviews"].rows == 800
+    months = sorted(p.name for p in (out / "reviews").iterdir())
+    assert months == ["month=2024-04", "month=2024-05", "month=2024-06"]
+    assert not list(out.rglob(".tmp-*"))
+
+    reviews = read_table(str(out), "reviews", columns=["product_id", "rating"])
+    assert reviews.column_names == ["product_id", "rating"]
+    assert reviews.num_rows == 800
+    june = read_table(str(out), "reviews", columns=["id"], filter=ds.field("month") == "2024-06")
+    with Session(engine) as db:
+        expected = db.execute(select(Review.id).where(Review.created_at >= datetime(2024, 6, 1))).scalars()
+        assert sorted(june["id"].to_pylist()) == sorted(expected)
+
+def test_incremental_export_only_writes_new_and_updated_rows(engine, tmp_path):
+    out = str(tmp_path / "snapshot")
+    no_lag = timedelta(0)
+    export_snapshot(engine, out, lag=no_lag)
+    watermark = read_watermarks(out)["products"]["value"]
+
+    assert all(r.rows == 0 for r in export_snapshot(engine, out, lag=no_lag))
+
+    with engine.begin() as connection:
+        connection.execute(update(Product).where(Product.id == 3).values(name="Produto renomeado", updated_at=datetime(2030, 1, 1)))
+        connection.execute(insert(Review).values(
+            user_id=1, product_id=3, rating=5, text="Ótimo", created_at=datetime(2030, 1, 2), updated_at=datetime(2030, 1, 2)
+        ))
+    results = {r.table: r for r in export_snapshot(engine, out, lag=no_lag)}
+
+    assert results["products"].rows == 1 and results["reviews"].rows == 1
+    assert results["users"].rows == 0
+    assert read_watermarks(out)["products"]["value"] > watermark
+    products = read_table(out, "products", columns=["id", "name"])
+    assert products.num_rows == 50
+    assert dict(zip(products["id"].to_pylist(), products["name"].to_pylist()))[3] == "Produto renomeado"
+    assert read_table(out, "products", latest=False).num_rows == 51
+    assert read_table(out, "reviews", columns=["id"]).num_rows == 801
+
+def test_rows_committed_late_with_an_earlier_watermark_are_exported(engine, tmp_path):
+    out = str(tmp_path / "snapshot")
+    export_snapshot(engine, out, tables=["products"])
+    watermark = datetime.fromisoformat(read_watermarks(out)["products"]["value"])
+
+    # Transação confirmada depois da exportação, com updated_at anterior ao watermark
+    with engine.begin() as connection:
+        product_id = connection.execute(select(Product.id).order_by(Product.updated_at).limit(1)).scalar()
+        connection.execute(update(Product).where(Product.id == product_id).values(
+            name="Alterado tarde", updated_at=watermark - timedelta(minutes=1)
+        ))
+    result, = export_snapshot(engine, out, tables=["products"])
+
+    assert result.rows >= 1
+    assert read_watermarks(out)["products"]["value"] == watermark.isoformat()
+    products = read_table(out, "products", columns=["id", "name"])
+    assert products.num_rows == 50
+    assert dict(zip(products["id"].to_pylist(), products["name"].to_pylist()))[product_id] == "Alterado tarde"
+
+def test_compaction_keeps_one_file_with_latest_versions(engine, tmp_path):
+    out = tmp_path / "snapshot"
+    export_snapshot(engine, str(out), tables=["products"])
+    for name in ("Primeira alteração", "Segunda alteração"):
+        with engine.begin() as connection:
+            connection.execute(update(Product).where(Product.id == 3).values(name=name, updated_at=datetime.utcnow()))
+        export_snapshot(engine, str(out), tables=["products"])
+    before = read_table(str(out), "products")
+    assert read_table(str(out), "products", latest=False).num_rows > 50
+
+    assert compact_table(str(out), "products") >= 1
+
+    partitions = [p for p in (out / "products").iterdir() if p.is_dir()]
+    assert all(len(list(p.glob("part-*.parquet"))) == 1 for p in partitions)
+    assert not list(out.rglob(".tmp-*"))
+    assert read_table(str(out), "products", latest=False).num_rows == 50
+    after = read_table(str(out), "products")
+    assert after.sort_by("id").equals(before.sort_by("id"))
+    assert dict(zip(after["id"].to_pylist(), after["name"].to_pylist()))[3] == "Segunda alteração"
+
+def test_export_compacts_partitions_with_many_files(engine, tmp_path):
+    out = tmp_path / "snapshot"
+    export_snapshot(engine, str(out), tables=["products"], compact_after=2)
+    with engine.begin() as connection:
+        connection.execute(update(Product).values(updated_at=datetime(2030, 1, 1)))
+    export_snapshot(engine, str(out), tables=["products"], compact_after=2)
+
+    assert all(len(list(p.glob("part-*.parquet"))) == 1 for p in (out / "products").iterdir())
+    assert read_table(str(out), "products", latest=False).num_rows == 50
+
+def test_training_inputs_from_snapshot_match_database(engine, tmp_path):
+    out = str(tmp_path / "snapshot")
+    export_snapshot(engine, out)
+
+    with Session(engine) as db:
+        products = load_products(db)
+        interactions = load_interactions(db)
+    snapshot_interactions = load_snapshot_interactions(out)
+
+    assert load_snapshot_products(out) == sorted(products, key=lambda p: p["id"])
+    key = ["user_id", "product_id"]
+    assert snapshot_interactions.sort_values(key).reset_index(drop=True)[key].equals(
+        interactions.sort_values(key).reset_index(drop=True)[key].astype("int64")
+    )
+    assert snapshot_interactions["weight"].sum() == pytest.approx(interactions["weight"].sum())